@@ -1,34 +1,67 @@
+import os
+import sys
 import json
+import argparse
 
-# Your table schema extracted from Supabase
-supabase_schema = [
-    {"table_definition": "CREATE TABLE users (id uuid, email text, role text, created_at timestamp with time zone);"},
-    {"table_definition": "CREATE TABLE categories (id uuid, name text, slug text, description text, created_at timestamp with time zone);"},
-    {"table_definition": "CREATE TABLE articles (id uuid, title text, slug text, excerpt text, content text, category_id uuid, tags text[], read_time integer, image_url text, author_id uuid, published_at timestamp with time zone, views integer, seo_title text, seo_description text, created_at timestamp with time zone, updated_at timestamp with time zone, status text);"},
-    {"table_definition": "CREATE TABLE newsletter_subscriptions (id uuid, email text, status text, created_at timestamp with time zone, updated_at timestamp with time zone);"},
-    {"table_definition": "CREATE TABLE site_settings (id uuid, key text, value jsonb, updated_at timestamp with time zone, created_at timestamp with time zone);"},
-    {"table_definition": "CREATE TABLE scheduled_articles (id uuid, article_id uuid, scheduled_publish_time timestamp with time zone, status text, created_at timestamp with time zone);"},
-    {"table_definition": "CREATE TABLE workflow_states (id text, name text, state text, last_updated timestamp with time zone);"}
-]
-
-firestore_schema = {}
-
-for table in supabase_schema:
-    table_def = table["table_definition"]
-    table_name = table_def.split(" ")[2]  # Extract table name
-
-    # Extract columns
-    columns_part = table_def.split("(")[1].split(")")[0]
-    columns = [col.strip().split(" ")[0] for col in columns_part.split(",")]
-
-    # Convert to Firestore-friendly format
-    firestore_schema[table_name] = {
-        "collection_name": table_name,
-        "fields": columns
-    }
-
-# Save as Firestore JSON format
-with open("firestore_schema.json", "w") as f:
-    json.dump(firestore_schema, f, indent=4)
-
-print("🔥 Firestore schema JSON generated successfully!")
+from pg_dump_schema import parse_schema, qualified_reference, schema_entries
+
+# Configurations
+DUMP_FILE_PATH = "schema.sql"
+SCHEMA_FILE_PATH = "firestore_schema.json"
+
+# 🔹 Configure command line arguments
+parser = argparse.ArgumentParser(
+    description="Convert a Supabase schema dump (pg_dump --schema-only) into firestore_schema.json, with the "
+                "column types, primary keys and foreign keys the importers use")
+parser.add_argument("dump", nargs="?", default=DUMP_FILE_PATH,
+                    help=f"Path to the schema dump, or - for stdin (default: {DUMP_FILE_PATH})")
+parser.add_argument("--output", default=SCHEMA_FILE_PATH, help="Where to write the Firestore schema")
+parser.add_argument("--schemas", nargs="+", default=["public"], help="Postgres schemas to convert (default: public)")
+parser.add_argument("--tables", nargs="+", help="Only convert these tables")
+
+
+def read_dump(dump_path, schemas):
+    if dump_path == "-":
+        return parse_schema(sys.stdin, schemas)
+    if not os.path.exists(dump_path):
+        print(f"❌ ERROR: Schema dump '{dump_path}' not found.")
+        sys.exit(1)
+    with open(dump_path, "r", encoding="utf-8") as dump_file:
+        return parse_schema(dump_file, schemas)
+
+
+def main():
+    args = parser.parse_args()
+
+    try:
+        tables = read_dump(args.dump, args.schemas)
+    except (ValueError, OSError, UnicodeDecodeError) as e:
+        print(f"❌ ERROR: Failed to parse schema dump: {e}")
+        sys.exit(1)
+
+    if args.tables:
+        missing = set(args.tables) - {table.name for table in tables}
+        if missing:
+            print(f"⚠️ WARNING: Tables not found in dump: {', '.join(sorted(missing))}")
+        tables = [table for table in tables if table.name in args.tables]
+    if not tables:
+        print("❌ ERROR: No CREATE TABLE statements found in the dump.")
+        sys.exit(1)
+
+    for table in tables:
+        details = [f"{len(table.columns)} columns"]
+        if table.primary_key:
+            details.append(f"primary key ({', '.join(table.primary_key)})")
+        for foreign_key in table.foreign_keys:
+            details.append(f"{', '.join(foreign_key['columns'])} → {qualified_reference(foreign_key)}")
+        print(f"📋 {table.name}: {', '.join(details)}")
+
+    # Save as the flat [{table_name, column_name, data_type, ...}] list the importers read
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(schema_entries(tables), f, indent=4)
+
+    print(f"🔥 Firestore schema JSON generated successfully! ({len(tables)} tables written to '{args.output}')")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Content hashes of imported documents.
+
+``document_hash`` gives a stable hash of a document's content, independent of key
+order. ``DocumentHashStore`` keeps the hash of every document an import wrote in a
+local SQLite file, so a later delta import can skip unchanged records and find
+documents that have disappeared from the export without reading Firestore.
+``DocumentMerkleTree`` rolls the hashes of a collection up into a tree, so two
+copies of a collection can be compared a subtree at a time.
+"""
+
+import bisect
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from google.cloud.firestore_v1.document import DocumentReference
+
+# SQLite limits the number of bound parameters per statement
+SQLITE_PARAMETER_CHUNK = 500
+
+# Merkle leaves sum 128-bit digests modulo 2^128
+MERKLE_LEAF_MODULUS = 1 << 128
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        # Firestore returns timestamps in UTC, whatever offset they were written with. Naive
+        # datetimes are stored as UTC by the client library, so they are read back as such.
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc).isoformat()
+        return value.astimezone(timezone.utc).isoformat()
+    if isinstance(value, DocumentReference):
+        return value.id  # The column already determines the referenced collection
+    return str(value)
+
+
+def canonical_json(data):
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def document_hash(data):
+    return hashlib.blake2b(canonical_json(data).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class DocumentHashStore:
+    """SQLite-backed map of (collection, doc_id) → content hash.
+
+    Every row also remembers the run that last saw the document in an export, so
+    documents not seen by the current run (``run_id``) can be listed for deletion.
+    The store is safe to share between import threads.
+    """
+
+    def __init__(self, path, run_id=None):
+        self.path = path
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d%H%M%S%f")
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS document_hashes ("
+            " collection TEXT NOT NULL,"
+            " doc_id TEXT NOT NULL,"
+            " hash TEXT NOT NULL,"
+            " seen_run TEXT NOT NULL,"
+            " PRIMARY KEY (collection, doc_id))"
+        )
+        self._connection.commit()
+
+    def get_hashes(self, collection_name, doc_ids):
+        """Return the stored hashes of the given documents that have one."""
+        hashes = {}
+        with self._lock:
+            for start in range(0, len(doc_ids), SQLITE_PARAMETER_CHUNK):
+                chunk = doc_ids[start:start + SQLITE_PARAMETER_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT doc_id, hash FROM document_hashes WHERE collection = ? AND doc_id IN ({placeholders})",
+                    [collection_name, *chunk],
+                )
+                hashes.update(rows)
+        return hashes
+
+    def mark_seen(self, collection_name, doc_ids):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "UPDATE document_hashes SET seen_run = ? WHERE collection = ? AND doc_id = ?",
+                [(self.run_id, collection_name, doc_id) for doc_id in doc_ids],
+            )
+
+    def save(self, collection_name, hashes):
+        """Store the hashes of documents that were written successfully."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO document_hashes (collection, doc_id, hash, seen_run) VALUES (?, ?, ?, ?)",
+                [(collection_name, doc_id, doc_hash, self.run_id) for doc_id, doc_hash in hashes.items()],
+            )
+
+    def seen_collections(self):
+        """Collections with at least one document seen by the current run."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT DISTINCT collection FROM document_hashes WHERE seen_run = ?", (self.run_id,)
+            )
+            return [collection_name for (collection_name,) in rows]
+
+    def stale_ids(self, collection_name):
+        """Doc IDs of a collection that the current run did not see in the export."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT doc_id FROM document_hashes WHERE collection = ? AND seen_run != ?",
+                (collection_name, self.run_id),
+            )
+            return [doc_id for (doc_id,) in rows]
+
+    def delete(self, collection_name, doc_ids):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM document_hashes WHERE collection = ? AND doc_id = ?",
+                [(collection_name, doc_id) for doc_id in doc_ids],
+            )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class DocumentMerkleTree:
+    """Merkle tree over the document hashes of one collection.
+
+    Documents are spread over ``2 ** leaf_bits`` leaves, each an ordered range of
+    document IDs starting at an evenly spaced hex prefix, so the documents of a
+    leaf can be read back with one range query (see ``leaf_range``). This is
+    balanced for UUID IDs; other IDs still fall into exactly one leaf, just less
+    evenly spread. A leaf accumulates the sum of its documents' (ID, content hash)
+    digests, so documents can be added in any order and only the leaves are kept
+    in memory. Inner nodes hash their two children, so two trees are compared
+    top-down and only the subtrees whose hashes differ are visited.
+    """
+
+    def __init__(self, leaf_bits=12):
+        self.leaf_bits = leaf_bits
+        self.leaves = [0] * (1 << leaf_bits)
+        self.count = 0
+        digits = max(1, -(-leaf_bits // 4))
+        # bounds[i] is the first ID of leaf i + 1
+        self.bounds = [format(leaf * 16 ** digits >> leaf_bits, f"0{digits}x") for leaf in range(1, len(self.leaves))]
+
+    def leaf_of(self, doc_id):
+        # Python compares str by code point, which is the UTF-8 byte order Firestore sorts IDs in
+        return bisect.bisect_right(self.bounds, str(doc_id))
+
+    def leaf_range(self, leaf):
+        """``(first_id, end_id)`` of a leaf, where None is an open end; ``end_id`` is exclusive."""
+        low = self.bounds[leaf - 1] if leaf > 0 else None
+        high = self.bounds[leaf] if leaf < len(self.bounds) else None
+        return low, high
+
+    def add(self, doc_id, doc_hash):
+        entry = hashlib.blake2b(f"{doc_id}\0{doc_hash}".encode("utf-8"), digest_size=16).digest()
+        leaf = self.leaf_of(doc_id)
+        self.leaves[leaf] = (self.leaves[leaf] + int.from_bytes(entry, "big")) % MERKLE_LEAF_MODULUS
+        self.count += 1
+
+    def levels(self):
+        """Return the node hashes level by level, from the leaves up to the root."""
+        level = [leaf.to_bytes(16, "big") for leaf in self.leaves]
+        levels = [level]
+        while len(level) > 1:
+            level = [hashlib.blake2b(level[i] + level[i + 1], digest_size=16).digest()
+                     for i in range(0, len(level), 2)]
+            levels.append(level)
+        return levels
+
+    def root(self):
+        return self.levels()[-1][0].hex()
+
+    def diff(self, other):
+        """Return ``(differing_leaves, comparisons)`` against a tree with the same ``leaf_bits``."""
+        if other.leaf_bits != self.leaf_bits:
+            raise ValueError("Merkle trees with different leaf counts cannot be compared")
+        ours = self.levels()
+        theirs = other.levels()
+        comparisons = 0
+        nodes = [0]
+        for depth in range(len(ours) - 1, -1, -1):
+            differing = []
+            for node in nodes:
+                comparisons += 1
+                if ours[depth][node] != theirs[depth][node]:
+                    differing.append(node)
+            if depth == 0:
+                return differing, comparisons
+            nodes = [child for node in differing for child in (2 * node, 2 * node + 1)]
@@ -0,0 +1,206 @@
+"""
+Write-path validation of Firestore documents against the TypeScript interfaces.
+
+``compile_validator`` turns one interface's ``{field: type}`` map (as produced by
+``typescript_schema.resolve_schemas``) into a closure. Its lookups are prepared up
+front: each field maps to the set of Python classes its type accepts, so checking
+a document costs one dict lookup and one ``type()`` membership test per field.
+Only values whose class is not in that set, such as Firestore's
+DatetimeWithNanoseconds or DocumentReference, fall back to ``infer_field_type``.
+
+A validator reports fields the interface does not declare, values of the wrong
+type and missing required members (see ``typescript_schema.required_fields``).
+``id`` is never required, as documents are keyed by it. Partial writes such as
+``update()`` payloads are validated with ``partial=True``, which skips the
+required-member check. ``None`` is accepted for every field, as the parse drops
+``null`` and ``undefined`` from unions. Firestore transforms such as
+``SERVER_TIMESTAMP`` are accepted for every field.
+
+The importer converts ISO timestamp text into ``datetime`` before writing, while
+the interfaces usually declare those fields as ``string``. With
+``timestamps_as_strings`` a ``string`` field also accepts a ``datetime``.
+
+``DocumentValidators`` matches collections to interfaces by name (``clients`` and
+``Client``, or ``user_profiles`` and ``UserProfile``) and compiles each validator
+once, on first use. Collections without a matching interface are not validated.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+from schema_inference import infer_field_type
+from typescript_schema import (TypeScriptParseCache, iter_typescript_files, merge_declarations,
+                               parse_typescript_files, required_fields, resolve_schemas)
+
+TYPESCRIPT_CACHE_FILE = ".typescript_schema_cache.json"
+
+# Classes checked on the fast path; subclasses and other classes go through infer_field_type
+_PYTHON_TYPES = {
+    "string": (str,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list, tuple),
+    "map": (dict,),
+    "timestamp": (datetime,),
+    "reference": (),
+}
+
+_TRANSFORMS_MODULE = "google.cloud.firestore_v1.transforms"
+
+
+class DocumentValidationError(ValueError):
+    """A document does not match the TypeScript interface of its collection."""
+
+    def __init__(self, collection_name, interface_name, problems):
+        self.collection_name = collection_name
+        self.interface_name = interface_name
+        self.problems = problems
+        super().__init__(f"Document does not match {interface_name}: {'; '.join(problems)}")
+
+
+def _accepts_slowly(value, type_names):
+    if type(value).__module__ == _TRANSFORMS_MODULE:
+        return True  # SERVER_TIMESTAMP, DELETE_FIELD, Increment, ArrayUnion, ...
+    return infer_field_type(value) in type_names
+
+
+def compile_validator(fields, required=(), timestamps_as_strings=False):
+    """Compile an interface's ``{field: type}`` map into ``validate(data, partial=False) -> [problem, ...]``."""
+    expected = {}
+    for field, field_type in fields.items():
+        type_names = frozenset(field_type.split("|"))
+        if "unknown" in type_names:
+            expected[field] = None  # any, unknown and unparsed types accept every value
+            continue
+        if timestamps_as_strings and "string" in type_names:
+            type_names |= {"timestamp"}
+        classes = frozenset(cls for name in type_names for cls in _PYTHON_TYPES.get(name, ()))
+        expected[field] = (classes, type_names, field_type)
+    required = tuple(field for field in required if field != "id")
+
+    undeclared = object()
+
+    def validate(data, partial=False):
+        problems = [f"missing required field '{field}'" for field in required
+                    if field not in data] if not partial else []
+        for field, value in data.items():
+            check = expected.get(field, undeclared)
+            if check is None or value is None:
+                continue
+            if check is undeclared:
+                problems.append(f"unexpected field '{field}'")
+                continue
+            classes, type_names, field_type = check
+            if type(value) in classes or _accepts_slowly(value, type_names):
+                continue
+            problems.append(f"'{field}' should be {field_type}, not {infer_field_type(value)}")
+        return problems
+
+    return validate
+
+
+def _normalized(name):
+    name = name.lower().replace("_", "").replace("-", "")
+    return name[:-1] if name.endswith("s") else name
+
+
+def match_interface(collection_name, interface_names):
+    """The interface a collection's documents follow: an exact, case-insensitive or singular/snake_case match."""
+    if collection_name in interface_names:
+        return collection_name
+    lowered = collection_name.lower()
+    normalized = _normalized(collection_name)
+    for candidates in ([name for name in interface_names if name.lower() == lowered],
+                       [name for name in interface_names if _normalized(name) == normalized]):
+        if candidates:
+            return candidates[0]
+    return None
+
+
+class DocumentValidators:
+    """Validators per collection, compiled from ``{interface: {field: type}}`` on first use."""
+
+    def __init__(self, typescript_schemas, required=None, timestamps_as_strings=False):
+        self.typescript_schemas = typescript_schemas
+        self.required = required or {}
+        self.timestamps_as_strings = timestamps_as_strings
+        self._validators = {}
+
+    def interface_for(self, collection_name):
+        return match_interface(collection_name, list(self.typescript_schemas))
+
+    def for_collection(self, collection_name):
+        """``(interface_name, validate)``, or None when no interface matches the collection."""
+        if collection_name not in self._validators:
+            interface_name = self.interface_for(collection_name)
+            self._validators[collection_name] = None if interface_name is None else (
+                interface_name, compile_validator(self.typescript_schemas[interface_name],
+                                                  self.required.get(interface_name, ()), self.timestamps_as_strings))
+        return self._validators[collection_name]
+
+    def validate(self, collection_name, data, partial=False):
+        """Raise DocumentValidationError when ``data`` does not match the collection's interface.
+
+        ``partial`` is for merges and ``update()`` payloads, which need not hold every required member.
+        """
+        compiled = self.for_collection(collection_name)
+        if compiled is None:
+            return
+        interface_name, validate = compiled
+        problems = validate(data, partial)
+        if problems:
+            raise DocumentValidationError(collection_name, interface_name, problems)
+
+
+def load_typescript_schemas(directory_paths, cache_file=TYPESCRIPT_CACHE_FILE):
+    """Parse the ``.ts`` and ``.tsx`` files below the directories into ``{interface: {field: type}}``.
+
+    Shares the parse cache of ``firebase_schema_check.py``, so unchanged files are not
+    parsed again. Returns ``(typescript_schemas, required, errors)``, with ``required`` as given by
+    ``typescript_schema.required_fields``; missing directories are skipped.
+    """
+    file_paths = []
+    seen = set()
+    for directory_path in directory_paths:
+        for file_path in iter_typescript_files(directory_path):
+            real_path = os.path.realpath(file_path)
+            if real_path not in seen:
+                seen.add(real_path)
+                file_paths.append(file_path)
+
+    cache = TypeScriptParseCache(cache_file)
+    results, errors = parse_typescript_files(file_paths, cache)
+    try:
+        cache.save()
+    except OSError:
+        pass  # Only costs a re-parse next time
+
+    declarations, _ = merge_declarations(results)
+    return resolve_schemas(declarations), required_fields(declarations), errors
+
+
+def load_validators(directory_paths, cache_file=TYPESCRIPT_CACHE_FILE, timestamps_as_strings=False):
+    """``DocumentValidators`` for the interfaces below the directories; exits when there are none."""
+    typescript_schemas, required, errors = load_typescript_schemas(directory_paths, cache_file)
+    for file_path, error in errors:
+        print(f"⚠️ WARNING: Failed to parse {file_path}: {error}")
+    if not typescript_schemas:
+        print(f"❌ ERROR: No TypeScript interfaces found in {', '.join(directory_paths)}")
+        sys.exit(1)
+    print(f"✅ Validating documents against {len(typescript_schemas)} TypeScript interfaces.")
+    return DocumentValidators(typescript_schemas, required, timestamps_as_strings)
+
+
+def attach_validators(projectors, validators):
+    """Wrap record projectors so projected documents are validated before they are written."""
+    def validating(collection_name, project):
+        def project_and_validate(record):
+            projected = project(record)
+            validators.validate(collection_name, projected)
+            return projected
+        return project_and_validate
+
+    return {collection_name: validating(collection_name, project) if validators.for_collection(collection_name)
+            else project
+            for collection_name, project in projectors.items()}
@@ -0,0 +1,174 @@
+import os
+import sys
+import glob
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import firebase_admin
+from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1 import FieldFilter
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from document_hashes import canonical_json
+from progress_reporter import ProgressReporter
+
+# Configurations
+SERVICE_ACCOUNT_FILE = "serviceAccountKey.json"
+OUTPUT_DIRECTORY = "firestore_export"
+METRICS_FILE_PATH = "export_metrics.json"
+
+# 🔹 Configure command line arguments
+parser = argparse.ArgumentParser(
+    description="Export Firestore collections to sharded NDJSON files, one file per collection partition. "
+                "The output directory can be imported again with import_data_to_firestore.py --export.")
+parser.add_argument("collections", nargs="*", help="Collections to export (default: all top-level collections)")
+parser.add_argument("--service-account", default=SERVICE_ACCOUNT_FILE, help="Path to Firebase service account key")
+parser.add_argument("--output", default=OUTPUT_DIRECTORY, help="Directory receiving the NDJSON shards")
+parser.add_argument("--partitions", type=int, default=8, help="Partitions per collection")
+parser.add_argument("--partitioning", choices=["query", "cursor"], default="query",
+                    help="query: split points from a Firestore partition query, "
+                         "cursor: document ID ranges (suited to UUID IDs)")
+parser.add_argument("--workers", type=int, default=8, help="Partitions exported concurrently")
+parser.add_argument("--page-size", type=int, default=1000, help="Documents read per query page")
+parser.add_argument("--verbose", "-v", action="store_true", help="Print a line per exported partition page")
+parser.add_argument("--progress-interval", type=float, default=2.0, help="Seconds between progress lines")
+parser.add_argument("--metrics-file", default=METRICS_FILE_PATH, help="Where to write the JSON metrics summary")
+
+
+def initialize_firestore(service_account_file):
+    if not os.path.exists(service_account_file):
+        print(f"❌ ERROR: Service account file '{service_account_file}' not found.")
+        sys.exit(1)
+
+    try:
+        cred = credentials.Certificate(service_account_file)
+        firebase_admin.initialize_app(cred)
+        db = firestore.client()
+        print("✅ Firebase successfully initialized and connected to Firestore.")
+        return db
+    except Exception as e:
+        print(f"❌ ERROR: Failed to initialize Firebase: {e}")
+        sys.exit(1)
+
+
+# Split a collection with a partition query. Partition queries run on collection groups,
+# so documents of same-named subcollections are filtered out while reading.
+def query_partitions(db, collection_name, partition_count):
+    partitions = list(db.collection_group(collection_name).get_partitions(partition_count))
+    return [partition.query() for partition in partitions]
+
+
+# Split a collection into document ID ranges on evenly spaced hex prefixes. Balanced for
+# UUID IDs; other IDs still end up in exactly one range, just less evenly spread.
+def cursor_partitions(db, collection_name, partition_count):
+    collection_ref = db.collection(collection_name)
+    count = max(1, min(partition_count, 256))
+    bounds = [None] + [format(i * 256 // count, "02x") for i in range(1, count)] + [None]
+
+    queries = []
+    for low, high in zip(bounds, bounds[1:]):
+        query = collection_ref.order_by(FieldPath.document_id())
+        if low is not None:
+            query = query.where(filter=FieldFilter(FieldPath.document_id(), ">=", collection_ref.document(low)))
+        if high is not None:
+            query = query.where(filter=FieldFilter(FieldPath.document_id(), "<", collection_ref.document(high)))
+        queries.append(query)
+    return queries
+
+
+def plan_partitions(db, collection_name, args):
+    if args.partitioning == "query":
+        try:
+            return query_partitions(db, collection_name, args.partitions)
+        except Exception as e:
+            print(f"⚠️ WARNING: Partition query for '{collection_name}' failed ({e}). Using document ID ranges.")
+    return cursor_partitions(db, collection_name, args.partitions)
+
+
+# Stream one partition to its shard file, one page per query so no read is a single long RPC
+def export_partition(collection_name, query, shard_path, page_size, reporter):
+    temporary_path = shard_path + ".tmp"
+    exported = 0
+    last_snapshot = None
+    try:
+        with open(temporary_path, "w", encoding="utf-8") as shard_file:
+            while True:
+                page = query.limit(page_size)
+                if last_snapshot is not None:
+                    page = page.start_after(last_snapshot)
+
+                page_count = 0
+                page_exported = 0
+                for snapshot in page.stream():
+                    page_count += 1
+                    last_snapshot = snapshot
+                    if snapshot.reference.parent.parent is not None:
+                        continue  # Subcollection document matched by the collection group query
+                    shard_file.write(canonical_json({**snapshot.to_dict(), "id": snapshot.id}) + "\n")
+                    page_exported += 1
+                exported += page_exported
+                reporter.record("exported", page_exported, collection_name)
+                reporter.debug(f"📄 {os.path.basename(shard_path)}: {exported} documents")
+
+                if page_count < page_size:
+                    break
+    except Exception:
+        os.remove(temporary_path)
+        raise
+
+    if exported:
+        os.replace(temporary_path, shard_path)
+    else:
+        os.remove(temporary_path)
+    return exported
+
+
+def main():
+    args = parser.parse_args()
+    db = initialize_firestore(args.service_account)
+    collection_names = args.collections or [collection_ref.id for collection_ref in db.collections()]
+
+    os.makedirs(args.output, exist_ok=True)
+    reporter = ProgressReporter("Firestore export", interval=args.progress_interval, verbose=args.verbose,
+                                metrics_file=args.metrics_file)
+
+    tasks = []
+    for collection_name in collection_names:
+        # Shards of an earlier export with more partitions would otherwise be imported as well
+        shard_pattern = os.path.join(glob.escape(args.output), f"{glob.escape(collection_name)}.*.ndjson")
+        for stale_path in glob.glob(shard_pattern):
+            os.remove(stale_path)
+
+        queries = plan_partitions(db, collection_name, args)
+        print(f"📂 Exporting collection: {collection_name} in {len(queries)} partitions ...")
+        for index, query in enumerate(queries):
+            shard_path = os.path.join(args.output, f"{collection_name}.{index:04d}.ndjson")
+            tasks.append((collection_name, query, shard_path))
+
+    exported = {}
+    failed_partitions = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix="export-worker") as executor:
+        futures = {executor.submit(export_partition, collection_name, query, shard_path, args.page_size, reporter):
+                   (collection_name, shard_path)
+                   for collection_name, query, shard_path in tasks}
+        for future in as_completed(futures):
+            collection_name, shard_path = futures[future]
+            try:
+                exported[collection_name] = exported.get(collection_name, 0) + future.result()
+            except Exception as e:
+                failed_partitions += 1
+                reporter.record("failed", collection=collection_name)
+                print(f"❌ ERROR: Failed to export {shard_path}: {e}")
+
+    for collection_name in collection_names:
+        print(f"📊 {collection_name}: {exported.get(collection_name, 0)} documents exported")
+
+    reporter.finish(partitions=len(tasks), failed_partitions=failed_partitions, output=args.output)
+
+    if failed_partitions:
+        print(f"⚠️ Firestore export completed with {failed_partitions} failed partitions.")
+        sys.exit(1)
+    print(f"🔥 Firestore export written to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Reader for per-table export shards.
+
+Instead of the single ``supabase_export.json``, an export can be a directory of
+NDJSON or CSV files, one or more per table, for example the output of
+``COPY <table> TO STDOUT WITH (FORMAT csv, HEADER)`` or ``psql`` piping
+``row_to_json`` per row. Files are named ``<table>.<ext>`` or, for tables split
+into several shards, ``<table>.<part>.<ext>``; shards of a table are read in name
+order. Supported extensions are ``.ndjson``, ``.jsonl`` and ``.csv``.
+
+CSV values arrive as strings. Empty unquoted fields are Postgres NULLs and become
+``None``; everything else is left to the record projector, which converts values
+using the column types of ``firestore_schema.json``.
+
+Shards are split into byte ranges that are decoded in a process pool, a few
+ranges ahead of the consumer, so decoding uses several cores while the records
+of each table still come out in file order.
+"""
+
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+SHARD_FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+# Shards are decoded in ranges of about this many bytes
+DECODE_RANGE_SIZE = 8 << 20  # 8 MiB
+
+# Block size for scanning CSV shards for record boundaries
+CSV_SCAN_BLOCK_SIZE = 1 << 20  # 1 MiB
+
+
+def list_shards(directory):
+    """Return ``{table_name: [(path, format), ...]}`` for the shards in ``directory``."""
+    shards = {}
+    for file_name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(file_name)
+        shard_format = SHARD_FORMATS.get(extension.lower())
+        path = os.path.join(directory, file_name)
+        if shard_format is None or not os.path.isfile(path):
+            continue
+        table_name = stem.split(".", 1)[0]
+        shards.setdefault(table_name, []).append((path, shard_format))
+    return shards
+
+
+def export_stat(export_path):
+    """Return ``(size, mtime)`` of an export file, or the totals of a shard directory."""
+    if not os.path.isdir(export_path):
+        stat = os.stat(export_path)
+        return stat.st_size, stat.st_mtime
+
+    size = 0
+    mtime = 0.0
+    for table_shards in list_shards(export_path).values():
+        for path, _ in table_shards:
+            stat = os.stat(path)
+            size += stat.st_size
+            mtime = max(mtime, stat.st_mtime)
+    return size, mtime
+
+
+def _split_csv_ranges(path, size, range_size):
+    # Quoted fields may contain newlines. Quotes inside a field are doubled, so a
+    # newline ends a record exactly when an even number of quotes precede it.
+    ranges = []
+    start = 0
+    position = 0
+    quoted = False
+    with open(path, "rb") as shard_file:
+        while True:
+            block = shard_file.read(CSV_SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            offset = start + range_size - position
+            while offset < len(block):
+                newline = block.find(b"\n", max(offset, 0))
+                if newline < 0:
+                    break
+                if quoted ^ (block.count(b'"', 0, newline) % 2 == 1):
+                    offset = newline + 1  # Inside a quoted field, try the next newline
+                    continue
+                end = position + newline + 1
+                ranges.append((start, end))
+                start = end
+                offset = start + range_size - position
+            quoted ^= block.count(b'"') % 2 == 1
+            position += len(block)
+    if start < size:
+        ranges.append((start, size))
+    return ranges
+
+
+def _csv_header(path):
+    with open(path, "r", encoding="utf-8-sig", newline="") as shard_file:
+        return next(csv.reader(shard_file), None)
+
+
+def _split_ranges(path, shard_format, range_size):
+    size = os.path.getsize(path)
+    if size <= range_size:
+        return [(0, size)]
+    if shard_format == "csv":
+        return _split_csv_ranges(path, size, range_size)
+
+    # Range ends are moved forward to the next newline so no line is split
+    ranges = []
+    with open(path, "rb") as shard_file:
+        start = 0
+        while start < size:
+            shard_file.seek(min(start + range_size, size))
+            shard_file.readline()
+            end = min(shard_file.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _csv_value(value):
+    return None if value == "" else value
+
+
+def decode_range(path, shard_format, start, end, header=None):
+    """Decode the records stored in bytes ``start``-``end`` of a shard.
+
+    CSV ranges after the first are decoded with the ``header`` read from the shard's first line.
+    """
+    with open(path, "rb") as shard_file:
+        shard_file.seek(start)
+        data = shard_file.read(end - start)
+
+    if shard_format == "csv":
+        text = data.decode("utf-8-sig" if start == 0 else "utf-8")
+        reader = csv.reader(io.StringIO(text, newline=""))
+        if start == 0:
+            header = next(reader, None)
+        if header is None:
+            return []
+        # csv cannot tell a quoted empty string from an unquoted one, so both count as NULL
+        return [dict(zip(header, map(_csv_value, row))) for row in reader if row]
+
+    records = []
+    for line_number, line in enumerate(data.decode("utf-8").splitlines(), 1):
+        if line.strip():
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"{os.path.basename(path)}: invalid JSON at byte {start} + line {line_number}: {e}")
+    return records
+
+
+def _iter_table_records(table_shards, executor, lookahead, range_size, on_read):
+    tasks = []
+    for path, shard_format in table_shards:
+        ranges = _split_ranges(path, shard_format, range_size)
+        header = _csv_header(path) if shard_format == "csv" and len(ranges) > 1 else None
+        tasks.extend((path, shard_format, start, end, header) for start, end in ranges)
+
+    if executor is None:
+        for path, shard_format, start, end, header in tasks:
+            records = decode_range(path, shard_format, start, end, header)
+            if on_read:
+                on_read(end - start)
+            yield from records
+        return
+
+    pending = []
+    next_task = 0
+    while next_task < len(tasks) or pending:
+        # Keep a few ranges decoding ahead of the consumer
+        while next_task < len(tasks) and len(pending) < lookahead:
+            path, shard_format, start, end, header = tasks[next_task]
+            pending.append((executor.submit(decode_range, path, shard_format, start, end, header), end - start))
+            next_task += 1
+        future, size = pending.pop(0)
+        records = future.result()
+        if on_read:
+            on_read(size)
+        yield from records
+
+
+def iter_shard_collections(directory, decode_processes=1, range_size=DECODE_RANGE_SIZE, on_read=None):
+    """Yield ``(table_name, records)`` for each table with shards in ``directory``.
+
+    ``records`` is a lazy iterator; a table whose records are not consumed is not
+    decoded at all. With ``decode_processes`` above 1, ranges are decoded in that
+    many processes. ``on_read`` is called with the number of bytes decoded, for
+    progress reporting.
+    """
+    shards = list_shards(directory)
+    executor = None
+    if decode_processes > 1:
+        # Spawned, as the importer already has gRPC channels open and they do not survive a fork
+        executor = ProcessPoolExecutor(max_workers=decode_processes, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        for table_name, table_shards in shards.items():
+            yield table_name, _iter_table_records(table_shards, executor, decode_processes * 2, range_size, on_read)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -1,23 +1,69 @@
 import json
-import re
 import os
 import sys
 import argparse
+import multiprocessing
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 
+from export_shards import iter_shard_collections
+from record_projector import compile_projector
+from schema_inference import CollectionStats
+from schema_loader import load_compiled_schema
+from supabase_export_reader import iter_export_collections
+from typescript_schema import (TypeScriptParseCache, iter_typescript_files, merge_declarations,
+                               parse_typescript_files, resolve_schemas)
+
+# Files parsed per process below which a process pool costs more than it saves
+MIN_FILES_PER_PROCESS = 200
+
 # 🔹 Configure command line arguments
 parser = argparse.ArgumentParser(description="Firebase Schema Comparison Tool")
 parser.add_argument("--offline", action="store_true", help="Run in offline mode (skip Firestore connection)")
-parser.add_argument("--types-dir", default="src/types/", help="Directory containing TypeScript type definitions")
+parser.add_argument("--export",
+                    help="Infer the Firestore schema offline from every record of an export instead: a directory of "
+                         "NDJSON/CSV shards (export_firestore_to_ndjson.py) or a Supabase export file")
+parser.add_argument("--schema",
+                    help="With --export, convert records with the importer's projection from this schema file first, "
+                         "so the inferred types are those the import writes to Firestore")
+parser.add_argument("--types-dir", nargs="+", default=["src/types/"],
+                    help="Directories containing TypeScript type definitions, such as src/types/ or all of src/ "
+                         "and api/. Earlier directories win when an interface name is defined twice")
 parser.add_argument("--service-account", default="serviceAccountKey.json", help="Path to Firebase service account key")
 parser.add_argument("--output", default="schema_comparison_result.json", help="Output file path")
-args = parser.parse_args()
+parser.add_argument("--cache-file", default=".typescript_schema_cache.json",
+                    help="Per-file TypeScript parse cache, keyed by modification time and content hash")
+parser.add_argument("--no-cache", action="store_true", help="Parse every TypeScript file again")
+parser.add_argument("--sample-size", type=int, default=1000,
+                    help="Documents sampled per collection, spread over its partitions")
+parser.add_argument("--full-scan", action="store_true", help="Read every document instead of a sample")
+parser.add_argument("--partitions", type=int, default=4, help="Partitions sampled per collection")
+parser.add_argument("--partitioning", choices=["query", "cursor"], default="query",
+                    help="query: split points from a Firestore partition query, "
+                         "cursor: document ID ranges (suited to UUID IDs)")
+parser.add_argument("--workers", type=int, default=8, help="Partitions sampled concurrently")
+parser.add_argument("--page-size", type=int, default=500, help="Documents read per query page")
+parser.add_argument("--resample", action="store_true",
+                    help="Sample every collection again instead of reusing unchanged ones from the previous --output")
+parser.add_argument("--parse-processes", type=int,
+                    help="Processes parsing changed TypeScript files (1 parses in this process; default: one per "
+                         f"{MIN_FILES_PER_PROCESS} changed files, up to the CPU count)")
 
 # 🔹 Initialize Firebase only if not in offline mode
 firebase_initialized = False
 db = None
+typescript_duplicates = {}
+firestore_field_stats = {}
+collection_states = {}
 
-if not args.offline:
+# Parse worker processes import this module too; they must not parse arguments or connect
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.export:
+        args.offline = True  # The export stands in for Firestore
+
+if __name__ == "__main__" and not args.offline:
     try:
         import firebase_admin
         from firebase_admin import credentials, firestore
@@ -38,149 +84,249 @@ if not args.offline:
         print("🔄 Switching to offline mode. Only TypeScript schema will be analyzed.")
         args.offline = True
 
-# 🔹 Read and Parse TypeScript Definitions from all `/src/types/` files
-def extract_typescript_schemas(directory_path):
+# 🔹 Read and Parse TypeScript Definitions from all `--types-dir` directories
+# cache_file None parses every file again; parse_processes None picks a pool size from the number of changed files
+def extract_typescript_schemas(directory_paths, cache_file=None, parse_processes=None):
     typescript_schemas = {}
 
-    # Check if the directory exists
-    if not os.path.exists(directory_path):
-        print(f"⚠️ Warning: Directory {directory_path} does not exist!")
+    file_paths = []
+    seen = set()
+    for directory_path in directory_paths:
+        # Check if the directory exists
+        if not os.path.exists(directory_path):
+            print(f"⚠️ Warning: Directory {directory_path} does not exist!")
+            continue
+        for file_path in iter_typescript_files(directory_path):
+            # Overlapping directories such as src/ and src/types/ list some files twice
+            real_path = os.path.realpath(file_path)
+            if real_path not in seen:
+                seen.add(real_path)
+                file_paths.append(file_path)
+    if not file_paths:
         return typescript_schemas
-        
-    # Process all files in the directory and subdirectories
-    for root, dirs, files in os.walk(directory_path):
-        for filename in files:
-            if filename.endswith(".ts"):
-                file_path = os.path.join(root, filename)
-                print(f"Processing TypeScript file: {file_path}")
-                
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        content = f.read()
 
-                    # Updated regex patterns to handle more complex TS interfaces
-                    interface_pattern = re.compile(r"export\s+(?:type|interface)\s+(\w+)\s*(?:=\s*{|\{)")
-                    
-                    # Find all interfaces in the file
-                    interface_matches = interface_pattern.finditer(content)
-                    
-                    for interface_match in interface_matches:
-                        current_collection = interface_match.group(1)
-                        start_pos = interface_match.end()
-                        
-                        # Find the matching closing brace
-                        open_braces = 1
-                        end_pos = start_pos
-                        
-                        for i in range(start_pos, len(content)):
-                            if content[i] == '{':
-                                open_braces += 1
-                            elif content[i] == '}':
-                                open_braces -= 1
-                                if open_braces == 0:
-                                    end_pos = i
-                                    break
-                        
-                        # Extract interface body
-                        interface_body = content[start_pos:end_pos].strip()
-                        
-                        # Parse fields
-                        typescript_schemas[current_collection] = {}
-                        field_pattern = re.compile(r"\s*(\w+)\s*(?:\?|!)?:\s*([^;]+?)(?:;|,|\n|$)")
-                        
-                        for field_match in field_pattern.finditer(interface_body):
-                            field_name, field_type = field_match.groups()
-                            field_type = field_type.strip()
-                            
-                            # Convert TypeScript types to Firestore-compatible types
-                            field_type = (
-                                "string" if re.search(r"\b(string|email|url|phone|id)\b", field_type, re.IGNORECASE) else
-                                "number" if re.search(r"\b(number|int|float|double)\b", field_type, re.IGNORECASE) else
-                                "boolean" if re.search(r"\b(boolean|bool)\b", field_type, re.IGNORECASE) else
-                                "array" if "[]" in field_type or re.search(r"\bArray<", field_type, re.IGNORECASE) else
-                                "map" if "{" in field_type or re.search(r"\bRecord<", field_type, re.IGNORECASE) else
-                                "timestamp" if re.search(r"\b(Date|Timestamp|time|datetime)\b", field_type, re.IGNORECASE) else
-                                "reference" if re.search(r"\b(DocumentReference|Reference)\b", field_type, re.IGNORECASE) else
-                                "unknown"
-                            )
-                            typescript_schemas[current_collection][field_name] = field_type
-                except Exception as e:
-                    print(f"⚠️ Error processing file {file_path}: {str(e)}")
+    # Unchanged files are served from the parse cache, only edited ones are tokenized again
+    cache = TypeScriptParseCache(cache_file)
+    changed = cache.count_stale(file_paths)
+    if parse_processes is None:
+        processes = min(os.cpu_count() or 1, changed // MIN_FILES_PER_PROCESS)
+    else:
+        processes = min(parse_processes, changed)
+    if processes > 1:
+        print(f"⚙️ Parsing {changed} changed TypeScript files in {processes} processes ...")
+        # Spawned, as forking after Firebase has opened gRPC channels is unsafe
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results, errors = parse_typescript_files(file_paths, cache, executor)
+    else:
+        results, errors = parse_typescript_files(file_paths, cache)
 
+    for file_path, error in errors:
+        print(f"⚠️ Error processing file {file_path}: {str(error)}")
+
+    cache.forget_deleted()
+    try:
+        cache.save()
+    except OSError as e:
+        print(f"⚠️ Warning: Failed to write parse cache '{cache_file}': {e}")
+
+    # Results come back in file order, so the merge does not depend on which worker finished first
+    declarations, duplicates = merge_declarations(results)
+    typescript_duplicates.clear()
+    typescript_duplicates.update(duplicates)
+    if duplicates:
+        print(f"⚠️ Warning: {len(duplicates)} interface names are defined in more than one file "
+              "(the first definition is used):")
+        for name, defining_files in duplicates.items():
+            print(f"  - {name}: {', '.join(defining_files)}")
+
+    # Extends clauses and type references may point into other files, so they are resolved last
+    typescript_schemas = resolve_schemas(declarations)
+    print(f"Parsed {cache.hits + cache.misses} TypeScript files ({cache.misses} changed, {cache.hits} cached)")
     print(f"Found {len(typescript_schemas)} TypeScript interfaces")
     return typescript_schemas
 
-# 🔹 Infer Firestore field types dynamically
-def infer_field_type(value):
-    if value is None:
-        return "null"
-    elif isinstance(value, str):
-        return "string"
-    elif isinstance(value, int) or isinstance(value, float):
-        return "number"
-    elif isinstance(value, bool):
-        return "boolean"
-    elif isinstance(value, dict):
-        return "map"
-    elif isinstance(value, list):
-        return "array"
-    elif hasattr(value, 'seconds') and hasattr(value, 'nanoseconds'):  # Firestore timestamp
-        return "timestamp"
-    else:
-        return f"unknown ({type(value).__name__})"
+# 🔹 Sample one partition of a collection, paging with cursors; limit None reads it all
+def sample_partition(query, limit, page_size):
+    stats = CollectionStats()
+    last_snapshot = None
+    while limit is None or stats.documents < limit:
+        page_limit = page_size if limit is None else min(page_size, limit - stats.documents)
+        page = query.limit(page_limit)
+        if last_snapshot is not None:
+            page = page.start_after(last_snapshot)
+        page_count = 0
+        for doc in page.stream():
+            page_count += 1
+            last_snapshot = doc
+            if doc.reference.parent.parent is not None:
+                continue  # Subcollection document matched by the collection group partition query
+            stats.add(doc.to_dict() or {})
+        if page_count < page_limit:
+            break
+    return stats
+
+# 🔹 Change markers of a collection: its document count and latest updated_at, a couple of reads
+def collection_state(collection_ref):
+    documents = collection_ref.count().get()[0][0].value
+    latest_updated_at = None
+    for doc in collection_ref.order_by("updated_at", direction="DESCENDING").limit(1).stream():
+        latest_updated_at = (doc.to_dict() or {}).get("updated_at")
+    if isinstance(latest_updated_at, datetime):
+        latest_updated_at = latest_updated_at.isoformat()
+    return {"documents": documents, "latest_updated_at": latest_updated_at}
+
+# 🔹 Load the result file of the previous run, used as a cache of collection statistics
+def load_previous_result(path, resample=False):
+    if resample or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            previous = json.load(f)
+        return previous if isinstance(previous, dict) else {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Warning: Ignoring unreadable previous result '{path}': {e}")
+        return {}
 
 # 🔹 Fetch Firestore Schema
-def fetch_firestore_schema():
+def fetch_firestore_schema(args):
     if args.offline or not firebase_initialized:
         print("🔄 Skipping Firestore schema fetch (offline mode)")
         return {}
-        
-    print("Fetching Firestore schema...")
-    try:
-        collections = db.collections()
-        schema_data = {}
-
-        for collection in collections:
-            collection_name = collection.id
-            schema_data[collection_name] = {}
-            print(f"Processing collection: {collection_name}")
 
-            try:
-                # Increase limit to improve field coverage
-                docs = collection.limit(10).stream()
-                docs_processed = 0
-                
-                for doc in docs:
-                    docs_processed += 1
-                    data = doc.to_dict()
-                    
-                    # Process nested fields recursively
-                    def process_fields(data, prefix=""):
-                        for field, value in data.items():
-                            field_path = f"{prefix}{field}"
-                            field_type = infer_field_type(value)
-                            
-                            schema_data[collection_name][field_path] = field_type
-                            
-                            # Process nested maps recursively
-                            if isinstance(value, dict):
-                                process_fields(value, f"{field_path}.")
-                    
-                    process_fields(data)
-                
-                print(f"  - Processed {docs_processed} documents")
-                    
-            except Exception as e:
-                print(f"⚠️ Error processing collection {collection_name}: {str(e)}")
+    from export_firestore_to_ndjson import plan_partitions
 
-        print(f"Found {len(schema_data)} collections in Firestore")
-        return schema_data
+    scope = "all documents" if args.full_scan else f"up to {args.sample_size} documents"
+    print(f"Fetching Firestore schema ({scope} per collection, {args.partitions} partitions each)...")
+    try:
+        collection_names = [collection.id for collection in db.collections()]
     except Exception as e:
         print(f"❌ Error fetching Firestore schema: {str(e)}")
         print("🔄 Switching to offline mode")
         args.offline = True
         return {}
 
+    # Statistics of the previous run are reused for collections whose change markers are unchanged
+    previous = load_previous_result(args.output, args.resample)
+    previous_stats = previous.get("firestore_field_stats", {})
+    previous_states = previous.get("collection_states", {})
+    sampling = {"sample_size": None if args.full_scan else args.sample_size, "partitions": args.partitions,
+                "partitioning": args.partitioning}
+
+    # Spreading the sample over partitions covers more than the first documents by ID. Partition queries
+    # split on the actual documents, so auto-IDs are spread evenly, unlike hex document ID ranges
+    schema_data = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix="schema-sampler") as executor:
+        state_futures = {collection_name: executor.submit(collection_state, db.collection(collection_name))
+                         for collection_name in collection_names}
+        states = {}
+        for collection_name, future in state_futures.items():
+            try:
+                states[collection_name] = dict(future.result(), sampling=sampling)
+            except Exception as e:
+                print(f"⚠️ Failed to check {collection_name} for changes, sampling it again: {str(e)}")
+                states[collection_name] = None
+
+        futures = {}
+        for collection_name in collection_names:
+            state = states[collection_name]
+            unchanged = state is not None and state == previous_states.get(collection_name)
+            if unchanged and collection_name in previous_stats:
+                futures[collection_name] = None
+            else:
+                queries = plan_partitions(db, collection_name, args)
+                # Small collections get fewer partitions than asked for, so the budget is split over those returned
+                limit = None if args.full_scan else -(-args.sample_size // len(queries))
+                futures[collection_name] = [executor.submit(sample_partition, query, limit, args.page_size)
+                                            for query in queries]
+
+        for collection_name, partition_futures in futures.items():
+            print(f"Processing collection: {collection_name}")
+            if partition_futures is None:
+                summary = previous_stats[collection_name]
+                schema_data[collection_name] = CollectionStats.from_summary(summary).types()
+                firestore_field_stats[collection_name] = summary
+                collection_states[collection_name] = states[collection_name]
+                print(f"  - ♻️ Unchanged since {previous.get('generated_at')}, "
+                      f"reusing {summary['documents']} sampled documents")
+                continue
+
+            stats = CollectionStats()
+            try:
+                for future in partition_futures:
+                    stats.merge(future.result())
+            except Exception as e:
+                print(f"⚠️ Error processing collection {collection_name}: {str(e)}")
+                schema_data[collection_name] = {}
+                continue
+
+            schema_data[collection_name] = stats.types()
+            firestore_field_stats[collection_name] = stats.summary()
+            if states[collection_name] is not None:
+                collection_states[collection_name] = states[collection_name]
+            print(f"  - Processed {stats.documents} documents, {len(stats.fields)} fields")
+
+    print(f"Found {len(schema_data)} collections in Firestore")
+    return schema_data
+
+# 🔹 Infer the schema offline, streaming every record of a local export through the same statistics
+def infer_export_schema(export_path, schema_path=None):
+    projectors = {}
+    if schema_path:
+        columns = load_compiled_schema(schema_path).columns
+        projectors = {table_name: compile_projector(table_columns) for table_name, table_columns in columns.items()}
+
+    print(f"Inferring schema from export '{export_path}'...")
+    if os.path.isdir(export_path):
+        collections = iter_shard_collections(export_path)
+    else:
+        collections = iter_export_collections(export_path)
+
+    # Only per-field counters are kept, so memory does not grow with the size of the export
+    stats_by_collection = {}
+    unconvertible = {}
+    for collection_name, records in collections:
+        if isinstance(records, dict):
+            records = records.values()
+        elif not isinstance(records, (list, Iterator)):
+            continue
+        stats = stats_by_collection.setdefault(collection_name, CollectionStats())
+        project = projectors.get(collection_name)
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            if project is not None:
+                try:
+                    record = project(record)
+                except ValueError:
+                    unconvertible[collection_name] = unconvertible.get(collection_name, 0) + 1
+                    continue
+            stats.add(record)
+
+    schema_data = {}
+    for collection_name, stats in stats_by_collection.items():
+        print(f"Processing collection: {collection_name}")
+        schema_data[collection_name] = stats.types()
+        firestore_field_stats[collection_name] = stats.summary()
+        print(f"  - Processed {stats.documents} documents, {len(stats.fields)} fields")
+        if unconvertible.get(collection_name):
+            print(f"  ⚠️ Skipped {unconvertible[collection_name]} records the schema projection rejected")
+
+    print(f"Found {len(schema_data)} collections in export")
+    return schema_data
+
+# 🔹 Describe how often a field is present, null or of another type
+def describe_field_stats(stats):
+    if not stats:
+        return ""
+    notes = []
+    if stats["presence"] < 1:
+        notes.append(f"in {stats['presence']:.1%} of documents")
+    if stats["null_rate"] > 0:
+        notes.append(f"null in {stats['null_rate']:.1%}")
+    if len(stats["types"]) > 1:
+        notes.append(", ".join(f"{field_type} {count}" for field_type, count in stats["types"].items()))
+    return f" ({'; '.join(notes)})" if notes else ""
+
 # 🔹 Compare Firestore schema with TypeScript definitions
 def compare_schemas(firestore_schema, typescript_schemas):
     print("\n🔍 **Schema Comparison with TypeScript Definitions:**")
@@ -191,9 +337,11 @@ def compare_schemas(firestore_schema, typescript_schemas):
     total_fields = 0
     matched_fields = 0
     type_mismatches = 0
+    mixed_type_fields = 0
     missing_fields = 0
+    partially_missing_fields = 0
     
-    if args.offline or not firestore_schema:
+    if not firestore_schema:
         print("⚠️ Running in offline mode - skipping comparison")
         
         # Print the TypeScript schema structure instead
@@ -240,25 +388,43 @@ def compare_schemas(firestore_schema, typescript_schemas):
             total_collection_fields = len(fields)
             total_fields += total_collection_fields
 
+            field_stats = firestore_field_stats.get(collection_name, {}).get("fields", {})
             for field, field_type in fields.items():
                 # Handle nested fields
                 base_field = field.split('.')[0]
                 expected_type = expected_schema.get(base_field)
+                details = describe_field_stats(field_stats.get(field))
 
                 if expected_type:
-                    if expected_type == field_type or (expected_type == "map" and "." in field):
+                    # Union types such as "number|string" accept any of their kinds
+                    accepted = expected_type.split("|")
+                    if field_type in accepted or (expected_type == "map" and "." in field):
                         matched_fields += 1
-                        print(f"✅ {field}: {field_type}")
+                        print(f"✅ {field}: {field_type}{details}")
+                        other_types = [t for t in field_stats.get(field, {}).get("types", {})
+                                       if t not in accepted and t != "null"]
+                        if other_types and "." not in field:
+                            mixed_type_fields += 1
+                            print(f"⚠️ Mixed Types - {field}: Expected {expected_type}, also found "
+                                  f"{', '.join(other_types)}")
                     else:
                         type_mismatches += 1
-                        print(f"⚠️ Type Mismatch - {field}: Expected {expected_type}, Found {field_type}")
+                        print(f"⚠️ Type Mismatch - {field}: Expected {expected_type}, Found {field_type}{details}")
                 else:
-                    print(f"⚠️ Unexpected Field - {field}: {field_type}")
+                    print(f"⚠️ Unexpected Field - {field}: {field_type}{details}")
 
             missing_collection_fields = set(expected_schema.keys()) - set([f.split('.')[0] for f in fields.keys()])
             if missing_collection_fields:
                 missing_fields += len(missing_collection_fields)
                 print(f"❌ Missing Fields: {', '.join(missing_collection_fields)}")
+
+            # Present in some documents only, as opposed to missing everywhere
+            sometimes_missing = {field: field_stats[field]["presence"] for field in expected_schema
+                                 if field in field_stats and field_stats[field]["presence"] < 1}
+            if sometimes_missing:
+                partially_missing_fields += len(sometimes_missing)
+                print("⚠️ Sometimes Missing: " + ", ".join(f"{field} (in {presence:.1%} of documents)"
+                                                         for field, presence in sometimes_missing.items()))
         else:
             print("⚠️ No matching TypeScript definition found for this collection.")
     
@@ -269,17 +435,23 @@ def compare_schemas(firestore_schema, typescript_schemas):
     if total_fields > 0:
         print(f"Fields Matched: {matched_fields}/{total_fields} ({matched_fields/total_fields*100:.1f}%)")
         print(f"Type Mismatches: {type_mismatches}")
+        print(f"Fields with Mixed Types: {mixed_type_fields}")
     print(f"Missing Fields (in TypeScript but not in Firestore): {missing_fields}")
+    print(f"Sometimes Missing Fields (absent from some documents): {partially_missing_fields}")
     
     print("\n✅ **Schema Verification Completed!**")
 
 # 🔹 Save schema to file
-def save_schema_to_file(firestore_schema, typescript_schemas):
+def save_schema_to_file(firestore_schema, typescript_schemas, args):
     output = {
         "firestore_schema": firestore_schema,
         "typescript_schemas": typescript_schemas,
+        "duplicate_interfaces": typescript_duplicates,
+        "firestore_field_stats": firestore_field_stats,
+        "collection_states": collection_states,
         "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "offline_mode": args.offline
+        "offline_mode": args.offline,
+        "source": args.export or "firestore"
     }
     
     with open(args.output, "w") as f:
@@ -290,21 +462,32 @@ def save_schema_to_file(firestore_schema, typescript_schemas):
 # 🔹 Main execution
 if __name__ == "__main__":
     try:
-        print(f"🚀 Starting schema comparison with TypeScript directory: {args.types_dir}")
-        print(f"📝 Mode: {'Offline (TypeScript analysis only)' if args.offline else 'Online (Firestore + TypeScript)'}")
+        print(f"🚀 Starting schema comparison with TypeScript directories: {', '.join(args.types_dir)}")
+        if args.export:
+            print(f"📝 Mode: Offline (export '{args.export}' + TypeScript)")
+        else:
+            print(f"📝 Mode: {'Offline (TypeScript analysis only)' if args.offline else 'Online (Firestore + TypeScript)'}")
         
-        typescript_schemas = extract_typescript_schemas(args.types_dir)
+        typescript_schemas = extract_typescript_schemas(args.types_dir, None if args.no_cache else args.cache_file,
+                                                        args.parse_processes)
         
         if not typescript_schemas:
             print("⚠️ Warning: No TypeScript schemas found. Check the directory path and file contents.")
             sys.exit(1)
         
-        firestore_schema = fetch_firestore_schema()
+        if args.export:
+            try:
+                firestore_schema = infer_export_schema(args.export, args.schema)
+            except (OSError, ValueError) as e:
+                print(f"❌ Error: Failed to read export '{args.export}': {str(e)}")
+                sys.exit(1)
+        else:
+            firestore_schema = fetch_firestore_schema(args)
         
         compare_schemas(firestore_schema, typescript_schemas)
-        save_schema_to_file(firestore_schema, typescript_schemas)
+        save_schema_to_file(firestore_schema, typescript_schemas, args)
         
-        if not args.offline and firestore_schema:
+        if firestore_schema:
             # Print Firestore Schema Structure
             print("\n🔥 **Firestore Schema Structure:**\n")
             print(json.dumps(firestore_schema, indent=4))
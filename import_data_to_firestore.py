@@ -1,54 +1,172 @@
 import os
+import sys
 import json
+import time
+import argparse
+import multiprocessing
+import random
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from itertools import groupby, islice
+from collections.abc import Iterator
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+from google.api_core.exceptions import AlreadyExists, Aborted, DeadlineExceeded, ResourceExhausted, ServiceUnavailable
+
+from import_order import dependency_graph, dependency_waves
+from reference_index import Quarantined, ReferenceIndex, attach_document_references
+from export_shards import export_stat, iter_shard_collections
+from document_validators import DocumentValidators, attach_validators, load_validators
+from document_hashes import DocumentHashStore, canonical_json, document_hash
+from progress_reporter import ProgressReporter
+from record_projector import compile_projector
+from schema_loader import load_compiled_schema
+from supabase_export_reader import iter_export_collections
 
 # Configurations
 SERVICE_ACCOUNT_FILE = "serviceAccountKey.json"
 SCHEMA_FILE_PATH = "firestore_schema.json"
 EXPORT_FILE_PATH = "supabase_export.json"
+CHECKPOINT_FILE_PATH = "import_checkpoint.json"
+HASH_STORE_FILE_PATH = "import_hashes.sqlite"
+METRICS_FILE_PATH = "import_metrics.json"
+DEAD_LETTER_FILE_PATH = "import_dead_letters.ndjson"
+ORPHANS_FILE_PATH = "import_orphans.ndjson"
+
+# Firestore rejects write batches with more than 500 operations
+FIRESTORE_BATCH_LIMIT = 500
+
+# gRPC status code Firestore reports when create() hits an existing document
+ALREADY_EXISTS_CODE = 6
+
+# Errors worth retrying: Firestore is throttling, briefly unavailable or the request timed out
+TRANSIENT_ERRORS = (DeadlineExceeded, ServiceUnavailable, ResourceExhausted, Aborted)
+TRANSIENT_ERROR_CODES = {4, 8, 10, 14}  # DEADLINE_EXCEEDED, RESOURCE_EXHAUSTED, ABORTED, UNAVAILABLE
+
+# 🔹 Configure command line arguments
+parser = argparse.ArgumentParser(description="Import a Supabase export into Firestore")
+parser.add_argument("--service-account", default=SERVICE_ACCOUNT_FILE, help="Path to Firebase service account key")
+parser.add_argument("--schema", default=SCHEMA_FILE_PATH, help="Path to the Firestore schema file")
+parser.add_argument("--export", default=EXPORT_FILE_PATH,
+                    help="Path to the Supabase export file, or to a directory of per-table NDJSON/CSV shards")
+parser.add_argument("--decode-processes", type=int, default=1,
+                    help="Processes decoding the shards of a directory export in parallel")
+parser.add_argument("--write-mode", choices=["single", "batch", "bulk"], default="batch",
+                    help="single: one set() per document, batch: Firestore write batches, bulk: BulkWriter")
+parser.add_argument("--batch-size", type=int, default=FIRESTORE_BATCH_LIMIT,
+                    help=f"Documents per write batch (max {FIRESTORE_BATCH_LIMIT})")
+parser.add_argument("--flush-interval", type=float, default=5.0,
+                    help="Seconds after which a partially filled batch is committed anyway")
+parser.add_argument("--existence-check", choices=["document", "bulk", "scan", "none"], default="bulk",
+                    help="document: one get() per record, bulk: get_all() per chunk of records, "
+                         "scan: keys-only scan of the collection up front, "
+                         "none: no check, create-only writes skip existing documents")
+parser.add_argument("--checkpoint", default=CHECKPOINT_FILE_PATH,
+                    help="Manifest recording how far each collection has been committed")
+parser.add_argument("--resume", action="store_true",
+                    help="Continue an interrupted import from the offsets stored in the checkpoint manifest")
+parser.add_argument("--checkpoint-interval", type=float, default=2.0,
+                    help="Minimum seconds between checkpoint manifest writes")
+parser.add_argument("--existence-chunk-size", type=int, default=500,
+                    help="Records whose existence is checked per get_all() call in bulk mode")
+parser.add_argument("--delta", action="store_true",
+                    help="Only write records whose content hash changed since the last import (skips existence checks)")
+parser.add_argument("--hash-store", default=HASH_STORE_FILE_PATH,
+                    help="SQLite file holding the content hash of every imported document")
+parser.add_argument("--delete-missing", action="store_true",
+                    help="With --delta, delete previously imported documents that are no longer in the export")
+parser.add_argument("--verbose", "-v", action="store_true",
+                    help="Log every document and batch instead of throttled progress lines")
+parser.add_argument("--progress-interval", type=float, default=2.0,
+                    help="Seconds between progress lines")
+parser.add_argument("--metrics-file", default=METRICS_FILE_PATH,
+                    help="Where to write the JSON metrics summary of the run")
+parser.add_argument("--max-retries", type=int, default=5,
+                    help="Retries for writes that fail with a transient error")
+parser.add_argument("--retry-base-delay", type=float, default=0.5,
+                    help="Initial retry backoff in seconds, doubled on every attempt")
+parser.add_argument("--retry-max-delay", type=float, default=30.0,
+                    help="Upper bound of the retry backoff in seconds")
+parser.add_argument("--dead-letter-file", default=DEAD_LETTER_FILE_PATH,
+                    help="NDJSON file receiving records that could not be written")
+parser.add_argument("--replay-dead-letters", metavar="PATH",
+                    help="Import the records of a dead-letter file instead of the export")
+parser.add_argument("--order", choices=["dependencies", "export"], default="dependencies",
+                    help="Import referenced collections first, in waves following the schema's foreign "
+                         "keys (or *_id columns when it declares none), "
+                         "(later waves of an export file are set aside while it is read once; shard directories "
+                         "are read again per wave), or in export order")
+parser.add_argument("--spool-dir",
+                    help="Where tables of later import waves are set aside while an export file is read "
+                         "(default: the system temp directory)")
+parser.add_argument("--check-references", choices=["report", "quarantine"],
+                    help="Check references against the imported collections and report orphans, "
+                         "or quarantine records with orphaned references instead of importing them")
+parser.add_argument("--orphans-file", default=ORPHANS_FILE_PATH,
+                    help="NDJSON file receiving quarantined records, replayable with --replay-dead-letters")
+parser.add_argument("--reference-fields", action="store_true",
+                    help="Store reference columns as Firestore DocumentReferences instead of ID strings")
+parser.add_argument("--validate-types", nargs="+", metavar="DIR",
+                    help="Validate every document against the TypeScript interfaces below these directories before "
+                         "it is written; documents that do not match fail and go to the dead-letter file")
+parser.add_argument("--workers", type=int, default=1,
+                    help="Threads importing collections and partitions concurrently (1 imports sequentially)")
+parser.add_argument("--processes", type=int, default=0,
+                    help="Worker processes, each with its own Firestore client, that records are sharded to "
+                         "by a hash of their doc ID (0 imports in this process)")
+parser.add_argument("--partition-size", type=int, default=5000,
+                    help="Records per partition handed to a worker in concurrent or multi-process mode")
+
+
+def initialize_firestore(service_account_file):
+    # Ensure Service Account File Exists
+    if not os.path.exists(service_account_file):
+        print(f"❌ ERROR: Service account file '{service_account_file}' not found.")
+        sys.exit(1)
+
+    # Initialize Firebase
+    try:
+        cred = credentials.Certificate(service_account_file)
+        firebase_admin.initialize_app(cred)
+        db = firestore.client()
+        print("✅ Firebase successfully initialized and connected to Firestore.")
+        return db
+    except Exception as e:
+        print(f"❌ ERROR: Failed to initialize Firebase: {e}")
+        sys.exit(1)
+
+
+# Load the compiled schema; either shape of the schema file is accepted (see schema_loader)
+def load_schema(schema_file_path):
+    try:
+        schema = load_compiled_schema(schema_file_path)
+        print("✅ Firestore schema loaded successfully.")
+        return schema
+    except Exception as e:
+        print(f"❌ ERROR: Failed to load schema file: {e}")
+        sys.exit(1)
+
+
+# Compile one record projector per table
+def compile_projectors(columns):
+    return {table_name: compile_projector(table_columns) for table_name, table_columns in columns.items()}
+
+
+# Group the tables into import waves so referenced collections are written before the ones referring to them
+def plan_import_waves(references):
+    waves, cyclic = dependency_waves(dependency_graph(references))
+    if cyclic:
+        print(f"⚠️ WARNING: Circular references between {', '.join(cyclic)}; importing them last.")
+        waves.append(cyclic)
+    return waves
 
-# Ensure Service Account File Exists
-if not os.path.exists(SERVICE_ACCOUNT_FILE):
-    print(f"❌ ERROR: Service account file '{SERVICE_ACCOUNT_FILE}' not found.")
-    exit(1)
-
-# Initialize Firebase
-try:
-    cred = credentials.Certificate(SERVICE_ACCOUNT_FILE)
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
-    print("✅ Firebase successfully initialized and connected to Firestore.")
-except Exception as e:
-    print(f"❌ ERROR: Failed to initialize Firebase: {e}")
-    exit(1)
-
-# Load Firestore Schema
-try:
-    with open(SCHEMA_FILE_PATH, "r", encoding="utf-8") as schema_file:
-        firestore_schema = json.load(schema_file)
-    print("✅ Firestore schema loaded successfully.")
-except Exception as e:
-    print(f"❌ ERROR: Failed to load schema file: {e}")
-    exit(1)
-
-# Load Supabase Export Data with Extra Error Handling
-try:
-    with open(EXPORT_FILE_PATH, "r", encoding="utf-8") as export_file:
-        raw_data = json.load(export_file)
-
-    # Extract and parse JSON correctly
-    extracted_data = json.loads(raw_data[0]["jsonb_pretty"])
-    print("✅ Supabase export data loaded and parsed successfully.")
-except json.JSONDecodeError as json_error:
-    print(f"❌ ERROR: Failed to parse JSON - {json_error}")
-    exit(1)
-except Exception as e:
-    print(f"❌ ERROR: Failed to load Supabase export file: {e}")
-    exit(1)
 
 # Function to check if a document already exists
-def document_exists(collection_name, doc_id):
+def document_exists(db, collection_name, doc_id):
     try:
         doc_ref = db.collection(collection_name).document(doc_id)
         return doc_ref.get().exists
@@ -56,48 +174,1135 @@ def document_exists(collection_name, doc_id):
         print(f"⚠️ WARNING: Failed to check document {doc_id} in {collection_name}: {e}")
         return False  # Assume it doesn't exist to prevent skipping
 
-# Insert Data into Firestore with Improved Error Handling
-for collection_name, records in extracted_data.items():
-    if collection_name not in firestore_schema:
-        print(f"⚠️ WARNING: Skipping unknown collection '{collection_name}' (not in schema).")
-        continue
 
-    print(f"📂 Processing collection: {collection_name} ...")
+# Fetch which of the given doc IDs already exist with a single get_all() round trip
+def fetch_existing_ids(db, collection_name, doc_ids):
     collection_ref = db.collection(collection_name)
+    try:
+        refs = [collection_ref.document(doc_id) for doc_id in doc_ids]
+        # A mask of just the document name; an empty mask would return every field
+        return {snapshot.id for snapshot in db.get_all(refs, field_paths=[FieldPath.document_id()]) if snapshot.exists}
+    except Exception as e:
+        print(f"⚠️ WARNING: Failed to check {len(doc_ids)} documents in {collection_name}: {e}")
+        return set()  # Assume they don't exist to prevent skipping
+
 
-    # Handle unexpected data formats
+# Collect every doc ID of a collection with a keys-only scan
+def scan_existing_ids(db, collection_name):
+    try:
+        # Projecting onto __name__ alone; select([]) would return every field
+        query = db.collection(collection_name).select([FieldPath.document_id()])
+        existing_ids = {snapshot.id for snapshot in query.stream()}
+        print(f"🔎 Found {len(existing_ids)} existing documents in {collection_name}")
+        return existing_ids
+    except Exception as e:
+        print(f"⚠️ WARNING: Failed to scan existing documents in {collection_name}: {e}")
+        return set()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Handle unexpected data formats, returning an iterable of records or None to skip
+def normalize_records(collection_name, records):
     if records is None:
         print(f"⚠️ WARNING: Collection '{collection_name}' is empty (None). Skipping...")
-        continue
+        return None
 
-    if not isinstance(records, list):
+    if not isinstance(records, (list, Iterator)):
         print(f"⚠️ WARNING: Unexpected data format in collection '{collection_name}'. Found type: {type(records)}")
         if isinstance(records, dict):
-            records = list(records.values())  
+            records = list(records.values())
             print(f"🔄 Converted dictionary to list for '{collection_name}'")
         else:
             print(f"❌ ERROR: Cannot process collection '{collection_name}'. Skipping...")
-            continue
+            return None
+
+    return records
+
+
+class ImportCheckpoint:
+    """Manifest of how many records of each collection have been committed.
+
+    The offset of a collection only advances after its writer has flushed, so
+    every record before it has been written, skipped or reported as failed. The
+    manifest is tied to the size and modification time of the export (the totals of
+    its shards for a directory) so a resume never applies offsets to different data.
+    """
+
+    def __init__(self, path, export_file_path, save_interval=2.0):
+        self.path = path
+        self.save_interval = save_interval
+        size, mtime = export_stat(export_file_path)
+        self.export = {"path": export_file_path, "size": size, "mtime": mtime}
+        self.collections = {}
+        self._last_saved = 0.0
+        self._lock = threading.RLock()
+        self._finished_partitions = {}
+        self._totals = {}
+
+    def load(self):
+        """Load offsets from an earlier run, returning False if none can be used."""
+        if not os.path.exists(self.path):
+            print(f"⚠️ WARNING: No checkpoint manifest found at '{self.path}'. Starting from the beginning.")
+            return False
+
+        with open(self.path, "r", encoding="utf-8") as checkpoint_file:
+            manifest = json.load(checkpoint_file)
+
+        if manifest.get("export") != self.export:
+            print(f"❌ ERROR: Checkpoint '{self.path}' was written for a different export file.")
+            sys.exit(1)
+
+        self.collections = manifest.get("collections", {})
+        print(f"♻️ Resuming import from checkpoint '{self.path}'.")
+        return True
+
+    def offset(self, collection_name):
+        return self.collections.get(collection_name, {}).get("offset", 0)
+
+    def is_completed(self, collection_name):
+        return self.collections.get(collection_name, {}).get("completed", False)
+
+    def record(self, collection_name, offset):
+        with self._lock:
+            self.collections[collection_name] = {"offset": offset, "completed": False}
+            if time.monotonic() - self._last_saved >= self.save_interval:
+                self.save()
+
+    def complete(self, collection_name, offset):
+        with self._lock:
+            self.collections[collection_name] = {"offset": offset, "completed": True}
+            self.save()
+
+    def partition_done(self, collection_name, start, end):
+        """Record a finished partition; the offset only advances over a contiguous prefix."""
+        with self._lock:
+            finished = self._finished_partitions.setdefault(collection_name, {})
+            finished[start] = end
+            offset = self.offset(collection_name)
+            while offset in finished:
+                offset = finished.pop(offset)
+            self._advance(collection_name, offset)
+
+    def set_total(self, collection_name, total):
+        """Record that every partition of a collection has been handed out."""
+        with self._lock:
+            self._totals[collection_name] = total
+            self._advance(collection_name, self.offset(collection_name))
+
+    def _advance(self, collection_name, offset):
+        total = self._totals.get(collection_name)
+        if total is not None and offset >= total:
+            self.complete(collection_name, offset)
+        else:
+            self.record(collection_name, offset)
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        manifest = {
+            "export": self.export,
+            "collections": self.collections,
+            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        # Write to a temporary file first so a crash never leaves a truncated manifest
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as checkpoint_file:
+            json.dump(manifest, checkpoint_file, indent=4)
+        os.replace(temp_path, self.path)
+        self._last_saved = time.monotonic()
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient Firestore errors."""
+
+    def __init__(self, max_retries=5, base_delay=0.5, max_delay=30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, operation, description):
+        attempt = 0
+        while True:
+            try:
+                return operation()
+            except TRANSIENT_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.delay(attempt)
+                attempt += 1
+                print(f"🔁 {description} hit {e.__class__.__name__}, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+
+class DeadLetterQueue:
+    """Appends records that could not be written to an NDJSON file for a later replay.
+
+    Each line holds the collection, the doc ID, the record and the last error.
+    Timestamps are stored as ISO strings, which the record projector converts back
+    when the file is replayed. Without a path, entries are kept in ``entries`` so an
+    import process can hand them to the parent, which owns the file.
+    """
 
-    for record in records:
+    def __init__(self, path, kind="dead-letter"):
+        self.path = path
+        self.kind = kind
+        self.count = 0
+        self.entries = []
+        self._lock = threading.Lock()
+        self._file = None
+
+    def add(self, collection_name, doc_id, record, error):
+        self.add_entry({
+            "collection": collection_name,
+            "id": doc_id,
+            "record": record,
+            "error": str(error),
+            "failed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+    def add_records(self, collection_name, records, error):
+        for record in records:
+            if not isinstance(record, Quarantined):
+                self.add(collection_name, record.get("id") if isinstance(record, dict) else None, record, error)
+
+    def add_entry(self, entry):
+        with self._lock:
+            self.count += 1
+            if self.path is None:
+                self.entries.append(entry)
+                return
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(canonical_json(entry) + "\n")
+            self._file.flush()
+
+    def drain(self):
+        with self._lock:
+            entries, self.entries = self.entries, []
+            return entries
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self.count and self.path is not None:
+            print(f"📥 {self.count} records written to {self.kind} file '{self.path}'")
+
+
+def dead_letter_record(entry):
+    record = dict(entry["record"] or {})
+    record.setdefault("id", entry["id"])
+    return record
+
+
+# Yield (collection_name, records) from a dead-letter file, grouping consecutive lines by collection
+def iter_dead_letter_collections(dead_letter_file_path):
+    with open(dead_letter_file_path, "r", encoding="utf-8") as dead_letter_file:
+        entries = (json.loads(line) for line in dead_letter_file if line.strip())
+        for collection_name, group in groupby(entries, key=lambda entry: entry["collection"]):
+            yield collection_name, (dead_letter_record(entry) for entry in group)
+
+
+class ImportSpool:
+    """Tables of later import waves, set aside as NDJSON shards during the single pass over an export file.
+
+    The export file is read once: the first wave is imported as it streams past and
+    the records of the other waves are appended to ``<table>.ndjson`` in a temporary
+    directory, which later waves read back as a shard export. Shard directories need
+    no spool, as each wave decodes only its own tables' files.
+    """
+
+    def __init__(self, tables, directory=None):
+        self.tables = set(tables)
+        self._temporary = tempfile.TemporaryDirectory(prefix="firestore-import-spool-", dir=directory)
+        self.path = self._temporary.name
+        self.size = 0
+
+    def write(self, collection_name, records):
+        count = 0
+        spool_path = os.path.join(self.path, f"{collection_name}.ndjson")
+        with open(spool_path, "a", encoding="utf-8") as spool_file:
+            for record in records:
+                spool_file.write(canonical_json(record) + "\n")
+                count += 1
+        # Sized on disk, as read progress counts bytes
+        self.size = sum(entry.stat().st_size for entry in os.scandir(self.path))
+        print(f"🗃️ Set aside {count} records of {collection_name} for a later wave")
+
+    def close(self):
+        self._temporary.cleanup()
+
+
+def write_document(doc_ref, data, create_only):
+    if create_only:
+        doc_ref.create(data)
+    else:
+        doc_ref.set(data)
+
+
+class SingleWriter:
+    """Writes every document with its own set() call."""
+
+    def __init__(self, db, collection_name, create_only=False, reporter=None, retry=None):
+        self.collection_ref = db.collection(collection_name)
+        self.collection_name = collection_name
+        self.reporter = reporter or ProgressReporter(collection_name)
+        self.retry = retry or RetryPolicy()
+        self.create_only = create_only
+        self.written = 0
+        self.failed = 0
+        self.skipped = 0
+        self.on_flush = None  # Called once everything added so far has been written or reported
+        self.on_failure = None  # Called with (doc_id, data, error) for every document that failed
+
+    def add(self, doc_id, data):
         try:
-            doc_id = record.get("id", None)  # Ensure 'id' is the document key
-            if not doc_id:
-                print(f"⚠️ WARNING: Skipping record in '{collection_name}' without an 'id' field.")
-                continue
+            self.retry.call(lambda: write_document(self.collection_ref.document(doc_id), data, self.create_only),
+                            f"Document {doc_id} in {self.collection_name}")
+            self.written += 1
+            self.reporter.record("written", collection=self.collection_name)
+            self.reporter.debug(f"✅ Imported document {doc_id} into {self.collection_name}")
+        except AlreadyExists:
+            self.skipped += 1
+            self.reporter.record("skipped", collection=self.collection_name)
+            self.reporter.debug(f"⏩ Skipping existing document: {doc_id}")
+        except Exception as e:
+            self.failed += 1
+            self.reporter.record("failed", collection=self.collection_name)
+            print(f"❌ ERROR: Failed to insert document {doc_id} into {self.collection_name}: {e}")
+            if self.on_failure:
+                self.on_failure(doc_id, data, e)
+        if self.on_flush:
+            self.on_flush()
+
+    def close(self):
+        pass
+
+
+class BatchWriter:
+    """Groups set() calls into Firestore write batches.
+
+    A batch is committed once it holds ``batch_size`` documents or its oldest
+    write is ``flush_interval`` seconds old. Write batches are atomic, so when a
+    commit fails the documents of that batch are retried one by one so a single
+    bad record only loses itself. In ``create_only`` mode an existing document
+    fails its batch the same way and is then counted as skipped. Transient errors
+    are retried with backoff before a batch is split up.
+    """
+
+    def __init__(self, db, collection_name, batch_size=FIRESTORE_BATCH_LIMIT, flush_interval=5.0,
+                 create_only=False, reporter=None, retry=None):
+        self.db = db
+        self.collection_ref = db.collection(collection_name)
+        self.collection_name = collection_name
+        self.reporter = reporter or ProgressReporter(collection_name)
+        self.retry = retry or RetryPolicy()
+        self.create_only = create_only
+        self.batch_size = max(1, min(batch_size, FIRESTORE_BATCH_LIMIT))
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.pending_since = None
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.skipped = 0
+        self.on_flush = None  # Called once everything added so far has been written or reported
+        self.on_failure = None  # Called with (doc_id, data, error) for every document that failed
+
+    def add(self, doc_id, data):
+        if not self.pending:
+            self.pending_since = time.monotonic()
+        self.pending.append((doc_id, data))
+
+        if (len(self.pending) >= self.batch_size or
+                time.monotonic() - self.pending_since >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        pending, self.pending = self.pending, []
+        self.batches += 1
+        batch = self.db.batch()
+        for doc_id, data in pending:
+            doc_ref = self.collection_ref.document(doc_id)
+            if self.create_only:
+                batch.create(doc_ref, data)
+            else:
+                batch.set(doc_ref, data)
+
+        try:
+            self.retry.call(batch.commit, f"Batch {self.batches} for {self.collection_name}")
+            self.written += len(pending)
+            self.reporter.record("written", len(pending), self.collection_name)
+            self.reporter.debug(f"✅ Batch {self.batches} committed {len(pending)} documents into {self.collection_name}")
+        except Exception as e:
+            print(f"⚠️ WARNING: Batch {self.batches} for {self.collection_name} failed ({e}). "
+                  f"Retrying {len(pending)} documents individually...")
+            self._write_individually(pending)
+        if self.on_flush:
+            self.on_flush()
+
+    def _write_individually(self, pending):
+        batch_written = 0
+        for doc_id, data in pending:
+            try:
+                self.retry.call(lambda: write_document(self.collection_ref.document(doc_id), data, self.create_only),
+                                f"Document {doc_id} in {self.collection_name}")
+                batch_written += 1
+                self.reporter.record("written", collection=self.collection_name)
+            except AlreadyExists:
+                self.skipped += 1
+                self.reporter.record("skipped", collection=self.collection_name)
+            except Exception as e:
+                self.failed += 1
+                self.reporter.record("failed", collection=self.collection_name)
+                print(f"❌ ERROR: Failed to insert document {doc_id} into {self.collection_name}: {e}")
+                if self.on_failure:
+                    self.on_failure(doc_id, data, e)
+        self.written += batch_written
+        print(f"🔄 Batch {self.batches} recovered {batch_written}/{len(pending)} documents into {self.collection_name}")
+
+    def close(self):
+        self.flush()
+
+
+class BulkImportWriter:
+    """Streams set() calls through a Firestore BulkWriter.
+
+    The BulkWriter batches and parallelises writes itself; ``batch_size`` and
+    ``flush_interval`` control how large a flushed group gets, so progress is
+    reported per group. A flushed BulkWriter stops sending, so every group gets
+    its own BulkWriter, closed before ``on_flush`` runs. Writes of a group that
+    neither succeeded nor failed by then are counted and reported as failed.
+    Transient errors are handed back to the BulkWriter, which retries them with
+    its own backoff, up to ``retry.max_retries`` attempts. Results arrive on the
+    BulkWriter's threads, so the counters and ``unresolved`` are shared under a lock.
+    """
+
+    def __init__(self, db, collection_name, batch_size=FIRESTORE_BATCH_LIMIT, flush_interval=5.0,
+                 create_only=False, reporter=None, retry=None):
+        self.collection_ref = db.collection(collection_name)
+        self.collection_name = collection_name
+        self.reporter = reporter or ProgressReporter(collection_name)
+        self.retry = retry or RetryPolicy()
+        self.create_only = create_only
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.db = db
+        self.bulk_writer = None
+        self.unresolved = {}  # doc_id -> data of the group's writes without a result yet
+        self.queued = 0
+        self.queued_since = None
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.skipped = 0
+        self.on_flush = None  # Called once everything added so far has been written or reported
+        self.on_failure = None  # Called with (doc_id, data, error) for every document that failed
+        self._flushed_written = 0
+        self._flushed_failed = 0
+        self._lock = threading.Lock()
+
+    def _on_write_result(self, reference, result, bulk_writer):
+        with self._lock:
+            self.unresolved.pop(reference.id, None)
+            self.written += 1
+        self.reporter.record("written", collection=self.collection_name)
+
+    def _on_write_error(self, failure, bulk_writer):
+        doc_id = failure.operation.reference.id
+        if failure.code == ALREADY_EXISTS_CODE and self.create_only:
+            with self._lock:
+                self.unresolved.pop(doc_id, None)
+                self.skipped += 1
+            self.reporter.record("skipped", collection=self.collection_name)
+            return False
+        if failure.code in TRANSIENT_ERROR_CODES and failure.attempts < self.retry.max_retries:
+            return True
+        with self._lock:
+            self.unresolved.pop(doc_id, None)
+            self.failed += 1
+        self.reporter.record("failed", collection=self.collection_name)
+        print(f"❌ ERROR: Failed to insert document {doc_id} into {self.collection_name}: {failure.message}")
+        if self.on_failure:
+            self.on_failure(doc_id, failure.operation.document_data, failure.message)
+        return False  # Permanent failure, already reported
+
+    def add(self, doc_id, data):
+        if not self.queued:
+            self.queued_since = time.monotonic()
+            self.bulk_writer = self.db.bulk_writer()
+            self.bulk_writer.on_write_result(self._on_write_result)
+            self.bulk_writer.on_write_error(self._on_write_error)
+        with self._lock:
+            self.unresolved[doc_id] = data
+        doc_ref = self.collection_ref.document(doc_id)
+        if self.create_only:
+            self.bulk_writer.create(doc_ref, data)
+        else:
+            self.bulk_writer.set(doc_ref, data)
+        self.queued += 1
+
+        if (self.queued >= self.batch_size or
+                time.monotonic() - self.queued_since >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if not self.queued:
+            return
+
+        # Closing waits for every write of the group, including retries
+        self.bulk_writer.close()
+        self.bulk_writer = None
+        self.batches += 1
+
+        with self._lock:
+            unresolved, self.unresolved = self.unresolved, {}
+            self.failed += len(unresolved)
+        if unresolved:
+            print(f"❌ ERROR: {len(unresolved)} writes of batch {self.batches} into {self.collection_name} "
+                  "were never acknowledged by the BulkWriter")
+            for doc_id, data in unresolved.items():
+                self.reporter.record("failed", collection=self.collection_name)
+                if self.on_failure:
+                    self.on_failure(doc_id, data, "Write was never acknowledged by the BulkWriter")
+
+        with self._lock:
+            written = self.written - self._flushed_written
+            failed = self.failed - self._flushed_failed
+            self._flushed_written, self._flushed_failed = self.written, self.failed
+        self.queued = 0
+        if failed:
+            print(f"⚠️ Batch {self.batches} flushed into {self.collection_name}: {written} written, {failed} failed")
+        else:
+            self.reporter.debug(f"✅ Batch {self.batches} flushed into {self.collection_name}: {written} written")
+        if self.on_flush:
+            self.on_flush()
+
+    def close(self):
+        self.flush()
+
+
+def create_writer(db, collection_name, args, reporter=None):
+    # Without an existence check, create() lets Firestore reject documents that already exist.
+    # Delta imports overwrite changed documents, so they always use set().
+    create_only = args.existence_check == "none" and not args.delta
+    retry = RetryPolicy(args.max_retries, args.retry_base_delay, args.retry_max_delay)
+    if args.write_mode == "single":
+        return SingleWriter(db, collection_name, create_only, reporter, retry)
+    if args.write_mode == "bulk":
+        return BulkImportWriter(db, collection_name, args.batch_size, args.flush_interval, create_only, reporter,
+                                retry)
+    return BatchWriter(db, collection_name, args.batch_size, args.flush_interval, create_only, reporter, retry)
 
-            # Skip if already exists
-            if document_exists(collection_name, doc_id):
-                print(f"⏩ Skipping existing document: {doc_id}")
+
+# Insert one collection into Firestore through the configured writer
+def import_collection(db, collection_name, records, project, args, checkpoint=None, existing_ids=None, label=None,
+                      hash_store=None, reporter=None, dead_letters=None):
+    reporter = reporter or ProgressReporter(label or collection_name)
+    writer = create_writer(db, collection_name, args, reporter)
+    skipped = 0
+    invalid = 0
+    unchanged = 0
+
+    # Records before the checkpointed offset were committed by an earlier run
+    position = checkpoint.offset(collection_name) if checkpoint else 0
+    if position:
+        print(f"⏩ Skipping {position} records of {collection_name} committed before the restart")
+        records = islice(records, position, None)
+
+    # Delta imports remember the new hashes until the writer has committed them
+    pending_hashes = {}
+
+    def on_flush():
+        if pending_hashes:
+            hash_store.save(collection_name, pending_hashes)
+            pending_hashes.clear()
+        if checkpoint:
+            checkpoint.record(collection_name, position)
+
+    def on_failure(doc_id, data, error):
+        pending_hashes.pop(doc_id, None)
+        if dead_letters:
+            dead_letters.add(collection_name, doc_id, data, error)
+
+    writer.on_flush = on_flush
+    writer.on_failure = on_failure
+
+    if existing_ids is None:
+        existing_ids = set()
+        if args.existence_check == "scan" and not hash_store:
+            existing_ids = scan_existing_ids(db, collection_name)
+
+    stored_hashes = {}
+    for chunk in chunked(records, max(1, args.existence_chunk_size)):
+        chunk_ids = [record.get("id") for record in chunk if isinstance(record, dict) and record.get("id")]
+        if hash_store:
+            # Quarantined documents are still in the export, so their rows must be marked as seen too
+            quarantined_ids = [record.doc_id for record in chunk if isinstance(record, Quarantined) and record.doc_id]
+            stored_hashes = hash_store.get_hashes(collection_name, chunk_ids + quarantined_ids)
+            # Failed, unchanged or quarantined documents keep their row, so --delete-missing leaves them alone
+            hash_store.mark_seen(collection_name, list(stored_hashes))
+        elif args.existence_check == "bulk":
+            existing_ids = fetch_existing_ids(db, collection_name, chunk_ids) if chunk_ids else set()
+
+        for record in chunk:
+            position += 1
+            doc_id = None
+            if isinstance(record, Quarantined):
+                reporter.record("quarantined", collection=collection_name)
                 continue
+            try:
+                doc_id = record.get("id", None)  # Ensure 'id' is the document key
+                if not doc_id:
+                    print(f"⚠️ WARNING: Skipping record in '{collection_name}' without an 'id' field.")
+                    reporter.record("skipped", collection=collection_name)
+                    continue
+
+                # Skip if already exists
+                if not hash_store:
+                    if args.existence_check == "document":
+                        exists = document_exists(db, collection_name, doc_id)
+                    else:
+                        exists = doc_id in existing_ids
+                    if exists:
+                        reporter.debug(f"⏩ Skipping existing document: {doc_id}")
+                        reporter.record("skipped", collection=collection_name)
+                        skipped += 1
+                        continue
+
+                # Keep only schema-defined fields, converted to their native types
+                valid_record = project(record)
+
+                if hash_store:
+                    doc_hash = document_hash(valid_record)
+                    if stored_hashes.get(doc_id) == doc_hash:
+                        reporter.record("unchanged", collection=collection_name)
+                        unchanged += 1
+                        continue
+                    pending_hashes[doc_id] = doc_hash
+
+                writer.add(doc_id, valid_record)
+
+            except Exception as e:
+                invalid += 1
+                reporter.record("failed", collection=collection_name)
+                print(f"❌ ERROR: Failed to insert document {doc_id} into {collection_name}: {e}")
+                if dead_letters:
+                    dead_letters.add(collection_name, doc_id, record, e)
+
+    writer.close()
+    if checkpoint:
+        checkpoint.complete(collection_name, position)
+    skipped += writer.skipped
+    failed = writer.failed + invalid
+    summary = f"📊 {label or collection_name}: {writer.written} written, {failed} failed, {skipped} skipped"
+    if hash_store:
+        summary += f", {unchanged} unchanged"
+    if label:
+        reporter.debug(summary)  # Partition summaries are only interesting when tracing a run
+    else:
+        print(summary)
+    return writer.written, failed
+
+
+# Delete documents an earlier delta import wrote that are no longer in the export
+def delete_missing_documents(db, hash_store, reporter):
+    deleted = 0
+    for collection_name in hash_store.seen_collections():
+        stale_ids = hash_store.stale_ids(collection_name)
+        if not stale_ids:
+            continue
+
+        collection_ref = db.collection(collection_name)
+        collection_deleted = 0
+        for chunk in chunked(stale_ids, FIRESTORE_BATCH_LIMIT):
+            try:
+                batch = db.batch()
+                for doc_id in chunk:
+                    batch.delete(collection_ref.document(doc_id))
+                batch.commit()
+                hash_store.delete(collection_name, chunk)
+                collection_deleted += len(chunk)
+                reporter.record("deleted", len(chunk), collection_name)
+            except Exception as e:
+                print(f"❌ ERROR: Failed to delete {len(chunk)} stale documents from {collection_name}: {e}")
+        print(f"🗑️ Deleted {collection_deleted} documents from {collection_name} that are no longer in the export")
+        deleted += collection_deleted
+    return deleted
+
+
+class WorkerStats:
+    """Per-thread document counts and busy time for throughput reporting."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.workers = {}
+
+    def add(self, documents, seconds, name=None):
+        name = name or threading.current_thread().name
+        with self._lock:
+            worker = self.workers.setdefault(name, {"documents": 0, "seconds": 0.0, "partitions": 0})
+            worker["documents"] += documents
+            worker["seconds"] += seconds
+            worker["partitions"] += 1
+
+    def report(self):
+        for name, worker in sorted(self.workers.items()):
+            rate = worker["documents"] / worker["seconds"] if worker["seconds"] else 0.0
+            print(f"⚙️ {name}: {worker['documents']} documents in {worker['partitions']} partitions, "
+                  f"{worker['seconds']:.1f}s busy ({rate:.1f} docs/sec)")
+
+
+def import_partition(db, collection_name, partition, start, project, args, checkpoint, existing_ids, stats,
+                     hash_store=None, reporter=None, dead_letters=None):
+    label = f"{collection_name} [{start}-{start + len(partition)}]"
+    started = time.monotonic()
+    try:
+        result = import_collection(db, collection_name, partition, project, args,
+                                   existing_ids=existing_ids, label=label, hash_store=hash_store,
+                                   reporter=reporter, dead_letters=dead_letters)
+    except Exception as e:
+        # Leave the checkpoint behind this partition so a resume retries it
+        print(f"❌ ERROR: Partition {label} failed: {e}")
+        if reporter:
+            reporter.record("failed", len(partition), collection_name)
+        if dead_letters:
+            dead_letters.add_records(collection_name, partition, e)
+        return 0, len(partition)
+    stats.add(len(partition), time.monotonic() - started)
+    checkpoint.partition_done(collection_name, start, start + len(partition))
+    return result
+
+
+# Import collections concurrently, splitting each into partitions handled by a bounded thread pool
+def import_concurrently(db, collections, projectors, args, checkpoint, hash_store=None, reporter=None,
+                        dead_letters=None):
+    stats = WorkerStats()
+    # Bounds how many partitions are held in memory while waiting for a worker
+    slots = threading.BoundedSemaphore(args.workers * 2)
+    futures = []
+    partition_size = max(1, args.partition_size)
+
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="import-worker") as executor:
+        for collection_name, records in collections:
+            project = projectors[collection_name]
+            position = checkpoint.offset(collection_name)
+            if position:
+                print(f"⏩ Skipping {position} records of {collection_name} committed before the restart")
+                records = islice(records, position, None)
+
+            existing_ids = None
+            if args.existence_check == "scan" and not hash_store:
+                existing_ids = scan_existing_ids(db, collection_name)
+
+            for partition in chunked(records, partition_size):
+                slots.acquire()
+                future = executor.submit(import_partition, db, collection_name, partition, position,
+                                         project, args, checkpoint, existing_ids, stats, hash_store, reporter,
+                                         dead_letters)
+                future.add_done_callback(lambda _: slots.release())
+                futures.append(future)
+                position += len(partition)
+
+            checkpoint.set_total(collection_name, position)
 
-            # Ensure only schema-defined fields are inserted
-            valid_record = {k: v for k, v in record.items() if k in firestore_schema[collection_name]["fields"]}
+    total_written = sum(future.result()[0] for future in futures)
+    total_failed = sum(future.result()[1] for future in futures)
+    stats.report()
+    return total_written, total_failed
 
-            collection_ref.document(doc_id).set(valid_record)
-            print(f"✅ Imported document {doc_id} into {collection_name}")
 
+# State of an import worker process, set up once by init_import_process
+_process_state = {}
+
+
+def init_import_process(args, schema, run_id, interfaces=None):
+    _process_state["db"] = initialize_firestore(args.service_account)
+    _process_state["args"] = args
+    _process_state["projectors"] = compile_projectors(schema.columns)
+    if interfaces:
+        # Validated before references are attached, as the interfaces type reference columns as IDs
+        typescript_schemas, required = interfaces
+        _process_state["projectors"] = attach_validators(
+            _process_state["projectors"], DocumentValidators(typescript_schemas, required, timestamps_as_strings=True))
+    if args.reference_fields:
+        _process_state["projectors"] = attach_document_references(_process_state["db"], _process_state["projectors"],
+                                                                  schema.references)
+    _process_state["hash_store"] = DocumentHashStore(args.hash_store, run_id) if args.delta else None
+    _process_state["existing_ids"] = {}
+
+
+# Import one shard of a partition inside a worker process. Outcomes and dead letters are
+# returned to the parent, which owns the progress output, checkpoint and dead-letter file.
+def import_shard(collection_name, records, label):
+    args = _process_state["args"]
+    db = _process_state["db"]
+    hash_store = _process_state["hash_store"]
+    reporter = ProgressReporter(label, interval=float("inf"), verbose=args.verbose)
+    dead_letters = DeadLetterQueue(None)
+    started = time.monotonic()
+
+    existing_ids = None
+    if args.existence_check == "scan" and not hash_store:
+        # Scanned once per collection and process, then reused for every shard
+        if collection_name not in _process_state["existing_ids"]:
+            _process_state["existing_ids"][collection_name] = scan_existing_ids(db, collection_name)
+        existing_ids = _process_state["existing_ids"][collection_name]
+
+    completed = True
+    try:
+        project = _process_state["projectors"][collection_name]
+        written, failed = import_collection(db, collection_name, records, project, args, existing_ids=existing_ids,
+                                            label=label, hash_store=hash_store, reporter=reporter,
+                                            dead_letters=dead_letters)
+    except Exception as e:
+        print(f"❌ ERROR: Shard {label} failed: {e}")
+        completed = False
+        written, failed = 0, len(records)
+        reporter.record("failed", len(records), collection_name)
+        dead_letters.add_records(collection_name, records, e)
+
+    return {
+        "written": written,
+        "failed": failed,
+        "completed": completed,
+        "outcomes": reporter.collections.get(collection_name, {}),
+        "dead_letters": dead_letters.drain(),
+        "seconds": time.monotonic() - started,
+    }
+
+
+def shard_index(record, shard_count):
+    doc_id = record.get("id") if isinstance(record, dict) else None
+    return int(document_hash(doc_id), 16) % shard_count
+
+
+# Start one single-process executor per shard so every doc ID is always written by the same process
+def start_import_processes(args, schema, run_id, interfaces=None):
+    # Spawned rather than forked, as gRPC channels do not survive a fork
+    context = multiprocessing.get_context("spawn")
+    return [ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=init_import_process,
+                                initargs=(args, schema, run_id, interfaces))
+            for _ in range(args.processes)]
+
+
+# Import collections through the worker processes. Every partition is split into one shard per
+# process; the checkpoint only advances over a partition once all of its shards have finished.
+def import_in_processes(shards, collections, args, checkpoint, reporter, dead_letters):
+    stats = WorkerStats()
+    # Bounds how many shards are held in memory while waiting for a process
+    slots = threading.BoundedSemaphore(len(shards) * 2)
+    lock = threading.Lock()
+    totals = {"written": 0, "failed": 0}
+    futures = []
+    partition_size = max(1, args.partition_size)
+
+    def on_done(future, collection_name, records, index, partition):
+        slots.release()
+        try:
+            result = future.result()
         except Exception as e:
-            print(f"❌ ERROR: Failed to insert document {doc_id} into {collection_name}: {e}")
+            print(f"❌ ERROR: Import process {index} failed on {collection_name}: {e}")
+            result = {"written": 0, "failed": len(records), "completed": False, "outcomes": {"failed": len(records)},
+                      "dead_letters": [], "seconds": 0.0}
+            dead_letters.add_records(collection_name, records, e)
+
+        for outcome, count in result["outcomes"].items():
+            reporter.record(outcome, count, collection_name)
+        for entry in result["dead_letters"]:
+            dead_letters.add_entry(entry)
+        stats.add(len(records), result["seconds"], f"import-process-{index}")
+
+        with lock:
+            totals["written"] += result["written"]
+            totals["failed"] += result["failed"]
+            partition["pending"] -= 1
+            partition["completed"] = partition["completed"] and result["completed"]
+            finished = partition["pending"] == 0 and partition["completed"]
+        if finished:
+            checkpoint.partition_done(collection_name, partition["start"], partition["end"])
+
+    try:
+        for collection_name, records in collections:
+            position = checkpoint.offset(collection_name)
+            if position:
+                print(f"⏩ Skipping {position} records of {collection_name} committed before the restart")
+                records = islice(records, position, None)
+
+            for records_chunk in chunked(records, partition_size):
+                pieces = [[] for _ in shards]
+                for record in records_chunk:
+                    pieces[shard_index(record, len(shards))].append(record)
+
+                end = position + len(records_chunk)
+                partition = {"start": position, "end": end, "completed": True,
+                             "pending": sum(1 for piece in pieces if piece)}
+                for index, piece in enumerate(pieces):
+                    if not piece:
+                        continue
+                    slots.acquire()
+                    label = f"{collection_name} [{position}-{end}] shard {index}"
+                    future = shards[index].submit(import_shard, collection_name, piece, label)
+                    future.add_done_callback(
+                        lambda f, c=collection_name, r=piece, i=index, p=partition: on_done(f, c, r, i, p))
+                    futures.append(future)
+                position = end
+
+            checkpoint.set_total(collection_name, position)
+
+        for future in futures:
+            future.exception()  # Wait for the pass, errors were handled by on_done
+    except BrokenProcessPool as e:
+        print(f"❌ ERROR: An import process stopped unexpectedly: {e}")
+        sys.exit(1)
+
+    stats.report()
+    return totals["written"], totals["failed"]
+
+
+# Import one pass of collections, concurrently when --workers is above 1 and through worker
+# processes when --processes is set. The collections of a pass overlap in the pool, and the
+# pass only returns once all of them are written.
+def import_collections(db, collections, projectors, args, checkpoint, hash_store=None, reporter=None,
+                       dead_letters=None, shards=None):
+    if shards:
+        return import_in_processes(shards, collections, args, checkpoint, reporter, dead_letters)
+    if args.workers > 1:
+        return import_concurrently(db, collections, projectors, args, checkpoint, hash_store, reporter,
+                                   dead_letters)
+
+    total_written = 0
+    total_failed = 0
+    for collection_name, records in collections:
+        written, failed = import_collection(
+            db, collection_name, records, projectors[collection_name], args, checkpoint,
+            hash_store=hash_store, reporter=reporter, dead_letters=dead_letters
+        )
+        total_written += written
+        total_failed += failed
+    return total_written, total_failed
+
+
+# Yield the (collection_name, records) pairs of the export that still need importing
+def iter_importable_collections(export_file_path, projectors, checkpoint, on_read=None, include=None,
+                                warn_unknown=True, decode_processes=1, reference_index=None, spool=None):
+    if os.path.isdir(export_file_path):
+        source = iter_shard_collections(export_file_path, decode_processes, on_read=on_read)
+    else:
+        source = iter_export_collections(export_file_path, on_read=on_read)
+
+    for collection_name, records in source:
+        if collection_name not in projectors:
+            if warn_unknown:
+                print(f"⚠️ WARNING: Skipping unknown collection '{collection_name}' (not in schema).")
+            continue
+
+        if include is not None and collection_name not in include and (
+                spool is None or collection_name not in spool.tables):
+            continue
+
+        if checkpoint.is_completed(collection_name):
+            print(f"⏩ Skipping collection '{collection_name}' (completed before the restart).")
+            continue
+
+        if spool is not None and collection_name in spool.tables:
+            records = normalize_records(collection_name, records)
+            if records is not None:
+                spool.write(collection_name, records)
+            continue
+
+        print(f"📂 Processing collection: {collection_name} ...")
+
+        records = normalize_records(collection_name, records)
+        if records is None:
+            continue
+
+        if reference_index:
+            records = reference_index.filter(collection_name, records)
+        yield collection_name, records
+
+
+def main():
+    args = parser.parse_args()
+
+    db = initialize_firestore(args.service_account)
+    schema = load_schema(args.schema)
+    projectors = compile_projectors(schema.columns)
+
+    if args.delete_missing and (args.resume or not args.delta):
+        # Records skipped by a resume are never marked as seen, so they would look deleted
+        print("❌ ERROR: --delete-missing requires --delta and cannot be combined with --resume.")
+        sys.exit(1)
+
+    if args.processes and args.workers > 1:
+        print("❌ ERROR: --processes and --workers cannot be combined.")
+        sys.exit(1)
+
+    if args.replay_dead_letters and (args.resume or args.delta):
+        print("❌ ERROR: --replay-dead-letters cannot be combined with --resume or --delta.")
+        sys.exit(1)
+
+    if args.check_references and (args.resume or args.replay_dead_letters or args.order != "dependencies"):
+        # The index must see every record, and referenced collections must be imported first
+        print("❌ ERROR: --check-references requires --order dependencies and cannot be combined with "
+              "--resume or --replay-dead-letters.")
+        sys.exit(1)
+
+    # The projection turns ISO timestamp text into datetimes, which the interfaces declare as strings
+    validators = load_validators(args.validate_types, timestamps_as_strings=True) if args.validate_types else None
+    # Worker processes are sent the plain interface maps and compile their own validators
+    interfaces = (validators.typescript_schemas, validators.required) if validators else None
+    if validators:
+        # Validated before references are attached, as the interfaces type reference columns as IDs
+        projectors = attach_validators(projectors, validators)
+
+    references = schema.references
+    if args.reference_fields:
+        projectors = attach_document_references(db, projectors, references)
+
+    checkpoint = ImportCheckpoint(args.checkpoint, args.export, args.checkpoint_interval)
+    if args.resume:
+        checkpoint.load()
+
+    hash_store = DocumentHashStore(args.hash_store) if args.delta else None
+
+    reporter = ProgressReporter("Firestore import", interval=args.progress_interval, verbose=args.verbose,
+                                metrics_file=args.metrics_file)
+
+    if args.replay_dead_letters:
+        # Move the file aside so records failing again land in a fresh dead-letter file
+        replay_file_path = f"{args.replay_dead_letters}.replay-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        try:
+            os.replace(args.replay_dead_letters, replay_file_path)
+        except OSError as e:
+            print(f"❌ ERROR: Failed to open dead-letter file: {e}")
+            sys.exit(1)
+        print(f"🔁 Replaying dead letters from '{replay_file_path}'")
+        input_file_path = replay_file_path
+    else:
+        input_file_path = args.export
+
+    dead_letters = DeadLetterQueue(args.dead_letter_file)
+
+    reference_index = None
+    if args.check_references:
+        quarantine = None
+        if args.check_references == "quarantine":
+            quarantine = DeadLetterQueue(args.orphans_file, "quarantine")
+        reference_index = ReferenceIndex(references, quarantine)
+
+    # An export file is read once; tables of later waves are spooled during that pass and imported from the
+    # spool. A shard directory is read again per wave, which only decodes the files of that wave's tables
+    waves = [None]
+    if args.order == "dependencies" and not args.replay_dead_letters:
+        waves = [wave for wave in plan_import_waves(references)
+                 if not all(checkpoint.is_completed(collection_name) for collection_name in wave)]
+    spool = None
+    if len(waves) > 1 and not os.path.isdir(args.export):
+        try:
+            spool = ImportSpool([collection_name for wave in waves[1:] for collection_name in wave], args.spool_dir)
+        except OSError as e:
+            print(f"❌ ERROR: Failed to create the spool directory: {e}")
+            sys.exit(1)
+
+    # The number of records is unknown while streaming, so the ETA follows how much of the input was read,
+    # counting spooled tables again as they are written and read back
+    input_size = max(export_stat(input_file_path)[0], 1)
+    input_read = [0]
+
+    def on_read(bytes_read):
+        input_read[0] += bytes_read
+
+    if not args.replay_dead_letters:
+        reporter.set_progress_source(lambda: input_read[0] / (input_size + (spool.size if spool else 0)))
+
+    total_written = 0
+    total_failed = 0
+
+    shards = None
+    if args.processes and not args.replay_dead_letters:
+        shards = start_import_processes(args, schema, hash_store.run_id if hash_store else None,
+                                        interfaces)
+
+    # Records are streamed from the export, so writes start while it is still being read
+    try:
+        if args.replay_dead_letters:
+            for collection_name, records in iter_dead_letter_collections(input_file_path):
+                if collection_name not in projectors:
+                    print(f"⚠️ WARNING: Skipping dead letters for '{collection_name}' - not in schema.")
+                    continue
+                written, failed = import_collection(
+                    db, collection_name, records, projectors[collection_name], args,
+                    reporter=reporter, dead_letters=dead_letters
+                )
+                total_written += written
+                total_failed += failed
+        else:
+            for number, wave in enumerate(waves, 1):
+                if wave is not None:
+                    print(f"🌊 Import wave {number}/{len(waves)}: {', '.join(wave)}")
+                source = spool.path if spool and number > 1 else args.export
+                collections = iter_importable_collections(source, projectors, checkpoint, on_read,
+                                                          include=wave, warn_unknown=number == 1,
+                                                          decode_processes=args.decode_processes,
+                                                          reference_index=reference_index,
+                                                          spool=spool if number == 1 else None)
+                written, failed = import_collections(db, collections, projectors, args, checkpoint,
+                                                     hash_store, reporter, dead_letters, shards)
+                total_written += written
+                total_failed += failed
+                if reference_index:
+                    reference_index.mark_complete(wave)
+    except ValueError as e:  # json.JSONDecodeError is a ValueError
+        print(f"❌ ERROR: Failed to parse {'dead-letter file' if args.replay_dead_letters else 'Supabase export'} - {e}")
+        sys.exit(1)
+    except OSError as e:
+        print(f"❌ ERROR: Failed to load input file: {e}")
+        sys.exit(1)
+    finally:
+        for shard in shards or []:
+            shard.shutdown()
+        if spool:
+            spool.close()
+        dead_letters.close()
+        if reference_index and reference_index.quarantine:
+            reference_index.quarantine.close()
+
+    if args.delete_missing:
+        delete_missing_documents(db, hash_store, reporter)
+    if hash_store:
+        hash_store.close()
+
+    extra_metrics = {}
+    if reference_index:
+        reference_index.report()
+        extra_metrics["references"] = reference_index.summary()
+
+    reporter.finish(written=total_written, failed=total_failed, workers=args.workers, processes=args.processes,
+                    write_mode=args.write_mode, **extra_metrics)
+
+    if total_failed:
+        print(f"⚠️ Firestore data import completed with {total_failed} failed documents ({total_written} imported).")
+    else:
+        print("🔥 Firestore data import completed successfully!")
+
 
-print("🔥 Firestore data import completed successfully!")
+if __name__ == "__main__":
+    main()
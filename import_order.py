@@ -0,0 +1,80 @@
+"""
+Foreign-key-aware ordering of collections for the Firestore import.
+
+Schemas converted from a pg_dump carry their foreign keys (see ``schema_loader``).
+For schema files without constraint information, references are inferred from
+column names: ``<name>_id`` refers to the collection called ``<name>`` in its
+plural form (``category_id`` → ``categories``, ``jobsite_id`` → ``jobsites``).
+Columns that match no collection in the schema, such as ``user_id`` (Supabase
+``auth.users``) or Stripe's ``customer_id``, refer to data outside the import and
+are ignored, as are self-references.
+
+``dependency_waves`` groups collections into waves in which every collection only
+refers to collections of earlier waves, so the collections of a wave can be
+imported in parallel once the previous wave has finished.
+"""
+
+FOREIGN_KEY_SUFFIX = "_id"
+
+
+def _plural_forms(name):
+    forms = [name, name + "s", name + "es"]
+    if name.endswith("y"):
+        forms.append(name[:-1] + "ies")
+    return forms
+
+
+def referenced_collection(column_name, collection_names):
+    """Return the collection a ``*_id`` column refers to, or None."""
+    if not column_name.endswith(FOREIGN_KEY_SUFFIX) or column_name == FOREIGN_KEY_SUFFIX:
+        return None
+    name = column_name[:-len(FOREIGN_KEY_SUFFIX)]
+    for candidate in _plural_forms(name):
+        if candidate in collection_names:
+            return candidate
+    return None
+
+
+def reference_columns(columns):
+    """Map every collection to ``{column_name: referenced_collection}`` for its reference columns.
+
+    ``columns`` maps collection names to their column names (any iterable).
+    """
+    collection_names = set(columns)
+    references = {}
+    for collection_name, column_names in columns.items():
+        references[collection_name] = {}
+        for column_name in column_names:
+            referenced = referenced_collection(column_name, collection_names)
+            if referenced and referenced != collection_name:
+                references[collection_name][column_name] = referenced
+    return references
+
+
+def dependency_graph(references):
+    """Map every collection to the set of collections it refers to.
+
+    ``references`` is a ``{collection: {column: referenced_collection}}`` map as
+    returned by ``reference_columns``.
+    """
+    return {collection_name: set(targets.values()) for collection_name, targets in references.items()}
+
+
+def dependency_waves(graph):
+    """Split the graph into waves of collections whose dependencies are all in earlier waves.
+
+    Returns ``(waves, cyclic)``. Collections caught in a reference cycle cannot be
+    ordered; they are returned in ``cyclic`` and should be imported last.
+    """
+    remaining = {name: set(dependencies) & set(graph) for name, dependencies in graph.items()}
+    waves = []
+    while remaining:
+        ready = sorted(name for name, dependencies in remaining.items() if not dependencies)
+        if not ready:
+            break
+        waves.append(ready)
+        for name in ready:
+            del remaining[name]
+        for dependencies in remaining.values():
+            dependencies.difference_update(ready)
+    return waves, sorted(remaining)
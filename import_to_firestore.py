@@ -1,9 +1,17 @@
 
 
-import json
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+from document_hashes import document_hash
+from schema_loader import load_compiled_schema
+
+# Metadata collection holding one schema document per table, keyed by table name
+SCHEMA_REGISTRY_COLLECTION = "_schema_registry"
+
+# Firestore rejects write batches with more than 500 operations
+FIRESTORE_BATCH_LIMIT = 500
+
 # Initialize Firebase app with the service account key
 cred = credentials.Certificate('serviceAccountKey.json')  # Replace with your path
 firebase_admin.initialize_app(cred)
@@ -11,48 +19,56 @@ firebase_admin.initialize_app(cred)
 # Reference to Firestore
 db = firestore.client()
 
-# Load schema from firestore_schema.json
-with open('firestore_schema.json', 'r') as file:
-    firestore_schema = json.load(file)
-
-# Initialize a dictionary to hold collections
-collections = {}
+# Load schema from firestore_schema.json (either shape, compiled once and cached next to the file)
+firestore_schema = load_compiled_schema('firestore_schema.json')
 
 # Convert schema to Firestore format
 def convert_to_firestore(firestore_schema):
-    for entry in firestore_schema:
-        table_name = entry['table_name']
-        column_name = entry['column_name']
-        data_type = entry['data_type']
-
-        # Initialize collections if not present
-        if table_name not in collections:
-            collections[table_name] = []
-
+    collections = {}
+    for table_name, columns in firestore_schema.columns.items():
         # Append column details to the appropriate table collection
-        collections[table_name].append({
-            'column_name': column_name,
-            'data_type': data_type
-        })
+        collections[table_name] = [{'column_name': column_name, 'data_type': data_type}
+                                   for column_name, data_type in columns.items()]
     return collections
 
-# Function to update Firestore schema
+# Function to update Firestore schema: one registry document per table, written in a single
+# batch. Tables whose schema hash is unchanged are skipped, so a rerun writes nothing.
 def update_firestore_schema(collections):
+    registry_ref = db.collection(SCHEMA_REGISTRY_COLLECTION)
+    registered = {}
+    for snapshot in registry_ref.select(['schema_hash']).stream():
+        registered[snapshot.id] = (snapshot.to_dict() or {}).get('schema_hash')
+
+    operations = []
     for table, columns in collections.items():
-        # For each table, create a collection in Firestore
-        collection_ref = db.collection(table)
-
-        # Iterate through columns and add them as fields
-        for column in columns:
-            column_name = column['column_name']
-            data_type = column['data_type']
-            
-            # Creating or updating a document for each column (adjust according to your needs)
-            collection_ref.add({
-                'column_name': column_name,
-                'data_type': data_type
-            })
-        print(f'Collection {table} updated/created in Firestore.')
+        schema_hash = document_hash(columns)
+        if registered.get(table) == schema_hash:
+            continue
+        operations.append(('set', table, {
+            'table_name': table,
+            'columns': columns,
+            'schema_hash': schema_hash,
+            'updated_at': firestore.SERVER_TIMESTAMP
+        }))
+        print(f'Table {table} {"updated" if table in registered else "registered"} in {SCHEMA_REGISTRY_COLLECTION}.')
+
+    for table in registered.keys() - collections.keys():
+        operations.append(('delete', table, None))
+        print(f'Table {table} removed from {SCHEMA_REGISTRY_COLLECTION}.')
+
+    if not operations:
+        print("✅ Schema registry is already up to date, nothing to write.")
+        return 0
+
+    for start in range(0, len(operations), FIRESTORE_BATCH_LIMIT):
+        batch = db.batch()
+        for operation, table, data in operations[start:start + FIRESTORE_BATCH_LIMIT]:
+            if operation == 'set':
+                batch.set(registry_ref.document(table), data)
+            else:
+                batch.delete(registry_ref.document(table))
+        batch.commit()
+    return len(operations)
 
 # Main process
 def main():
@@ -64,8 +80,9 @@ def main():
     print("✅ Successfully loaded schema from 'firestore_schema.json'!")
     
     # Update Firestore with schema
-    update_firestore_schema(collections)
-    print("✅ Firestore schema updated successfully!")
+    written = update_firestore_schema(collections)
+    if written:
+        print(f"✅ Firestore schema registry updated successfully ({written} writes)!")
 
 # Execute the script
 if __name__ == "__main__":
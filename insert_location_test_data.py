@@ -6,16 +6,22 @@ This script adds latitude and longitude coordinates to existing user profiles an
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+import argparse
 import json
 import random
 import sys
 import os
 from datetime import datetime, timedelta
 
+from document_validators import load_validators
+
 # Initialize Firebase Admin SDK
 # You need to provide a service account key file
 SERVICE_ACCOUNT_KEY = 'serviceAccountKey.json'
 
+# TypeScript interface validators, loaded in main() when --validate-types is given
+validators = None
+
 # Test user IDs - replace with actual user IDs from your system
 TEST_USERS = {
     'basic': 'CIv3qKZ6KMa2kSxWloAaZBfau8I2',  # Basic user
@@ -99,12 +105,15 @@ def update_user_profile(db, user_id, zip_code):
             return False
         
         # Update the user profile with location data
-        user_ref.update({
+        location_update = {
             'zip_code': zip_code,
             'latitude': location_data['lat'],
             'longitude': location_data['lng'],
             'updated_at': firestore.SERVER_TIMESTAMP
-        })
+        }
+        if validators:
+            validators.validate('user_profiles', location_update, partial=True)
+        user_ref.update(location_update)
         
         print(f"Updated user profile {user_id} with ZIP code {zip_code} and coordinates")
         return True
@@ -138,6 +147,8 @@ def create_client(db, user_id, name, zip_code):
             'updated_at': firestore.SERVER_TIMESTAMP
         }
         
+        if validators:
+            validators.validate('clients', client_data)
         client_ref = db.collection('clients').document()
         client_ref.set(client_data)
         
@@ -208,6 +219,8 @@ def create_jobsite(db, user_id, client_id, name, zip_code):
             'updated_at': firestore.SERVER_TIMESTAMP
         }
         
+        if validators:
+            validators.validate('jobsites', jobsite_data)
         jobsite_ref = db.collection('jobsites').document()
         jobsite_ref.set(jobsite_data)
         
@@ -220,6 +233,15 @@ def create_jobsite(db, user_id, client_id, name, zip_code):
 
 def main():
     """Main function to insert test data"""
+    parser = argparse.ArgumentParser(description="Insert location test data for user profiles, clients and jobsites")
+    parser.add_argument("--validate-types", nargs="+", metavar="DIR",
+                        help="Validate documents against the TypeScript interfaces below these directories "
+                             "before they are written")
+    args = parser.parse_args()
+    global validators
+    if args.validate_types:
+        validators = load_validators(args.validate_types)
+
     print("Initializing Firebase...")
     db = initialize_firebase()
     
@@ -0,0 +1,310 @@
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import firebase_admin
+from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1 import FieldFilter, GeoPoint
+from google.cloud.firestore_v1.document import DocumentReference
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from progress_reporter import ProgressReporter
+
+# Configurations
+SERVICE_ACCOUNT_FILE = "serviceAccountKey.json"
+MIRROR_FILE_PATH = "firestore_mirror.sqlite"
+DEFAULT_COLLECTIONS = ["user_profiles", "clients", "jobsites", "workers", "worker_jobsites", "weather_checks",
+                       "email_logs"]
+CURSOR_FIELDS = ["updated_at", "created_at"]
+
+# 🔹 Configure command line arguments
+parser = argparse.ArgumentParser(
+    description="Mirror Firestore collections into a local SQLite file, one table per collection. Syncs are "
+                "incremental by updated_at (or created_at); nested maps and arrays are stored as JSON columns.")
+parser.add_argument("collections", nargs="*", default=DEFAULT_COLLECTIONS,
+                    help=f"Collections to mirror (default: {', '.join(DEFAULT_COLLECTIONS)})")
+parser.add_argument("--service-account", default=SERVICE_ACCOUNT_FILE, help="Path to Firebase service account key")
+parser.add_argument("--database", default=MIRROR_FILE_PATH, help="Path to the SQLite mirror")
+parser.add_argument("--cursor-field", help="Field to sync incrementally by (default: updated_at, else created_at)")
+parser.add_argument("--full", action="store_true",
+                    help="Re-read whole collections and drop rows of deleted documents. Incremental syncs cannot "
+                         "see deletions, nor documents without the cursor field")
+parser.add_argument("--page-size", type=int, default=1000, help="Documents read per query page")
+parser.add_argument("--workers", type=int, default=4, help="Collections synced concurrently")
+parser.add_argument("--verbose", "-v", action="store_true", help="Print a line per synced page")
+parser.add_argument("--progress-interval", type=float, default=2.0, help="Seconds between progress lines")
+parser.add_argument("--metrics-file", help="Where to write the JSON metrics summary")
+
+
+def initialize_firestore(service_account_file):
+    if not os.path.exists(service_account_file):
+        print(f"❌ ERROR: Service account file '{service_account_file}' not found.")
+        sys.exit(1)
+
+    try:
+        cred = credentials.Certificate(service_account_file)
+        firebase_admin.initialize_app(cred)
+        db = firestore.client()
+        print("✅ Firebase successfully initialized and connected to Firestore.")
+        return db
+    except Exception as e:
+        print(f"❌ ERROR: Failed to initialize Firebase: {e}")
+        sys.exit(1)
+
+
+def connect(database_path):
+    connection = sqlite3.connect(database_path, timeout=60)
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return timestamp_text(value)
+    if isinstance(value, DocumentReference):
+        return value.path
+    if isinstance(value, GeoPoint):
+        return {"latitude": value.latitude, "longitude": value.longitude}
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def timestamp_text(value):
+    # UTC ISO strings sort in time order, so SQL comparisons on them work
+    return (value.astimezone(timezone.utc) if value.tzinfo else value).isoformat()
+
+
+# Convert a Firestore value to its SQLite value and the declared type of a new column
+def sqlite_value(value):
+    if value is None:
+        return None, None
+    if isinstance(value, bool):
+        return int(value), "INTEGER"
+    if isinstance(value, int):
+        return value, "INTEGER"
+    if isinstance(value, float):
+        return value, "REAL"
+    if isinstance(value, str):
+        return value, "TEXT"
+    if isinstance(value, datetime):
+        return timestamp_text(value), "TIMESTAMP"
+    if isinstance(value, bytes):
+        return value, "BLOB"
+    if isinstance(value, DocumentReference):
+        return value.path, "TEXT"
+    # Maps (such as weather_monitoring), arrays and geo points
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=_json_default), "JSON"
+
+
+class MirrorTable:
+    """SQLite table mirroring one collection, growing a column for every new field."""
+
+    def __init__(self, connection, collection_name):
+        self.connection = connection
+        self.collection_name = collection_name
+        self.table = quote(collection_name)
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (id TEXT PRIMARY KEY, _synced_at TEXT)")
+        self.columns = [row[1] for row in connection.execute(f"PRAGMA table_info({self.table})")]
+
+    def upsert(self, snapshots, synced_at):
+        rows = []
+        for snapshot in snapshots:
+            row = {"id": snapshot.id, "_synced_at": synced_at}
+            for field, value in (snapshot.to_dict() or {}).items():
+                if field in ("id", "_synced_at"):
+                    continue  # The doc ID and sync marker own these columns
+                row[field], column_type = sqlite_value(value)
+                if field not in self.columns:
+                    self.connection.execute(
+                        f"ALTER TABLE {self.table} ADD COLUMN {quote(field)} {column_type or ''}".rstrip())
+                    self.columns.append(field)
+            rows.append(row)
+
+        if rows:
+            # Replacing the whole row also clears fields a document no longer has
+            column_list = ", ".join(quote(column) for column in self.columns)
+            placeholders = ", ".join("?" * len(self.columns))
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} ({column_list}) VALUES ({placeholders})",
+                [[row.get(column) for column in self.columns] for row in rows],
+            )
+
+    def delete_unsynced(self, synced_at):
+        cursor = self.connection.execute(f"DELETE FROM {self.table} WHERE _synced_at != ?", (synced_at,))
+        return cursor.rowcount
+
+
+def load_state(connection, collection_name):
+    row = connection.execute(
+        "SELECT cursor_field, last_value, cursor_type FROM _mirror_state WHERE collection = ?", (collection_name,)
+    ).fetchone()
+    if row is None:
+        return None, None, None
+    # Mirrors from before cursor_type was stored only ever kept timestamp cursors
+    return row[0], row[1], row[2] or "timestamp"
+
+
+def save_state(connection, collection_name, cursor_field, last_value, cursor_type=None):
+    connection.execute(
+        "INSERT OR REPLACE INTO _mirror_state (collection, cursor_field, last_value, cursor_type, synced_at)"
+        " VALUES (?, ?, ?, ?, ?)",
+        (collection_name, cursor_field, last_value, cursor_type if last_value else None,
+         datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+    )
+
+
+def cursor_value(value):
+    """``(cursor_type, text)`` of a cursor field value, or None for values a cursor cannot follow.
+
+    Timestamps are kept as UTC ISO text; strings (such as ISO dates written by clients) as they are,
+    since Firestore orders them the same way Python compares them.
+    """
+    if isinstance(value, datetime):
+        return "timestamp", timestamp_text(value)
+    if isinstance(value, str):
+        return "string", value
+    return None
+
+
+def newest_cursor(newest):
+    """``(last_value, cursor_type)`` to store for the newest cursor values seen, by type."""
+    if len(newest) != 1:
+        return None, None  # Nothing to follow, or two types no single query can follow
+    (cursor_type, last_value), = newest.items()
+    return last_value, cursor_type
+
+
+def detect_cursor_field(collection_ref, cursor_field):
+    if cursor_field:
+        return cursor_field
+    for field in CURSOR_FIELDS:
+        # Ordered queries only return documents that have the field
+        if any(True for _ in collection_ref.order_by(field).limit(1).stream()):
+            return field
+    return None
+
+
+def sync_collection(db, collection_name, args, reporter):
+    connection = connect(args.database)
+    try:
+        table = MirrorTable(connection, collection_name)
+        collection_ref = db.collection(collection_name)
+        synced_at = datetime.now(timezone.utc).isoformat()
+
+        cursor_field = detect_cursor_field(collection_ref, args.cursor_field)
+        stored_field, last_value, cursor_type = load_state(connection, collection_name)
+        full = args.full or not cursor_field
+        if full:
+            query = collection_ref.order_by(FieldPath.document_id())
+            mode = "full"
+        elif stored_field == cursor_field and last_value:
+            # >= re-reads documents sharing the last value; the upsert makes that harmless. Inequality
+            # filters only match values of the same type, so the cursor is compared as what it was read as
+            since = datetime.fromisoformat(last_value) if cursor_type == "timestamp" else last_value
+            query = collection_ref.where(filter=FieldFilter(cursor_field, ">=", since))
+            query = query.order_by(cursor_field)
+            mode = f"incremental by {cursor_field} since {last_value}"
+        else:
+            query = collection_ref.order_by(cursor_field)
+            mode = f"initial by {cursor_field}"
+        print(f"🔄 Syncing {collection_name} ({mode}) ...")
+
+        synced = 0
+        newest = {}  # cursor_type: newest text, as timestamps and strings cannot be compared
+        last_snapshot = None
+        while True:
+            page = query.limit(args.page_size)
+            if last_snapshot is not None:
+                page = page.start_after(last_snapshot)
+            snapshots = list(page.stream())
+            if snapshots:
+                last_snapshot = snapshots[-1]
+                table.upsert(snapshots, synced_at)
+                if cursor_field:
+                    for snapshot in snapshots:
+                        value = cursor_value((snapshot.to_dict() or {}).get(cursor_field))
+                        if value is not None and value[1] > newest.get(value[0], ""):
+                            newest[value[0]] = value[1]
+                if not full and len(newest) == 1:
+                    # Pages arrive in cursor order, so everything up to here is mirrored
+                    save_state(connection, collection_name, cursor_field, *newest_cursor(newest))
+                connection.commit()  # Progress survives an interrupted sync
+                synced += len(snapshots)
+                reporter.record("synced", len(snapshots), collection_name)
+                reporter.debug(f"📄 {collection_name}: {synced} documents synced")
+            if len(snapshots) < args.page_size:
+                break
+
+        if cursor_field and len(newest) > 1:
+            print(f"⚠️ WARNING: {collection_name}.{cursor_field} holds both timestamps and strings; an incremental "
+                  f"sync would only follow one of them, so the next sync reads everything again.")
+            if not full:
+                save_state(connection, collection_name, cursor_field, None)
+                connection.commit()
+        elif cursor_field and synced and not newest and not last_value:
+            print(f"⚠️ WARNING: {collection_name}.{cursor_field} holds neither timestamps nor strings, so the next "
+                  f"sync reads everything again. Pick another field with --cursor-field.")
+
+        deleted = 0
+        if full:
+            deleted = table.delete_unsynced(synced_at)
+            # A full pass reads in ID order, so the cursor is only safe to store once it is complete
+            save_state(connection, collection_name, cursor_field, *newest_cursor(newest))
+            connection.commit()
+            reporter.record("deleted", deleted, collection_name)
+
+        print(f"📊 {collection_name}: {synced} documents synced" + (f", {deleted} deleted" if deleted else ""))
+        return synced
+    finally:
+        connection.close()
+
+
+def main():
+    args = parser.parse_args()
+    db = initialize_firestore(args.service_account)
+
+    connection = connect(args.database)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS _mirror_state ("
+        " collection TEXT PRIMARY KEY,"
+        " cursor_field TEXT,"
+        " last_value TEXT,"
+        " cursor_type TEXT,"
+        " synced_at TEXT)"
+    )
+    if "cursor_type" not in [row[1] for row in connection.execute("PRAGMA table_info(_mirror_state)")]:
+        connection.execute("ALTER TABLE _mirror_state ADD COLUMN cursor_type TEXT")
+    connection.commit()
+    connection.close()
+
+    reporter = ProgressReporter("Firestore mirror", interval=args.progress_interval, verbose=args.verbose,
+                                metrics_file=args.metrics_file)
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix="mirror-worker") as executor:
+        futures = {collection_name: executor.submit(sync_collection, db, collection_name, args, reporter)
+                   for collection_name in args.collections}
+        for collection_name, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                failed.append(collection_name)
+                reporter.record("failed", collection=collection_name)
+                print(f"❌ ERROR: Failed to sync {collection_name}: {e}")
+
+    reporter.finish(database=args.database)
+    if failed:
+        print(f"⚠️ Mirror sync completed with errors in: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"🔥 Mirror '{args.database}' is up to date!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+Streaming parser for ``pg_dump --schema-only`` output.
+
+The dump is read line by line and turned into a token stream: identifiers and
+keywords, quoted identifiers, string and dollar-quoted literals, numbers and
+punctuation, with comments dropped. Strings, dollar-quoted function bodies and
+block comments may span lines. Only the tokens of ``CREATE TABLE`` and
+``ALTER TABLE`` statements are buffered; every other statement is skipped as it
+streams past, so memory use does not depend on the size of the dump.
+
+``parse_schema`` returns the tables with their columns, Postgres types, primary
+keys and foreign keys, both inline and from ``ALTER TABLE ... ADD CONSTRAINT``.
+"""
+
+import re
+
+WORD = "word"
+IDENTIFIER = "identifier"
+STRING = "string"
+NUMBER = "number"
+PUNCTUATION = "punctuation"
+
+_TOKEN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<line_comment>--[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<dollar>\$(?:[A-Za-z_][A-Za-z_0-9]*)?\$)
+  | (?P<string>[EeBbXxNn]?')
+  | (?P<identifier>")
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z_0-9$]*)
+  | (?P<cast>::)
+  | (?P<punctuation>.)
+""", re.VERBOSE)
+
+# Keywords that end a column's type and start its constraints
+_COLUMN_CONSTRAINTS = {"not", "null", "default", "constraint", "primary", "references", "unique", "check",
+                       "collate", "generated"}
+
+# Words allowed between CREATE and TABLE
+_TABLE_PREFIXES = {"unlogged", "temporary", "temp", "global", "local"}
+
+# Type names, as pg_dump writes them, that are known to information_schema by the same name
+_MULTI_WORD_TYPES = {"character varying", "double precision", "timestamp with time zone",
+                     "timestamp without time zone", "time with time zone", "time without time zone",
+                     "bit varying"}
+_BUILTIN_TYPES = {
+    "bigint", "bigserial", "bit", "boolean", "bytea", "character", "cidr", "date", "inet", "integer", "interval",
+    "json", "jsonb", "macaddr", "money", "name", "numeric", "oid", "real", "serial", "smallint", "smallserial",
+    "text", "time", "timestamp", "tsquery", "tsvector", "uuid", "xml", "char", "varchar", "int", "int2", "int4",
+    "int8", "float4", "float8", "bool", "decimal", "timestamptz", "citext",
+} | _MULTI_WORD_TYPES
+_TYPE_ALIASES = {
+    "varchar": "character varying", "char": "character", "int": "integer", "int4": "integer", "int2": "smallint",
+    "int8": "bigint", "float4": "real", "float8": "double precision", "bool": "boolean", "decimal": "numeric",
+    "timestamptz": "timestamp with time zone", "timestamp": "timestamp without time zone",
+    "time": "time without time zone", "serial": "integer", "smallserial": "smallint", "bigserial": "bigint",
+}
+
+
+def iter_tokens(lines):
+    """Yield ``(kind, text)`` tokens from an iterable of SQL lines."""
+    pending = None  # (kind, closing delimiter, collected text) of a token spanning lines
+    for line in lines:
+        position = 0
+        while position < len(line):
+            if pending is not None:
+                kind, closing, collected = pending
+                end = _find_closing(line, position, kind, closing)
+                if end is None:
+                    collected.append(line[position:])
+                    position = len(line)
+                    continue
+                collected.append(line[position:end - len(closing)])
+                position = end
+                pending = None
+                if kind != "block_comment":
+                    yield kind, "".join(collected)
+                continue
+
+            match = _TOKEN.match(line, position)
+            kind = match.lastgroup
+            position = match.end()
+            if kind in ("space", "line_comment"):
+                continue
+            if kind == "block_comment":
+                pending = ("block_comment", "*/", [])
+            elif kind == "dollar":
+                pending = (STRING, match.group(), [])
+            elif kind == "string":
+                pending = (STRING, "'", [])
+            elif kind == "identifier":
+                pending = (IDENTIFIER, '"', [])
+            elif kind == "cast":
+                yield PUNCTUATION, "::"
+            else:
+                yield kind, match.group()
+    if pending is not None and pending[0] != "block_comment":
+        raise ValueError("Unterminated string or identifier at the end of the dump")
+
+
+def _find_closing(line, position, kind, closing):
+    """Index just after the closing delimiter in ``line``, or None if it is on a later line."""
+    while True:
+        end = line.find(closing, position)
+        if end == -1:
+            return None
+        end += len(closing)
+        if closing in ("'", '"') and line.startswith(closing, end):
+            position = end + 1  # Doubled quote inside the literal
+            continue
+        return end
+
+
+def iter_statements(tokens):
+    """Yield the token lists of CREATE TABLE and ALTER TABLE statements, skipping all others."""
+    statement = []
+    keep = None
+    for token in tokens:
+        if token == (PUNCTUATION, ";"):
+            if keep:
+                yield statement
+            statement = []
+            keep = None
+            continue
+        if keep is None:
+            statement.append(token)
+            words = [_lower(t) for t in statement]
+            if words[0] not in ("create", "alter"):
+                keep = False
+            elif words[-1] == "table":
+                keep = True
+            elif len(words) > 1 and words[-1] not in _TABLE_PREFIXES:
+                keep = False
+        elif keep:
+            statement.append(token)
+
+
+def _lower(token):
+    return token[1].lower() if token[0] == WORD else token[1]
+
+
+class _Cursor:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+
+    def peek(self, offset=0):
+        index = self.index + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def peek_word(self, offset=0):
+        return _lower(self.peek(offset))
+
+    def next(self):
+        token = self.peek()
+        self.index += 1
+        return token
+
+    def accept(self, *words):
+        if all(self.peek_word(offset) == word for offset, word in enumerate(words)):
+            self.index += len(words)
+            return True
+        return False
+
+    def at_end(self):
+        return self.index >= len(self.tokens)
+
+    def qualified_name(self):
+        """Read ``name`` or ``schema.name``, returning ``(schema, name)``."""
+        parts = [self.next()[1]]
+        while self.peek() == (PUNCTUATION, "."):
+            self.next()
+            parts.append(self.next()[1])
+        return (parts[-2] if len(parts) > 1 else None), parts[-1]
+
+    def name_list(self):
+        names = []
+        if self.peek() != (PUNCTUATION, "("):
+            return names
+        self.next()
+        while not self.at_end():
+            token = self.next()
+            if token == (PUNCTUATION, ")"):
+                break
+            if token != (PUNCTUATION, ","):
+                names.append(token[1])
+        return names
+
+    def skip_bracketed(self):
+        """Skip a ``(...)`` or ``[...]`` group, including nested groups."""
+        depth = 0
+        while not self.at_end():
+            token = self.next()
+            if token in _OPENING:
+                depth += 1
+            elif token in _CLOSING:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def skip_to_item_end(self):
+        """Skip to the ``,`` or ``)`` that ends the current column or constraint."""
+        while not self.at_end() and self.peek() not in _ITEM_END:
+            if self.peek() in _OPENING:
+                self.skip_bracketed()
+            else:
+                self.next()
+
+
+_OPENING = {(PUNCTUATION, "("), (PUNCTUATION, "[")}
+_CLOSING = {(PUNCTUATION, ")"), (PUNCTUATION, "]")}
+_ITEM_END = {(PUNCTUATION, ","), (PUNCTUATION, ")")}
+
+
+def normalize_type(type_tokens):
+    """Return ``(data_type, element_type)`` in information_schema terms for a column's type tokens."""
+    words = []
+    is_array = False
+    depth = 0
+    for kind, text in type_tokens:
+        if (kind, text) == (PUNCTUATION, "("):
+            depth += 1
+        elif (kind, text) == (PUNCTUATION, ")"):
+            depth -= 1
+        elif depth:
+            continue  # Length, precision or PostGIS modifiers
+        elif (kind, text) == (PUNCTUATION, "["):
+            is_array = True
+        elif kind == PUNCTUATION and text != ".":
+            continue
+        elif kind == WORD and text.lower() == "array":
+            is_array = True
+        else:
+            words.append(text if kind == IDENTIFIER else text.lower())
+
+    name = " ".join(words).replace(" . ", ".")
+    if "." in name:
+        schema, _, base = name.rpartition(".")
+        name = base if schema == "pg_catalog" else name
+    name = _TYPE_ALIASES.get(name, name)
+    if name not in _BUILTIN_TYPES and name not in _TYPE_ALIASES.values():
+        name = "USER-DEFINED"
+    if is_array:
+        return "ARRAY", name
+    return name, None
+
+
+class Table:
+    def __init__(self, schema, name):
+        self.schema = schema
+        self.name = name
+        self.columns = []
+        self.primary_key = []
+        self.foreign_keys = []
+
+    def column(self, column_name):
+        for column in self.columns:
+            if column["column_name"] == column_name:
+                return column
+        return None
+
+
+def _parse_foreign_key(cursor, columns):
+    """Parse ``REFERENCES table (columns) ...`` after the keyword; returns a foreign key dict."""
+    referenced_schema, referenced_table = cursor.qualified_name()
+    referenced_columns = cursor.name_list()
+    return {"columns": columns, "references_schema": referenced_schema or "public",
+            "references_table": referenced_table, "references_columns": referenced_columns}
+
+
+def qualified_reference(foreign_key):
+    """The referenced table as ``schema.table``, or just ``table`` for ``public``."""
+    if foreign_key["references_schema"] == "public":
+        return foreign_key["references_table"]
+    return f"{foreign_key['references_schema']}.{foreign_key['references_table']}"
+
+
+def _parse_table_constraint(cursor, table):
+    if cursor.accept("constraint"):
+        cursor.next()  # Constraint name
+    if cursor.accept("primary", "key"):
+        table.primary_key = cursor.name_list()
+    elif cursor.accept("foreign", "key"):
+        columns = cursor.name_list()
+        if cursor.accept("references"):
+            table.foreign_keys.append(_parse_foreign_key(cursor, columns))
+
+
+def _parse_column(cursor, table):
+    column_name = cursor.next()[1]
+    type_tokens = []
+    depth = 0
+    while not cursor.at_end():
+        token = cursor.peek()
+        if depth == 0 and (token in _ITEM_END or token[0] == WORD and _lower(token) in _COLUMN_CONSTRAINTS):
+            break
+        if token == (PUNCTUATION, "("):
+            depth += 1
+        elif token == (PUNCTUATION, ")"):
+            depth -= 1
+        type_tokens.append(cursor.next())
+
+    data_type, element_type = normalize_type(type_tokens)
+    column = {"column_name": column_name, "data_type": data_type, "is_nullable": "YES"}
+    if element_type:
+        column["element_type"] = element_type
+    table.columns.append(column)
+
+    # Column constraints, up to the end of the column definition
+    while not cursor.at_end() and cursor.peek() not in _ITEM_END:
+        if cursor.accept("not", "null"):
+            column["is_nullable"] = "NO"
+        elif cursor.accept("primary", "key"):
+            column["is_nullable"] = "NO"
+            table.primary_key = [column_name]
+        elif cursor.accept("references"):
+            table.foreign_keys.append(_parse_foreign_key(cursor, [column_name]))
+        elif cursor.peek() in _OPENING:
+            cursor.skip_bracketed()  # CHECK (...), DEFAULT ARRAY[...], GENERATED ... AS (...)
+        else:
+            cursor.next()
+
+
+def _parse_create_table(cursor, tables):
+    while not cursor.accept("table"):
+        cursor.next()
+    cursor.accept("if", "not", "exists")
+    schema, name = cursor.qualified_name()
+    if cursor.peek() != (PUNCTUATION, "("):
+        return  # CREATE TABLE ... AS, PARTITION OF and the like carry no column list
+    table = tables.setdefault((schema, name), Table(schema, name))
+    cursor.next()
+    while not cursor.at_end() and cursor.peek() != (PUNCTUATION, ")"):
+        if cursor.peek() in _ITEM_END:
+            pass  # Empty column list
+        elif cursor.peek_word() in ("constraint", "primary", "foreign", "unique", "check", "exclude", "like"):
+            _parse_table_constraint(cursor, table)
+        else:
+            _parse_column(cursor, table)
+        cursor.skip_to_item_end()
+        if cursor.peek() == (PUNCTUATION, ","):
+            cursor.next()
+
+
+def _parse_alter_table(cursor, tables):
+    cursor.accept("alter", "table")
+    cursor.accept("if", "exists")
+    cursor.accept("only")
+    schema, name = cursor.qualified_name()
+    table = tables.get((schema, name))
+    if table is None:
+        return
+    while not cursor.at_end():
+        if cursor.accept("add"):
+            if cursor.peek_word() in ("constraint", "primary", "foreign", "unique", "check", "exclude"):
+                _parse_table_constraint(cursor, table)
+            else:
+                cursor.accept("column")
+                cursor.accept("if", "not", "exists")
+                _parse_column(cursor, table)
+            cursor.skip_to_item_end()
+        else:
+            cursor.next()
+
+
+def parse_schema(lines, schemas=("public",)):
+    """Parse a schema dump into ``Table`` objects, keeping tables of the given schemas.
+
+    Unqualified table names count as ``public``. Pass ``schemas=None`` to keep all.
+    Foreign keys into tables outside the kept schemas, such as ``auth.users``, are
+    dropped, so they cannot be taken for a kept table of the same name.
+    """
+    tables = {}
+    for statement in iter_statements(iter_tokens(lines)):
+        cursor = _Cursor(statement)
+        if cursor.peek_word() == "create":
+            _parse_create_table(cursor, tables)
+        else:
+            _parse_alter_table(cursor, tables)
+
+    parsed = []
+    for (schema, _), table in tables.items():
+        if schemas is None or (schema or "public") in schemas:
+            for column_name in table.primary_key:
+                column = table.column(column_name)
+                if column:
+                    column["is_nullable"] = "NO"
+            if schemas is not None:
+                table.foreign_keys = [foreign_key for foreign_key in table.foreign_keys
+                                      if foreign_key["references_schema"] in schemas]
+            parsed.append(table)
+    return parsed
+
+
+def schema_entries(tables):
+    """Flatten tables into the ``[{table_name, column_name, data_type, ...}]`` list the importers read."""
+    entries = []
+    for table in tables:
+        references = {}
+        for foreign_key in table.foreign_keys:
+            for column_name, referenced_column in zip(foreign_key["columns"],
+                                                      foreign_key["references_columns"] or ["id"]):
+                references[column_name] = {"table": foreign_key["references_table"], "column": referenced_column}
+
+        for column in table.columns:
+            entry = {"table_name": table.name, **column}
+            if column["column_name"] in table.primary_key:
+                entry["primary_key"] = True
+            if column["column_name"] in references:
+                entry["references"] = references[column["column_name"]]
+            entries.append(entry)
+    return entries
@@ -0,0 +1,120 @@
+"""
+Throttled progress and metrics reporting for the Firestore import and seed scripts.
+
+Printing a line per document costs more than the write itself once imports reach
+hundreds of thousands of documents. ``ProgressReporter`` counts outcomes instead,
+prints at most one progress line per interval with the rate, error count and ETA,
+and writes a JSON metrics summary when the run finishes. Per-document messages go
+through ``debug()`` and are only printed in verbose mode.
+"""
+
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Outcomes counted as errors in progress lines and the metrics summary
+ERROR_OUTCOMES = {"failed"}
+
+
+class ProgressReporter:
+    """Thread-safe counter of document outcomes with throttled progress output.
+
+    ``total`` is the expected number of documents when it is known up front. When
+    it is not, ``set_progress_source`` can provide the completed fraction some
+    other way (for example bytes read from an export) so an ETA can still be shown.
+    """
+
+    def __init__(self, label, total=None, interval=2.0, verbose=False, metrics_file=None):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.verbose = verbose
+        self.metrics_file = metrics_file
+        self.outcomes = {}
+        self.collections = {}
+        self.documents = 0
+        self.errors = 0
+        self._progress_source = None
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._started_at = datetime.now()
+        self._last_report = self._started
+
+    def set_progress_source(self, progress_source):
+        """Use ``progress_source()`` (a fraction between 0 and 1) to estimate the ETA."""
+        self._progress_source = progress_source
+
+    def record(self, outcome, count=1, collection=None):
+        """Count ``count`` documents that ended with ``outcome`` (written, skipped, failed, ...)."""
+        if not count:
+            return
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + count
+            if collection is not None:
+                collection_outcomes = self.collections.setdefault(collection, {})
+                collection_outcomes[outcome] = collection_outcomes.get(outcome, 0) + count
+            self.documents += count
+            if outcome in ERROR_OUTCOMES:
+                self.errors += count
+
+            now = time.monotonic()
+            if now - self._last_report >= self.interval:
+                self._last_report = now
+                self._print_progress(now)
+
+    def debug(self, message):
+        if self.verbose:
+            print(message)
+
+    def _fraction_done(self):
+        if self.total:
+            return min(self.documents / self.total, 1.0)
+        if self._progress_source is not None:
+            return min(max(self._progress_source(), 0.0), 1.0)
+        return None
+
+    def _print_progress(self, now):
+        elapsed = now - self._started
+        rate = self.documents / elapsed if elapsed > 0 else 0.0
+        line = f"⏳ {self.label}: {self.documents:,} docs ({rate:,.1f} docs/sec), {self.errors:,} errors"
+
+        fraction = self._fraction_done()
+        if fraction:
+            remaining = elapsed * (1 - fraction) / fraction
+            line += f", {fraction * 100:.1f}% done, ETA {timedelta(seconds=int(remaining))}"
+        print(line)
+        sys.stdout.flush()
+
+    def metrics(self, **extra):
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            return {
+                "label": self.label,
+                "started_at": self._started_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "elapsed_seconds": round(elapsed, 3),
+                "documents": self.documents,
+                "errors": self.errors,
+                "docs_per_second": round(self.documents / elapsed, 1) if elapsed > 0 else 0.0,
+                "outcomes": dict(self.outcomes),
+                "collections": {name: dict(outcomes) for name, outcomes in self.collections.items()},
+                **extra,
+            }
+
+    def finish(self, **extra):
+        """Print the final totals and write the metrics summary, returning it."""
+        summary = self.metrics(**extra)
+        outcomes = ", ".join(f"{count:,} {outcome}" for outcome, count in sorted(summary["outcomes"].items()))
+        print(f"📈 {self.label}: {summary['documents']:,} docs in {summary['elapsed_seconds']:.1f}s "
+              f"({summary['docs_per_second']:,.1f} docs/sec){': ' + outcomes if outcomes else ''}")
+
+        if self.metrics_file:
+            try:
+                with open(self.metrics_file, "w", encoding="utf-8") as metrics_file:
+                    json.dump(summary, metrics_file, indent=4, default=str)
+                print(f"💾 Metrics saved to '{self.metrics_file}'")
+            except OSError as e:
+                print(f"⚠️ WARNING: Failed to write metrics file '{self.metrics_file}': {e}")
+        return summary
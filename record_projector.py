@@ -0,0 +1,181 @@
+"""
+Compiled record projectors for Supabase → Firestore imports.
+
+A projector is built once per collection from the column ``data_type`` entries
+in ``firestore_schema.json``. It keeps only the schema's columns and converts
+Postgres values that arrive as strings into native Firestore types, such as
+timestamps into ``datetime`` (stored as Firestore Timestamps) and numeric
+strings into numbers. The per-column decisions are made when the projector is
+compiled, so projecting a record is a single pass over its keys with dict lookups.
+"""
+
+import json
+import uuid
+from datetime import datetime
+
+TIMESTAMP_TYPES = {"timestamp with time zone", "timestamp without time zone", "timestamp", "timestamptz"}
+INTEGER_TYPES = {"integer", "bigint", "smallint", "int", "int2", "int4", "int8"}
+NUMERIC_TYPES = {"numeric", "double precision", "real", "decimal", "float4", "float8"}
+BOOLEAN_TYPES = {"boolean", "bool"}
+JSON_TYPES = {"jsonb", "json"}
+UUID_TYPES = {"uuid"}
+ARRAY_TYPES = {"array"}
+
+_TRUE_STRINGS = {"true", "t", "1", "yes", "y"}
+_FALSE_STRINGS = {"false", "f", "0", "no", "n"}
+
+
+def to_timestamp(value):
+    if isinstance(value, datetime):
+        return value
+    text = value.strip()
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    # Also accepts the "2025-02-21 20:55:55+00" form of Postgres text output
+    return datetime.fromisoformat(text)
+
+
+def to_integer(value):
+    if isinstance(value, bool):
+        raise ValueError(f"expected an integer, got {value!r}")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(f"expected an integer, got {value!r}")
+        return int(value)
+    return int(value)
+
+
+def to_number(value):
+    if isinstance(value, bool):
+        raise ValueError(f"expected a number, got {value!r}")
+    if isinstance(value, (int, float)):
+        return value
+    text = value.strip()
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def to_boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE_STRINGS:
+        return True
+    if text in _FALSE_STRINGS:
+        return False
+    raise ValueError(f"expected a boolean, got {value!r}")
+
+
+def to_json(value):
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def to_uuid_string(value):
+    # Normalises case and hyphenation so IDs compare equal across tables
+    return str(uuid.UUID(str(value)))
+
+
+def to_array(value):
+    if isinstance(value, list):
+        return value
+    return parse_array_literal(value)
+
+
+def parse_array_literal(text):
+    """Parse a one-dimensional Postgres array literal such as ``{a,"b c",NULL}``.
+
+    Elements are returned as strings (or ``None``); the schema does not record the
+    element type.
+    """
+    text = text.strip()
+    if not (text.startswith("{") and text.endswith("}")):
+        raise ValueError(f"expected an array literal, got {text!r}")
+    body = text[1:-1]
+    elements = []
+    i = 0
+    while i < len(body):
+        if body[i] == '"':
+            i += 1
+            element = []
+            while i < len(body) and body[i] != '"':
+                if body[i] == "\\":
+                    i += 1
+                element.append(body[i:i + 1])
+                i += 1
+            if i >= len(body):
+                raise ValueError("unterminated quoted element in array literal")
+            elements.append("".join(element))
+            i += 1
+        else:
+            end = body.find(",", i)
+            end = len(body) if end == -1 else end
+            element = body[i:end].strip()
+            if element.startswith("{"):
+                raise ValueError("multi-dimensional arrays are not supported")
+            elements.append(None if element.upper() == "NULL" else element)
+            i = end
+        if i < len(body):
+            if body[i] != ",":
+                raise ValueError(f"unexpected {body[i]!r} in array literal")
+            i += 1
+    return elements
+
+
+def converter_for(data_type):
+    """Return the converter for a Postgres data type, or None to store values unchanged."""
+    if not data_type:
+        return None
+    data_type = data_type.lower()
+    if data_type in TIMESTAMP_TYPES:
+        return to_timestamp
+    if data_type in INTEGER_TYPES:
+        return to_integer
+    if data_type in NUMERIC_TYPES:
+        return to_number
+    if data_type in BOOLEAN_TYPES:
+        return to_boolean
+    if data_type in JSON_TYPES:
+        return to_json
+    if data_type in UUID_TYPES:
+        return to_uuid_string
+    if data_type in ARRAY_TYPES:
+        return to_array
+    return None
+
+
+def compile_projector(columns):
+    """Compile a projector for one collection.
+
+    ``columns`` maps column names to Postgres data types (``None`` when the type
+    is unknown). The returned callable takes a record and returns a new dict with
+    only the schema's columns, converted to their native types. It raises
+    ``ValueError`` naming the column when a value cannot be converted.
+    """
+    converters = {name: converter_for(data_type) for name, data_type in columns.items()}
+    if not any(converters.values()):
+        names = frozenset(converters)
+        return lambda record: {k: v for k, v in record.items() if k in names}
+
+    missing = object()
+
+    def project(record):
+        projected = {}
+        for name, value in record.items():
+            convert = converters.get(name, missing)
+            if convert is missing:
+                continue
+            if convert is not None and value is not None:
+                try:
+                    value = convert(value)
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"column '{name}' has invalid value {value!r}: {e}") from None
+            projected[name] = value
+        return projected
+
+    return project
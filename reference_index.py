@@ -0,0 +1,141 @@
+"""
+One-pass referential checks for the Firestore import.
+
+Supabase UUIDs are copied into Firestore doc IDs and ``*_id`` fields, but nothing
+checks that a referenced document exists. ``ReferenceIndex`` keeps the primary
+keys of every collection that streams through the import in memory, stored as
+16-byte UUIDs where possible, and checks each record's reference columns (see
+``import_order.reference_columns``) against them. Because the importer writes
+collections in dependency waves, every referenced collection has been fully
+indexed before the records referring to it arrive, so no Firestore lookups are
+needed.
+
+References to a collection that has not been fully indexed yet, such as inside
+a reference cycle, are not checked.
+"""
+
+import uuid
+
+from google.cloud.firestore_v1.document import DocumentReference
+
+# How many orphaned values are kept per column for the summary
+ORPHAN_SAMPLE_SIZE = 3
+
+
+class Quarantined:
+    """Stands in for a record held back by the reference check.
+
+    The record stream keeps its length, so checkpoint offsets still line up with
+    positions in the export. ``doc_id`` lets ``--delete-missing`` tell a held-back
+    document from one that left the export.
+    """
+
+    def __init__(self, doc_id=None):
+        self.doc_id = doc_id
+
+
+def index_key(doc_id):
+    """Compact, case-insensitive key of a doc ID: UUID bytes, or the ID itself."""
+    try:
+        return uuid.UUID(str(doc_id)).bytes
+    except ValueError:
+        return str(doc_id)
+
+
+class ReferenceIndex:
+    """In-memory primary-key index of the imported collections.
+
+    ``references`` maps collections to ``{column: referenced_collection}``. With
+    ``quarantine`` set to a ``DeadLetterQueue``, records with orphaned references
+    are written there instead of being imported; otherwise they are only reported.
+    """
+
+    def __init__(self, references, quarantine=None):
+        self.references = references
+        self.quarantine = quarantine
+        self.keys = {}
+        self.complete = set()
+        self.checked = 0
+        self.orphans = {}
+        self.quarantined = 0
+
+    def mark_complete(self, collection_names):
+        """Declare that every record of these collections has been indexed."""
+        for collection_name in collection_names:
+            self.keys.setdefault(collection_name, set())
+            self.complete.add(collection_name)
+
+    def find_orphans(self, collection_name, record):
+        """Return ``[(column, referenced_collection, value)]`` for references with no target."""
+        orphans = []
+        for column_name, referenced in self.references.get(collection_name, {}).items():
+            value = record.get(column_name)
+            if value is None or referenced not in self.complete:
+                continue
+            self.checked += 1
+            if index_key(value) not in self.keys[referenced]:
+                orphans.append((column_name, referenced, value))
+        return orphans
+
+    def filter(self, collection_name, records):
+        """Index and check records as they stream past, yielding them unchanged or as ``Quarantined``."""
+        keys = self.keys.setdefault(collection_name, set())
+        for record in records:
+            if not isinstance(record, dict):
+                yield record
+                continue
+
+            orphans = self.find_orphans(collection_name, record)
+            for column_name, referenced, value in orphans:
+                orphan = self.orphans.setdefault((collection_name, column_name, referenced), {"count": 0, "samples": []})
+                orphan["count"] += 1
+                if len(orphan["samples"]) < ORPHAN_SAMPLE_SIZE:
+                    orphan["samples"].append(value)
+
+            if orphans and self.quarantine is not None:
+                self.quarantined += 1
+                description = ", ".join(f"{column_name}={value} not in {referenced}"
+                                        for column_name, referenced, value in orphans)
+                self.quarantine.add(collection_name, record.get("id"), record, f"orphaned reference: {description}")
+                yield Quarantined(record.get("id"))
+                continue
+
+            if record.get("id"):
+                keys.add(index_key(record["id"]))
+            yield record
+
+    def summary(self):
+        return {
+            "checked": self.checked,
+            "orphans": sum(orphan["count"] for orphan in self.orphans.values()),
+            "quarantined": self.quarantined,
+            "columns": {f"{collection_name}.{column_name}": orphan["count"]
+                        for (collection_name, column_name, _), orphan in sorted(self.orphans.items())},
+        }
+
+    def report(self):
+        summary = self.summary()
+        print(f"🔗 Reference check: {summary['checked']} references checked, {summary['orphans']} orphaned")
+        for (collection_name, column_name, referenced), orphan in sorted(self.orphans.items()):
+            samples = ", ".join(str(value) for value in orphan["samples"])
+            print(f"⚠️ WARNING: {orphan['count']} {collection_name}.{column_name} values have no document "
+                  f"in {referenced} (e.g. {samples})")
+        if self.quarantined:
+            print(f"🚧 {self.quarantined} records with orphaned references were quarantined")
+
+
+def attach_document_references(db, projectors, references):
+    """Wrap projectors so reference columns are stored as DocumentReferences."""
+    def rewriting(project, targets):
+        def project_with_references(record):
+            projected = project(record)
+            for column_name, referenced in targets.items():
+                value = projected.get(column_name)
+                if value is not None and not isinstance(value, DocumentReference):
+                    projected[column_name] = db.collection(referenced).document(str(value))
+            return projected
+        return project_with_references
+
+    return {collection_name: rewriting(project, references[collection_name])
+            if references.get(collection_name) else project
+            for collection_name, project in projectors.items()}
@@ -8,6 +8,7 @@ and then creates sample user profiles and data for a basic user and a pro user.
 
 import os
 import json
+import argparse
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
 import datetime
@@ -15,6 +16,9 @@ import uuid
 import random
 from typing import Dict, List, Any, Optional
 
+from document_validators import load_validators
+from progress_reporter import ProgressReporter
+
 # Initialize Firebase Admin SDK
 try:
     # Use the application default credentials
@@ -26,6 +30,12 @@ except ValueError:
 
 db = firestore.client()
 
+# Counts written, deleted and failed documents; configured from the command line in main()
+progress = ProgressReporter('Database reset and seed')
+
+# TypeScript interface validators, loaded in main() when --validate-types is given
+validators = None
+
 # Collection names to clear (excluding 'admins')
 COLLECTIONS_TO_CLEAR = [
     'user_profiles',
@@ -210,6 +220,15 @@ SUBSCRIPTION_FEATURES = {
     }
 }
 
+def write_document(collection_name: str, doc_id: str, data: Dict[str, Any]):
+    """Write a seed document and count it in the run's progress"""
+    if validators:
+        # Raises DocumentValidationError before a document that drifted from its interface is written
+        validators.validate(collection_name, data)
+    db.collection(collection_name).document(doc_id).set(data)
+    progress.record('written', collection=collection_name)
+    progress.debug(f"Wrote {collection_name}/{doc_id}")
+
 def clear_collections():
     """Clear all collections except 'admins'"""
     print("Clearing collections...")
@@ -222,9 +241,12 @@ def clear_collections():
             # Delete each document
             for doc in docs:
                 doc.reference.delete()
+                progress.record('deleted', collection=collection_name)
+                progress.debug(f"Deleted {collection_name}/{doc.id}")
                 
             print(f"Cleared collection: {collection_name}")
         except Exception as e:
+            progress.record('failed', collection=collection_name)
             print(f"Error clearing collection {collection_name}: {e}")
     
     print("Collections cleared successfully")
@@ -260,9 +282,10 @@ def create_user_profile(uid: str, data: Dict[str, Any]):
             'updated_at': firestore.SERVER_TIMESTAMP
         }
         
-        db.collection('user_profiles').document(uid).set(profile_data)
+        write_document('user_profiles', uid, profile_data)
         print(f"Created user profile for {data['email']}")
     except Exception as e:
+        progress.record('failed', collection='user_profiles')
         print(f"Error creating user profile for {data['email']}: {e}")
 
 def create_subscription(uid: str, plan: str):
@@ -300,7 +323,7 @@ def create_subscription(uid: str, plan: str):
             'currentPeriodEnd': next_year.isoformat()
         }
         
-        db.collection('subscriptions').document(subscription_id).set(subscription_data)
+        write_document('subscriptions', subscription_id, subscription_data)
         print(f"Created {plan} subscription for user {uid}")
         
         # Create billing history
@@ -308,6 +331,7 @@ def create_subscription(uid: str, plan: str):
         
         return subscription_id
     except Exception as e:
+        progress.record('failed', collection='subscriptions')
         print(f"Error creating subscription for user {uid}: {e}")
 
 def create_billing_history(uid: str, subscription_id: str, plan: str):
@@ -338,10 +362,11 @@ def create_billing_history(uid: str, subscription_id: str, plan: str):
                 'created_at': firestore.SERVER_TIMESTAMP
             }
             
-            db.collection('billing_history').document(history_id).set(history_data)
+            write_document('billing_history', history_id, history_data)
         
         print(f"Created billing history for user {uid}")
     except Exception as e:
+        progress.record('failed', collection='billing_history')
         print(f"Error creating billing history for user {uid}: {e}")
 
 def create_clients(uid: str, num_clients: int = 3) -> List[str]:
@@ -357,12 +382,13 @@ def create_clients(uid: str, num_clients: int = 3) -> List[str]:
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
             
-            db.collection('clients').document(client_id).set(client_data)
+            write_document('clients', client_id, client_data)
             client_ids.append(client_id)
         
         print(f"Created {len(client_ids)} clients for user {uid}")
         return client_ids
     except Exception as e:
+        progress.record('failed', collection='clients')
         print(f"Error creating clients for user {uid}: {e}")
         return client_ids
 
@@ -379,12 +405,13 @@ def create_workers(uid: str, num_workers: int = 3) -> List[str]:
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
             
-            db.collection('workers').document(worker_id).set(worker_data)
+            write_document('workers', worker_id, worker_data)
             worker_ids.append(worker_id)
         
         print(f"Created {len(worker_ids)} workers for user {uid}")
         return worker_ids
     except Exception as e:
+        progress.record('failed', collection='workers')
         print(f"Error creating workers for user {uid}: {e}")
         return worker_ids
 
@@ -421,7 +448,7 @@ def create_jobsites(uid: str, client_ids: List[str], worker_ids: List[str], max_
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
             
-            db.collection('jobsites').document(jobsite_id).set(jobsite_data)
+            write_document('jobsites', jobsite_id, jobsite_data)
             jobsite_ids.append(jobsite_id)
             
             # Assign some workers to this jobsite
@@ -438,11 +465,12 @@ def create_jobsites(uid: str, client_ids: List[str], worker_ids: List[str], max_
                         'created_at': firestore.SERVER_TIMESTAMP
                     }
                     
-                    db.collection('worker_jobsites').document(relation_id).set(relation_data)
+                    write_document('worker_jobsites', relation_id, relation_data)
         
         print(f"Created {len(jobsite_ids)} jobsites for user {uid}")
         return jobsite_ids
     except Exception as e:
+        progress.record('failed', collection='jobsites')
         print(f"Error creating jobsites for user {uid}: {e}")
         return jobsite_ids
 
@@ -512,10 +540,11 @@ def create_email_templates(uid: str, num_templates: int = 3):
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
             
-            db.collection('email_templates').document(template_id).set(template_data)
+            write_document('email_templates', template_id, template_data)
         
         print(f"Created {min(num_templates, len(templates))} email templates for user {uid}")
     except Exception as e:
+        progress.record('failed', collection='email_templates')
         print(f"Error creating email templates for user {uid}: {e}")
 
 def create_email_logs(uid: str, client_ids: List[str], jobsite_ids: List[str], num_logs: int = 5):
@@ -555,10 +584,11 @@ def create_email_logs(uid: str, client_ids: List[str], jobsite_ids: List[str], n
                 'created_at': firestore.SERVER_TIMESTAMP
             }
             
-            db.collection('email_logs').document(log_id).set(log_data)
+            write_document('email_logs', log_id, log_data)
         
         print(f"Created {num_logs} email logs for user {uid}")
     except Exception as e:
+        progress.record('failed', collection='email_logs')
         print(f"Error creating email logs for user {uid}: {e}")
 
 def create_weather_checks(uid: str, jobsite_ids: List[str], num_checks: int = 10):
@@ -608,10 +638,11 @@ def create_weather_checks(uid: str, jobsite_ids: List[str], num_checks: int = 10
                 'created_at': firestore.SERVER_TIMESTAMP
             }
             
-            db.collection('weather_checks').document(check_id).set(check_data)
+            write_document('weather_checks', check_id, check_data)
         
         print(f"Created {num_checks} weather checks for user {uid}")
     except Exception as e:
+        progress.record('failed', collection='weather_checks')
         print(f"Error creating weather checks for user {uid}: {e}")
 
 def seed_user_data(user_data: Dict[str, Any]):
@@ -656,6 +687,18 @@ def seed_user_data(user_data: Dict[str, Any]):
 
 def main():
     """Main function to clear and seed the database"""
+    parser = argparse.ArgumentParser(description="Reset and seed the Firestore database")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Log every written and deleted document")
+    parser.add_argument("--metrics-file", default="seed_metrics.json", help="Where to write the JSON metrics summary")
+    parser.add_argument("--validate-types", nargs="+", metavar="DIR",
+                        help="Validate seed documents against the TypeScript interfaces below these directories")
+    args = parser.parse_args()
+    global validators
+    if args.validate_types:
+        validators = load_validators(args.validate_types)
+    progress.verbose = args.verbose
+    progress.metrics_file = args.metrics_file
+
     print("Starting database reset and seed process...")
     
     # Clear all collections except 'admins'
@@ -665,6 +708,7 @@ def main():
     for user_data in SAMPLE_USERS:
         seed_user_data(user_data)
     
+    progress.finish()
     print("Database reset and seed process completed successfully")
 
 if __name__ == "__main__":
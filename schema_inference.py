@@ -0,0 +1,114 @@
+"""
+Streaming schema inference over Firestore documents.
+
+``CollectionStats`` accumulates, for one collection, how many documents contain
+each field path (nested maps are walked as ``parent.child``), how many of those
+hold null, and a histogram of the value types given by ``infer_field_type``.
+Memory grows with the number of distinct field paths, not with the number of
+documents, so whole collections or exports can be streamed through it. Partial
+results, such as those of separate query partitions, are combined with ``merge``.
+"""
+
+from collections import Counter
+from datetime import datetime
+
+try:
+    from google.cloud.firestore_v1.document import DocumentReference
+except ImportError:  # Offline inference over exports runs without the Firestore client
+    DocumentReference = None
+
+
+# 🔹 Infer Firestore field types dynamically
+def infer_field_type(value):
+    if value is None:
+        return "null"
+    elif isinstance(value, bool):  # Before int, as bool is an int subclass
+        return "boolean"
+    elif isinstance(value, str):
+        return "string"
+    elif isinstance(value, int) or isinstance(value, float):
+        return "number"
+    elif isinstance(value, dict):
+        return "map"
+    elif isinstance(value, list):
+        return "array"
+    elif isinstance(value, datetime):  # Firestore returns DatetimeWithNanoseconds
+        return "timestamp"
+    elif hasattr(value, 'seconds') and hasattr(value, 'nanoseconds'):  # Firestore timestamp
+        return "timestamp"
+    elif DocumentReference is not None and isinstance(value, DocumentReference):
+        return "reference"
+    else:
+        return f"unknown ({type(value).__name__})"
+
+
+def dominant_type(types):
+    """The most frequent non-null type of a histogram; ties go to the alphabetically first."""
+    present = [(count, field_type) for field_type, count in types.items() if field_type != "null"]
+    if not present:
+        return "null"
+    return min(present, key=lambda item: (-item[0], item[1]))[1]
+
+
+class CollectionStats:
+    """Field presence, null and type counts of the documents seen in one collection."""
+
+    def __init__(self):
+        self.documents = 0
+        # field path -> [documents containing it, null values, Counter of types]
+        self.fields = {}
+
+    def add(self, data):
+        self.documents += 1
+        self._add_fields(data, "")
+
+    def _add_fields(self, data, prefix):
+        for field, value in data.items():
+            field_path = f"{prefix}{field}"
+            field_type = infer_field_type(value)
+            stats = self.fields.get(field_path)
+            if stats is None:
+                stats = self.fields[field_path] = [0, 0, Counter()]
+            stats[0] += 1
+            if value is None:
+                stats[1] += 1
+            stats[2][field_type] += 1
+
+            # Process nested maps recursively
+            if isinstance(value, dict):
+                self._add_fields(value, f"{field_path}.")
+
+    def merge(self, other):
+        self.documents += other.documents
+        for field_path, (present, nulls, types) in other.fields.items():
+            stats = self.fields.setdefault(field_path, [0, 0, Counter()])
+            stats[0] += present
+            stats[1] += nulls
+            stats[2].update(types)
+        return self
+
+    def types(self):
+        """``{field_path: dominant type}``, the shape the schema comparison works on."""
+        return {field_path: dominant_type(types) for field_path, (_, _, types) in self.fields.items()}
+
+    def summary(self):
+        """JSON-serialisable statistics, with presence and null rates as fractions."""
+        fields = {}
+        for field_path, (present, nulls, types) in sorted(self.fields.items()):
+            fields[field_path] = {
+                "type": dominant_type(types),
+                "types": dict(types.most_common()),
+                "present": present,
+                "presence": round(present / self.documents, 4) if self.documents else 0.0,
+                "null_rate": round(nulls / present, 4) if present else 0.0,
+            }
+        return {"documents": self.documents, "fields": fields}
+
+    @classmethod
+    def from_summary(cls, summary):
+        stats = cls()
+        stats.documents = summary["documents"]
+        for field_path, field in summary["fields"].items():
+            types = Counter(field["types"])
+            stats.fields[field_path] = [field["present"], types.get("null", 0), types]
+        return stats
@@ -0,0 +1,145 @@
+"""
+Shared loader for ``firestore_schema.json``.
+
+The schema file comes in two shapes: the flat ``[{table_name, column_name,
+data_type, ...}]`` list written by ``convert_to_firestore.py`` (and by
+information_schema exports), and the older ``{table: {"collection_name",
+"fields": [...]}}`` mapping, which has no types. ``load_compiled_schema``
+normalises either into a ``CompiledSchema``.
+
+The compiled schema is cached in a pickle sidecar next to the file
+(``firestore_schema.json.cache``) together with the SHA-256 of the file's bytes.
+Later loads only hash the file and unpickle the sidecar; editing the file changes
+its hash, and the schema is compiled again.
+"""
+
+import os
+import json
+import pickle
+import hashlib
+
+from import_order import reference_columns
+
+# Bump when the compiled layout changes, so old sidecars are ignored
+SCHEMA_CACHE_VERSION = 1
+SCHEMA_CACHE_SUFFIX = ".cache"
+
+
+class CompiledSchema:
+    """Per-table columns, types and keys of the schema file.
+
+    ``columns`` maps tables to ``{column: data_type}`` in file order (types are
+    None in the untyped shape), ``fields`` to frozensets of column names,
+    ``element_types`` to the element types of array columns, ``primary_keys`` to
+    tuples of column names and ``references`` to ``{column: referenced_table}``.
+    References are the schema's declared foreign keys; a schema declaring none
+    falls back to the ``*_id`` naming rules of ``import_order``.
+    """
+
+    def __init__(self, columns, element_types, primary_keys, references, source_hash):
+        self.columns = columns
+        self.element_types = element_types
+        self.primary_keys = primary_keys
+        self.references = references
+        self.source_hash = source_hash
+        self.fields = {table_name: frozenset(table_columns) for table_name, table_columns in columns.items()}
+
+    def __contains__(self, table_name):
+        return table_name in self.columns
+
+    def tables(self):
+        return list(self.columns)
+
+    def has_field(self, table_name, field):
+        return field in self.fields.get(table_name, ())
+
+    def _state(self):
+        return {"columns": self.columns, "element_types": self.element_types, "primary_keys": self.primary_keys,
+                "references": self.references, "source_hash": self.source_hash}
+
+
+def compile_schema(firestore_schema, source_hash=None):
+    """Normalise a parsed schema file of either shape into a ``CompiledSchema``."""
+    columns = {}
+    element_types = {}
+    primary_keys = {}
+    declared = {}
+
+    if isinstance(firestore_schema, list):
+        for entry in firestore_schema:
+            if not isinstance(entry, dict) or "table_name" not in entry or "column_name" not in entry:
+                raise ValueError(f"Schema entry without table_name/column_name: {entry!r}")
+            table_name, column_name = entry["table_name"], entry["column_name"]
+            columns.setdefault(table_name, {})[column_name] = entry.get("data_type")
+            if entry.get("element_type"):
+                element_types.setdefault(table_name, {})[column_name] = entry["element_type"]
+            if entry.get("primary_key"):
+                primary_keys[table_name] = primary_keys.get(table_name, ()) + (column_name,)
+            if entry.get("references"):
+                declared.setdefault(table_name, {})[column_name] = entry["references"]["table"]
+    elif isinstance(firestore_schema, dict):
+        for table_name, definition in firestore_schema.items():
+            if not isinstance(definition, dict) or not isinstance(definition.get("fields"), list):
+                raise ValueError(f"Schema table '{table_name}' has no fields list")
+            columns[table_name] = {field: None for field in definition["fields"]}
+    else:
+        raise ValueError("Schema must be a list of column entries or a mapping of tables")
+
+    if declared:
+        # Foreign keys into tables outside the schema (such as auth.users) are not followed
+        references = {table_name: {column_name: referenced
+                                   for column_name, referenced in declared.get(table_name, {}).items()
+                                   if referenced in columns and referenced != table_name}
+                      for table_name in columns}
+    else:
+        references = reference_columns(columns)
+
+    return CompiledSchema(columns, element_types, primary_keys, references, source_hash)
+
+
+def _read_cache(cache_path, source_hash):
+    try:
+        with open(cache_path, "rb") as cache_file:
+            cached = pickle.load(cache_file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(cached, dict) or cached.get("version") != SCHEMA_CACHE_VERSION:
+        return None
+    state = cached.get("schema")
+    if not isinstance(state, dict) or state.get("source_hash") != source_hash:
+        return None
+    return CompiledSchema(**state)
+
+
+def _write_cache(cache_path, schema):
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "wb") as cache_file:
+            pickle.dump({"version": SCHEMA_CACHE_VERSION, "schema": schema._state()}, cache_file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, cache_path)
+    except OSError:
+        # A read-only checkout still works, it just compiles the schema every time
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def load_compiled_schema(schema_file_path, cache=True):
+    """Load and compile the schema file, reusing its sidecar while the file is unchanged.
+
+    Raises OSError when the file cannot be read and ValueError when it is not a schema.
+    """
+    with open(schema_file_path, "rb") as schema_file:
+        content = schema_file.read()
+    source_hash = hashlib.sha256(content).hexdigest()
+
+    cache_path = schema_file_path + SCHEMA_CACHE_SUFFIX
+    if cache:
+        schema = _read_cache(cache_path, source_hash)
+        if schema is not None:
+            return schema
+
+    schema = compile_schema(json.loads(content), source_hash)
+    if cache:
+        _write_cache(cache_path, schema)
+    return schema
@@ -0,0 +1,279 @@
+"""
+Streaming reader for Supabase exports.
+
+The export is a JSON array holding a single ``{"jsonb_pretty": "..."}`` row whose
+string value is itself the JSON document ``{table_name: [records] | null, ...}``.
+Loading it with ``json.load`` followed by ``json.loads`` keeps both copies of the
+database in memory at once. This reader decodes the wrapper string in fixed-size
+chunks and parses the inner document incrementally, so at most one chunk plus one
+record is held in memory and records are available before the file is fully read.
+
+A plain ``{table_name: [records]}`` document without the wrapper is read the same way.
+"""
+
+import json
+import re
+from collections.abc import Iterator
+
+READ_CHUNK_SIZE = 1 << 16  # 64 KiB
+
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[,}\]\s]')
+_WHITESPACE = " \t\r\n"
+
+# Tolerates raw control characters inside strings, as json.load(strict=False) does
+_decoder = json.JSONDecoder(strict=False)
+
+
+class _TextStream:
+    """Cursor over a stream of text chunks that only buffers what it has not consumed."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self):
+        """Append the next chunk, dropping consumed text. Returns the shift applied to indices."""
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return None
+        shift = self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return shift
+
+    def _fill_or_fail(self):
+        shift = self._fill()
+        if shift is None:
+            raise ValueError("Unexpected end of Supabase export")
+        return shift
+
+    def peek(self):
+        self.skip_ws()
+        if self.pos >= len(self.buf) and self._fill() is None:
+            return ""
+        return self.buf[self.pos]
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed Supabase export: expected '{char}', found '{found or 'end of file'}'")
+        self.pos += 1
+
+    def skip_ws(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self._fill() is None:
+                return
+
+    def read_value(self):
+        """Return the raw JSON text of the next value without decoding it."""
+        first = self.peek()
+        if not first:
+            raise ValueError("Unexpected end of Supabase export")
+
+        if first not in '{["':
+            return self._read_scalar()
+
+        depth = 0
+        in_string = False
+        i = self.pos
+        while True:
+            if in_string:
+                match = _STRING_SPECIAL.search(self.buf, i)
+                if match is None or (match.group() == "\\" and match.end() >= len(self.buf)):
+                    # Need more text; a trailing backslash is rescanned together with what it escapes
+                    i = len(self.buf) if match is None else match.start()
+                    i -= self._fill_or_fail()
+                    continue
+                if match.group() == "\\":
+                    i = match.end() + 1
+                    continue
+                in_string = False
+                i = match.end()
+                if depth == 0:
+                    break
+            else:
+                match = _STRUCTURAL.search(self.buf, i)
+                if match is None:
+                    i = len(self.buf)
+                    i -= self._fill_or_fail()
+                    continue
+                i = match.end()
+                char = match.group()
+                if char == '"':
+                    in_string = True
+                elif char in "{[":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        break
+
+        text = self.buf[self.pos:i]
+        self.pos = i
+        return text
+
+    def _read_scalar(self):
+        while True:
+            match = _SCALAR_END.search(self.buf, self.pos)
+            if match is not None:
+                text = self.buf[self.pos:match.start()]
+                self.pos = match.start()
+                return text
+            if self._fill() is None:
+                text = self.buf[self.pos:]
+                self.pos = len(self.buf)
+                return text
+
+    def iter_string_content(self):
+        """Yield the decoded content of the JSON string at the cursor, chunk by chunk."""
+        self.expect('"')
+        i = self.pos
+        while True:
+            match = _STRING_SPECIAL.search(self.buf, i)
+            if match is None:
+                yield from self._decode_segment(len(self.buf))
+                if self._fill() is None:
+                    raise ValueError("Unexpected end of Supabase export inside jsonb_pretty")
+                i = self.pos
+                continue
+
+            if match.group() == '"':
+                yield from self._decode_segment(match.start())
+                self.pos = match.end()
+                return
+
+            escape_end = self._escape_end(match.start())
+            if escape_end is None:
+                # Incomplete escape sequence: emit what precedes it and wait for more text
+                yield from self._decode_segment(match.start())
+                if self._fill() is None:
+                    raise ValueError("Unexpected end of Supabase export inside jsonb_pretty")
+                i = self.pos
+                continue
+            i = escape_end
+
+    def _escape_end(self, start):
+        """End index of the escape sequence at ``start``, or None if it is cut off by the chunk."""
+        buf = self.buf
+        if start + 1 >= len(buf):
+            return None
+        if buf[start + 1] != "u":
+            return start + 2
+        if start + 6 > len(buf):
+            return None
+        # Keep surrogate pairs together so they decode into a single character
+        if 0xD800 <= int(buf[start + 2:start + 6], 16) <= 0xDBFF:
+            tail = buf[start + 6:start + 8]
+            if len(tail) < 2 and "\\u".startswith(tail):
+                return None  # Cannot tell yet whether a low surrogate follows
+            if tail == "\\u":
+                return start + 12 if start + 12 <= len(buf) else None
+        return start + 6
+
+    def _decode_segment(self, end):
+        if end > self.pos:
+            yield _decoder.decode('"' + self.buf[self.pos:end] + '"')
+            self.pos = end
+
+
+def _read_file_chunks(export_file_path, chunk_size, on_read=None):
+    position = 0
+    with open(export_file_path, "r", encoding="utf-8") as export_file:
+        while True:
+            chunk = export_file.read(chunk_size)
+            if on_read:
+                # Progress is measured against the size on disk, so count bytes, not decoded characters
+                consumed = export_file.buffer.tell()
+                if consumed > position:
+                    on_read(consumed - position)
+                    position = consumed
+            if not chunk:
+                return
+            yield chunk
+
+
+def _iter_document_text(export_file_path, chunk_size, on_read=None):
+    """Yield the text of the inner ``{table_name: records}`` document."""
+    outer = _TextStream(_read_file_chunks(export_file_path, chunk_size, on_read))
+
+    if outer.peek() == "{":
+        # Plain document without the jsonb_pretty wrapper
+        yield outer.buf[outer.pos:]
+        yield from outer._chunks
+        return
+
+    outer.expect("[")
+    outer.expect("{")
+    while True:
+        key = json.loads(outer.read_value())
+        outer.expect(":")
+        if key == "jsonb_pretty":
+            yield from outer.iter_string_content()
+            return
+        outer.read_value()
+        if outer.peek() != ",":
+            raise ValueError("Supabase export has no 'jsonb_pretty' field")
+        outer.expect(",")
+
+
+def iter_export_collections(export_file_path, chunk_size=READ_CHUNK_SIZE, on_read=None):
+    """Yield ``(collection_name, records)`` for each table in the export.
+
+    ``records`` is a lazy iterator over the table's records when the table holds a
+    JSON array, otherwise the decoded value itself (``None`` for empty tables). A
+    records iterator must be consumed before advancing to the next collection;
+    anything left unconsumed is skipped. ``on_read`` is called with the number of
+    bytes read from the file after every chunk, for progress reporting.
+    """
+    stream = _TextStream(_iter_document_text(export_file_path, chunk_size, on_read))
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+
+    while True:
+        collection_name = json.loads(stream.read_value())
+        stream.expect(":")
+
+        if stream.peek() == "[":
+            stream.expect("[")
+            records = _iter_array(stream)
+            yield collection_name, records
+            for _ in records:
+                pass  # Skip whatever the consumer left unread
+        else:
+            yield collection_name, _decoder.decode(stream.read_value())
+
+        if stream.peek() == ",":
+            stream.expect(",")
+            continue
+        stream.expect("}")
+        return
+
+
+def _iter_array(stream):
+    if stream.peek() == "]":
+        stream.expect("]")
+        return
+    while True:
+        yield _decoder.decode(stream.read_value())
+        if stream.peek() == ",":
+            stream.expect(",")
+            continue
+        stream.expect("]")
+        return
+
+
+def iter_export_records(export_file_path, chunk_size=READ_CHUNK_SIZE, on_read=None):
+    """Yield ``(collection_name, record)`` pairs from the export in file order."""
+    for collection_name, records in iter_export_collections(export_file_path, chunk_size, on_read):
+        if isinstance(records, dict):
+            records = records.values()
+        elif not isinstance(records, Iterator):
+            continue  # Empty (null) or malformed table
+        for record in records:
+            yield collection_name, record
@@ -0,0 +1,32 @@
+from typescript_schema import (TypeScriptParseCache, iter_typescript_files, merge_declarations,
+                               parse_typescript_files, resolve_schemas)
+
+COMPONENT = """
+import React from 'react';
+
+interface WorkerCardProps {
+  name: string;
+  hourlyRate?: number;
+  onSelect: (id: string) => void;
+}
+
+export function WorkerCard({ name, onSelect }: WorkerCardProps) {
+  return <div className="card" onClick={() => onSelect(name)}>{name} {'{'}</div>;
+}
+"""
+
+
+def test_interfaces_in_tsx_components_are_resolved(tmp_path):
+    (tmp_path / "types.ts").write_text("export interface Worker { id: string; }\n", encoding="utf-8")
+    (tmp_path / "WorkerCard.tsx").write_text(COMPONENT, encoding="utf-8")
+
+    file_paths = list(iter_typescript_files(str(tmp_path)))
+    assert sorted(path.rsplit("/", 1)[-1] for path in file_paths) == ["WorkerCard.tsx", "types.ts"]
+
+    results, errors = parse_typescript_files(file_paths, TypeScriptParseCache(None))
+    assert errors == []
+    declarations, _ = merge_declarations(results)
+    schemas = resolve_schemas(declarations)
+
+    assert schemas["Worker"] == {"id": "string"}
+    assert schemas["WorkerCardProps"] == {"name": "string", "hourlyRate": "number", "onSelect": "unknown"}
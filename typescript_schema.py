@@ -0,0 +1,789 @@
+"""
+Single-pass extraction of TypeScript interfaces for the schema checker.
+
+Each file is tokenized once (comments, string, template and regex literals are
+recognised, so braces inside them do not count) and the token stream is parsed
+with a small recursive-descent type parser. ``interface`` declarations and
+object ``type`` aliases become ``{field: type}`` maps. Nested object types
+become ``map`` fields instead of leaking their members into the enclosing
+interface. ``extends`` clauses, intersections and the ``Partial``, ``Required``,
+``Readonly``, ``Pick`` and ``Omit`` utilities are resolved once all files have
+been parsed, because the base interface may live in another file.
+
+Field types use the names ``infer_field_type`` gives Firestore values
+(``string``, ``number``, ``boolean``, ``array``, ``map``, ``timestamp``,
+``reference``, ``unknown``). ``null`` and ``undefined`` are dropped from unions.
+A union of several kinds is written as ``"number|string"``. Optional members
+(``name?: T``) and the members of ``Partial<T>`` carry ``null`` among their kinds,
+which is how ``required_fields`` tells them from required ones.
+
+``parse_typescript`` returns a JSON-serialisable per-file result, so
+``TypeScriptParseCache`` can keep it keyed by modification time and content hash
+and unchanged files are not parsed again.
+"""
+
+import os
+import re
+import json
+import hashlib
+
+# Bump when parse results change shape or meaning, so old caches are discarded
+PARSER_VERSION = 2
+
+# Components (.tsx) declare prop and state interfaces next to their JSX
+TYPESCRIPT_EXTENSIONS = (".ts", ".tsx")
+
+NAME = "name"
+STRING = "string"
+NUMBER = "number"
+TEMPLATE = "template"
+PUNCTUATION = "punctuation"
+
+_TOKEN = re.compile(r"""
+    (?P<space>[ \t\r\f\v]+)
+  | (?P<newline>\n)
+  | (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*.*?(?:\*/|\Z))
+  | (?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+  | (?P<template>`(?:[^`\\]|\\.)*`)
+  | (?P<number>(?:0[xXbBoO])?[0-9][0-9_]*(?:\.[0-9_]*)?(?:[eE][+-]?[0-9]+)?n?|\.[0-9]+)
+  | (?P<name>[A-Za-z_$][A-Za-z0-9_$]*)
+  | (?P<punctuation>=>|\.\.\.|\?\.|.)
+""", re.VERBOSE | re.DOTALL)
+
+_REGEX_LITERAL = re.compile(r"/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+
+# After these a ``/`` starts a regular expression literal rather than a division
+_REGEX_PRECEDING_WORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw",
+                          "instanceof", "yield", "await"}
+
+_BRACKETS = {"(": ")", "[": "]", "{": "}"}
+
+_BUILTIN_KINDS = {
+    "string": "string", "String": "string",
+    "number": "number", "Number": "number", "bigint": "number", "BigInt": "number",
+    "boolean": "boolean", "Boolean": "boolean",
+    "Date": "timestamp", "Timestamp": "timestamp",
+    "DocumentReference": "reference",
+    "object": "map", "Object": "map", "Record": "map", "Map": "map", "WeakMap": "map",
+    "Array": "array", "ReadonlyArray": "array", "Set": "array", "ReadonlySet": "array",
+    "any": "unknown", "unknown": "unknown", "symbol": "unknown", "Function": "unknown",
+    "true": "boolean", "false": "boolean",
+    "null": "null", "undefined": "null", "void": "null", "never": "null",
+}
+_SHAPE_UTILITIES = {"Partial", "Required", "Readonly"}
+_PASS_THROUGH = {"Promise", "NonNullable", "Awaited"}
+
+
+def tokenize(source):
+    """Return ``(kind, text, newline_before)`` tokens for a TypeScript source string."""
+    tokens = []
+    position = 0
+    newline = True
+    length = len(source)
+    while position < length:
+        if source[position] == "/" and _regex_allowed(tokens):
+            match = _REGEX_LITERAL.match(source, position)
+            if match:
+                tokens.append((STRING, match.group(), newline))
+                newline = False
+                position = match.end()
+                continue
+
+        match = _TOKEN.match(source, position)
+        kind = match.lastgroup
+        position = match.end()
+        if kind == "newline" or (kind == "block_comment" and "\n" in match.group()):
+            newline = True
+        elif kind in ("space", "line_comment", "block_comment"):
+            continue
+        else:
+            tokens.append((kind, match.group(), newline))
+            newline = False
+    return tokens
+
+
+def _regex_allowed(tokens):
+    if not tokens:
+        return True
+    kind, text, _ = tokens[-1]
+    if kind == PUNCTUATION:
+        return text not in (")", "]", "}")
+    return kind == NAME and text in _REGEX_PRECEDING_WORDS
+
+
+class _Type:
+    """Result of parsing a type: its kinds, and its members when it is object-like.
+
+    ``shape`` is ``{"fields": {...}, "extends": [...]}`` for object literals,
+    references and intersections of them; ``keys`` lists the values of a union of
+    string literals (the second argument of ``Pick`` and ``Omit``).
+    """
+
+    __slots__ = ("kinds", "shape", "keys")
+
+    def __init__(self, kinds, shape=None, keys=None):
+        self.kinds = kinds
+        self.shape = shape
+        self.keys = keys
+
+
+_UNKNOWN = ("unknown",)
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+        self.type_parameters = set()
+        self.declarations = {}
+        # Index of the matching bracket for every opening bracket, found in one pass
+        self.partner = {}
+        stack = []
+        for index, (kind, text, _) in enumerate(tokens):
+            if kind != PUNCTUATION:
+                continue
+            if text in _BRACKETS:
+                stack.append(index)
+            elif text in (")", "]", "}"):
+                while stack and _BRACKETS[tokens[stack[-1]][1]] != text:
+                    stack.pop()  # Unbalanced brackets in broken code
+                if stack:
+                    self.partner[stack.pop()] = index
+
+    # Token helpers
+
+    def peek(self, offset=0):
+        index = self.index + offset
+        if index < len(self.tokens):
+            return self.tokens[index]
+        return (None, None, True)
+
+    def at(self, text, offset=0):
+        kind, token_text, _ = self.peek(offset)
+        return token_text == text and kind in (PUNCTUATION, NAME)
+
+    def skip_group(self):
+        """Skip the bracketed group starting at the current token."""
+        self.index = self.partner.get(self.index, len(self.tokens) - 1) + 1
+
+    def skip_angles(self):
+        """Skip a ``<...>`` type parameter list, returning the declared parameter names."""
+        names = []
+        depth = 0
+        expect_name = True
+        while self.index < len(self.tokens):
+            kind, text, _ = self.peek()
+            if kind == PUNCTUATION and text in _BRACKETS:
+                self.skip_group()
+                expect_name = False
+                continue
+            self.index += 1
+            if kind != PUNCTUATION:
+                if expect_name and depth == 1 and kind == NAME:
+                    names.append(text)
+                expect_name = False
+            elif text == "<":
+                depth += 1
+                expect_name = depth == 1
+            elif text == ">":
+                depth -= 1
+                if depth == 0:
+                    break
+            elif text == "," and depth == 1:
+                expect_name = True
+        return names
+
+    # Declarations
+
+    def parse(self):
+        while self.index < len(self.tokens):
+            kind, text, _ = self.peek()
+            previous = self.tokens[self.index - 1] if self.index else (None, None, True)
+            declaration_start = previous[1] != "." and previous[1] != "?."
+            if kind == NAME and declaration_start and self.peek(1)[0] == NAME:
+                if text == "interface":
+                    self.parse_interface()
+                    continue
+                if text == "type" and self.statement_start(previous):
+                    self.parse_alias()
+                    continue
+                if text == "enum":
+                    self.parse_enum()
+                    continue
+            self.index += 1
+        return self.declarations
+
+    def statement_start(self, previous):
+        newline = self.tokens[self.index][2]
+        return previous[0] is None or newline or previous[1] in (";", "{", "}", "export", "declare")
+
+    def parse_interface(self):
+        self.index += 1
+        name = self.peek()[1]
+        self.index += 1
+        parameters = self.skip_angles() if self.at("<") else []
+        self.type_parameters = set(parameters)
+
+        extends = []
+        if self.at("extends"):
+            self.index += 1
+            while self.index < len(self.tokens) and not self.at("{"):
+                if self.at(","):
+                    self.index += 1
+                    continue
+                start = self.index
+                base = self.parse_postfix()
+                if base.shape:
+                    extends.extend(base.shape["extends"])
+                if self.index == start:
+                    self.index += 1
+        if not self.at("{"):
+            return
+        fields = self.parse_members()
+        self.declarations[name] = {"kind": "interface", "fields": fields, "extends": extends}
+        self.type_parameters = set()
+
+    def parse_alias(self):
+        self.index += 1
+        name = self.peek()[1]
+        self.index += 1
+        parameters = self.skip_angles() if self.at("<") else []
+        if not self.at("="):
+            return
+        self.index += 1
+        self.type_parameters = set(parameters)
+        parsed = self.parse_type()
+        self.type_parameters = set()
+        declaration = {"kind": "alias", "kinds": list(parsed.kinds)}
+        if parsed.shape is not None:
+            declaration.update(fields=parsed.shape["fields"], extends=parsed.shape["extends"])
+        self.declarations[name] = declaration
+
+    def parse_enum(self):
+        self.index += 1
+        name = self.peek()[1]
+        self.index += 1
+        if not self.at("{"):
+            return
+        end = self.partner.get(self.index, len(self.tokens) - 1)
+        kinds = []
+        member = []
+        for token in self.tokens[self.index + 1:end] + [(PUNCTUATION, ",", False)]:
+            if token[:2] != (PUNCTUATION, ","):
+                member.append(token)
+                continue
+            if member:
+                # Members without an initializer are numbered
+                initializer = [kind for kind, text, _ in member[1:] if text != "="]
+                value_kind = "string" if initializer and initializer[0] in (STRING, TEMPLATE) else "number"
+                kinds = _merge_kinds(kinds, [value_kind])
+            member = []
+        self.index = end + 1
+        self.declarations[name] = {"kind": "alias", "kinds": kinds or ["number"]}
+
+    # Object members
+
+    def parse_members(self):
+        """Parse ``{ ... }`` members at the current ``{``, returning ``{field: kinds}``."""
+        end = self.partner.get(self.index, len(self.tokens) - 1)
+        self.index += 1
+        fields = {}
+        while self.index < end:
+            kind, text, _ = self.peek()
+            if kind == PUNCTUATION and text in (";", ","):
+                self.index += 1
+                continue
+            start = self.index
+            self.parse_member(fields, end)
+            if self.index == start:
+                self.index += 1
+            self.skip_to_member_end(start, end)
+        self.index = end + 1
+        return fields
+
+    def parse_member(self, fields, end):
+        # Modifiers such as ``readonly name: T``, but not a field called ``readonly``
+        while (self.peek()[1] in ("readonly", "public", "private", "protected", "static", "declare")
+               and self.peek(1)[0] in (NAME, STRING, NUMBER)):
+            self.index += 1
+
+        kind, text, _ = self.peek()
+        if kind == PUNCTUATION and text in ("[", "(", "<"):
+            return  # Index signature, mapped type or call signature
+        if kind == NAME and (text == "new" and self.at("(", 1) or text in ("get", "set") and self.peek(1)[0] == NAME):
+            return  # Construct signature or accessor
+
+        if kind == STRING:
+            field = text[1:-1]
+        elif kind in (NAME, NUMBER):
+            field = text
+        else:
+            return
+        self.index += 1
+        optional = self.at("?")
+        if self.at("?") or self.at("!"):
+            self.index += 1
+        if self.at(":"):
+            self.index += 1
+            kinds = list(self.parse_type().kinds)
+            fields[field] = _merge_kinds(kinds, ["null"]) if optional else kinds
+        # Otherwise a method signature, skipped along with its parameters
+
+    def skip_to_member_end(self, start, end):
+        while self.index < end:
+            kind, text, newline = self.peek()
+            if kind == PUNCTUATION and text in (";", ","):
+                return
+            if newline and self.index > start and kind in (NAME, STRING):
+                return  # Members may be separated by line breaks alone
+            if kind == PUNCTUATION and text in _BRACKETS:
+                self.skip_group()
+            else:
+                self.index += 1
+
+    # Types
+
+    def parse_type(self):
+        if self.at("|") or self.at("&"):
+            self.index += 1
+        parsed = self.parse_union()
+        if self.at("extends") and not self.peek()[2]:
+            # Conditional type: either branch may apply
+            self.index += 1
+            self.parse_union()
+            if self.at("?"):
+                self.index += 1
+                when_true = self.parse_type()
+                if self.at(":"):
+                    self.index += 1
+                    when_false = self.parse_type()
+                    return _Type(_merge_kinds(when_true.kinds, when_false.kinds))
+                return when_true
+        return parsed
+
+    def parse_union(self):
+        members = [self.parse_intersection()]
+        while self.at("|"):
+            self.index += 1
+            members.append(self.parse_intersection())
+        if len(members) == 1:
+            return members[0]
+
+        kinds = []
+        for member in members:
+            kinds = _merge_kinds(kinds, member.kinds)
+        keys = None
+        if all(member.keys is not None for member in members):
+            keys = [key for member in members for key in member.keys]
+        # ``X | null`` keeps the members of X
+        shaped = [member for member in members if member.kinds != ["null"]]
+        shape = shaped[0].shape if len(shaped) == 1 else None
+        return _Type(kinds, shape, keys)
+
+    def parse_intersection(self):
+        members = [self.parse_postfix()]
+        while self.at("&"):
+            self.index += 1
+            members.append(self.parse_postfix())
+        if len(members) == 1:
+            return members[0]
+        if all(member.shape is not None for member in members):
+            shape = {"fields": {}, "extends": []}
+            for member in members:
+                shape["fields"].update(member.shape["fields"])
+                shape["extends"].extend(member.shape["extends"])
+            return _Type(["map"], shape)
+        return next(member for member in members if member.shape is None)
+
+    def parse_postfix(self):
+        parsed = self.parse_primary()
+        while self.at("[") and not self.peek()[2]:
+            if self.at("]", 1):
+                self.index += 2
+                parsed = _Type(["array"])
+            else:
+                self.skip_group()  # Indexed access type
+                parsed = _Type(list(_UNKNOWN))
+        return parsed
+
+    def parse_primary(self):
+        kind, text, _ = self.peek()
+        if kind is None:
+            return _Type(list(_UNKNOWN))
+
+        if kind == STRING:
+            self.index += 1
+            return _Type(["string"], keys=[text[1:-1]])
+        if kind == TEMPLATE:
+            self.index += 1
+            return _Type(["string"])
+        if kind == NUMBER:
+            self.index += 1
+            return _Type(["number"])
+
+        if kind == PUNCTUATION:
+            if text == "-" and self.peek(1)[0] == NUMBER:
+                self.index += 2
+                return _Type(["number"])
+            if text == "{":
+                fields = self.parse_members()
+                return _Type(["map"], {"fields": fields, "extends": []})
+            if text == "[":
+                self.skip_group()  # Tuple
+                return _Type(["array"])
+            if text == "(":
+                close = self.partner.get(self.index, len(self.tokens) - 1)
+                if close + 1 < len(self.tokens) and self.tokens[close + 1][1] == "=>":
+                    return self.parse_function()
+                self.index += 1
+                parsed = self.parse_type()
+                self.index = close + 1
+                return parsed
+            if text == "<":
+                self.skip_angles()  # Generic function type
+                return self.parse_function()
+            self.index += 1
+            return _Type(list(_UNKNOWN))
+
+        # Names
+        if text in ("keyof",):
+            self.index += 1
+            self.parse_postfix()
+            return _Type(["string"])
+        if text in ("typeof", "infer", "unique", "asserts"):
+            self.index += 1
+            self.parse_postfix()
+            return _Type(list(_UNKNOWN))
+        if text == "readonly":
+            self.index += 1
+            return self.parse_postfix()
+        if text in ("new", "abstract") and (self.at("(", 1) or self.at("new", 1)):
+            self.index += 1
+            return self.parse_primary()
+        if text == "import" and self.at("(", 1):
+            self.index += 1
+            self.skip_group()
+
+        name = self.qualified_name()
+        arguments = []
+        if self.at("<") and not self.peek()[2]:
+            self.index += 1
+            while self.index < len(self.tokens) and not self.at(">"):
+                if self.at(","):
+                    self.index += 1
+                    continue
+                start = self.index
+                arguments.append(self.parse_type())
+                if self.index == start:
+                    self.index += 1
+            self.index += 1
+        return self.reference(name, arguments)
+
+    def qualified_name(self):
+        name = self.peek()[1] if self.peek()[0] == NAME else ""
+        if name:
+            self.index += 1
+        while self.at(".") and self.peek(1)[0] == NAME:
+            name = self.peek(1)[1]  # ``firestore.Timestamp`` is a Timestamp
+            self.index += 2
+        return name
+
+    def parse_function(self):
+        if self.at("("):
+            self.skip_group()
+        if self.at("=>"):
+            self.index += 1
+            self.parse_type()
+        return _Type(list(_UNKNOWN))
+
+    def reference(self, name, arguments):
+        if not name or name in self.type_parameters:
+            return _Type(list(_UNKNOWN))
+        if name == "Partial" and arguments and arguments[0].shape is not None:
+            shape = arguments[0].shape
+            return _Type(arguments[0].kinds, {
+                "fields": {field: _merge_kinds(kinds, ["null"]) for field, kinds in shape["fields"].items()},
+                "extends": [dict(entry, partial=True) for entry in shape["extends"]]})
+        if name in _SHAPE_UTILITIES and arguments:
+            return arguments[0]
+        if name in _PASS_THROUGH and arguments:
+            return _Type(arguments[0].kinds)
+        if name in ("Pick", "Omit") and len(arguments) == 2:
+            base = arguments[0].shape or {"fields": {}, "extends": []}
+            keys = arguments[1].keys or []
+            if name == "Pick":
+                fields = {field: kinds for field, kinds in base["fields"].items() if field in keys}
+                extends = [dict(entry, pick=[key for key in keys if entry["pick"] is None or key in entry["pick"]])
+                           for entry in base["extends"]]
+            else:
+                fields = {field: kinds for field, kinds in base["fields"].items() if field not in keys}
+                extends = [dict(entry, omit=sorted(set(entry["omit"]) | set(keys))) for entry in base["extends"]]
+            return _Type(["map"], {"fields": fields, "extends": extends})
+        if name in _BUILTIN_KINDS:
+            return _Type([_BUILTIN_KINDS[name]])
+        # Resolved once every file has been parsed: an interface is a map, an alias has its own kinds
+        return _Type(["@" + name], {"fields": {}, "extends": [{"name": name, "pick": None, "omit": []}]})
+
+
+def _merge_kinds(kinds, more):
+    merged = list(kinds)
+    for kind in more:
+        if kind not in merged:
+            merged.append(kind)
+    return merged
+
+
+def parse_typescript(source):
+    """Parse TypeScript source into ``{name: declaration}``.
+
+    Interfaces are ``{"kind": "interface", "fields", "extends"}``; type aliases and
+    enums are ``{"kind": "alias", "kinds"}``, plus ``fields`` and ``extends`` when
+    the alias is object-like. Field types are lists of kinds, where ``@Name``
+    stands for a reference to be resolved by ``resolve_schemas``.
+    """
+    return _Parser(tokenize(source)).parse()
+
+
+class _Resolver:
+    def __init__(self, declarations):
+        self.declarations = declarations
+        self.fields = {}
+        self.object_like = {}
+
+    def is_object(self, name, visiting=()):
+        if name in self.object_like:
+            return self.object_like[name]
+        declaration = self.declarations.get(name)
+        if declaration is None or name in visiting:
+            return False
+        result = declaration["kind"] == "interface" or (
+            "fields" in declaration
+            and all(self.is_object(entry["name"], visiting + (name,)) for entry in declaration["extends"]))
+        self.object_like[name] = result
+        return result
+
+    def kinds(self, kinds, visiting=()):
+        resolved = []
+        for kind in kinds:
+            if kind.startswith("@"):
+                name = kind[1:]
+                declaration = self.declarations.get(name)
+                if self.is_object(name):
+                    kind = ["map"]
+                elif declaration is not None and name not in visiting:
+                    kind = self.kinds(declaration["kinds"], visiting + (name,))
+                else:
+                    kind = ["unknown"]
+            else:
+                kind = [kind]
+            resolved = _merge_kinds(resolved, kind)
+        return resolved
+
+    def resolve_fields(self, name, visiting=()):
+        if name in self.fields:
+            return self.fields[name]
+        declaration = self.declarations[name]
+        fields = {}
+        for entry in declaration.get("extends", []):
+            base = entry["name"]
+            if base in visiting or not self.is_object(base):
+                continue
+            for field, kinds in self.resolve_fields(base, visiting + (name,)).items():
+                if (entry["pick"] is None or field in entry["pick"]) and field not in entry["omit"]:
+                    fields[field] = _merge_kinds(kinds, ["null"]) if entry.get("partial") else kinds
+        for field, kinds in declaration["fields"].items():
+            fields[field] = self.kinds(kinds)
+        if not visiting:
+            self.fields[name] = fields
+        return fields
+
+
+def field_type(kinds):
+    """Render resolved kinds as the schema checker's type string."""
+    present = [kind for kind in kinds if kind != "null"]
+    if not present:
+        return "null"
+    return "|".join(sorted(present)) if len(present) > 1 else present[0]
+
+
+def resolve_schemas(declarations):
+    """Turn merged declarations into ``{interface: {field: type}}`` for every object-like type."""
+    resolver = _Resolver(declarations)
+    schemas = {}
+    for name in declarations:
+        if resolver.is_object(name):
+            schemas[name] = {field: field_type(kinds) for field, kinds in resolver.resolve_fields(name).items()}
+    return schemas
+
+
+def required_fields(declarations):
+    """``{interface: [field, ...]}`` of the members every document must have.
+
+    Optional and nullable members are not required, nor are ``any``/``unknown`` ones.
+    """
+    resolver = _Resolver(declarations)
+    required = {}
+    for name in declarations:
+        if resolver.is_object(name):
+            required[name] = [field for field, kinds in resolver.resolve_fields(name).items()
+                              if "null" not in kinds and "unknown" not in kinds]
+    return required
+
+
+def iter_typescript_files(directory_path):
+    """Yield the ``.ts`` and ``.tsx`` files below a directory in a stable order, skipping node_modules."""
+    for root, dirs, files in os.walk(directory_path):
+        dirs[:] = sorted(d for d in dirs if d != "node_modules" and not d.startswith("."))
+        for filename in sorted(files):
+            if filename.endswith(TYPESCRIPT_EXTENSIONS):
+                yield os.path.join(root, filename)
+
+
+def parse_typescript_file(file_path, known_hash=None):
+    """Read and parse one file into a cache entry.
+
+    When the content still hashes to ``known_hash``, parsing is skipped and the
+    entry's ``declarations`` is None. Runs in worker processes as well.
+    """
+    stat = os.stat(file_path)
+    with open(file_path, "rb") as source_file:
+        content = source_file.read()
+    content_hash = hashlib.sha256(content).hexdigest()
+    declarations = None if content_hash == known_hash else parse_typescript(content.decode("utf-8"))
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": content_hash, "declarations": declarations}
+
+
+def parse_typescript_files(file_paths, cache, executor=None):
+    """Parse files through the cache, fanning cache misses out to ``executor`` when given.
+
+    Returns ``(results, errors)``: ``[(file_path, declarations)]`` in the order of
+    ``file_paths`` whatever order the workers finish in, and ``[(file_path, error)]``.
+    """
+    results = {}
+    errors = []
+    misses = []
+    for file_path in file_paths:
+        try:
+            declarations = cache.lookup(file_path)
+        except OSError as e:
+            errors.append((file_path, e))
+            continue
+        if declarations is None:
+            misses.append(file_path)
+        else:
+            results[file_path] = declarations
+
+    known_hashes = [cache.known_hash(file_path) for file_path in misses]
+    if executor is not None:
+        futures = [executor.submit(parse_typescript_file, file_path, known_hash)
+                   for file_path, known_hash in zip(misses, known_hashes)]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+    else:
+        outcomes = []
+        for file_path, known_hash in zip(misses, known_hashes):
+            try:
+                outcomes.append(parse_typescript_file(file_path, known_hash))
+            except Exception as e:
+                outcomes.append(e)
+
+    for file_path, outcome in zip(misses, outcomes):
+        if isinstance(outcome, Exception):
+            errors.append((file_path, outcome))
+        else:
+            results[file_path] = cache.store(file_path, outcome)
+
+    return [(file_path, results[file_path]) for file_path in file_paths if file_path in results], errors
+
+
+def merge_declarations(results):
+    """Merge per-file declarations in order; the first definition of a name wins.
+
+    Returns ``(declarations, duplicates)`` where ``duplicates`` maps every name
+    defined in more than one file to those files.
+    """
+    declarations = {}
+    defined_in = {}
+    for file_path, file_declarations in results:
+        for name, declaration in file_declarations.items():
+            defined_in.setdefault(name, []).append(file_path)
+            declarations.setdefault(name, declaration)
+    duplicates = {name: files for name, files in sorted(defined_in.items()) if len(files) > 1}
+    return declarations, duplicates
+
+
+class TypeScriptParseCache:
+    """Parse results per file, reused while a file's mtime and size, or else its hash, are unchanged."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.changed = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as cache_file:
+                    cached = json.load(cache_file)
+                if cached.get("version") == PARSER_VERSION:
+                    self.entries = cached.get("files", {})
+            except (OSError, ValueError, AttributeError):
+                self.entries = {}  # A damaged cache is rebuilt
+
+    def _fresh(self, file_path):
+        stat = os.stat(file_path)
+        entry = self.entries.get(file_path)
+        return entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+
+    def count_stale(self, file_paths):
+        """Number of files that would have to be read again, for sizing a process pool."""
+        return sum(1 for file_path in file_paths if os.path.exists(file_path) and not self._fresh(file_path))
+
+    def lookup(self, file_path):
+        """Return the cached declarations of a file whose mtime and size are unchanged, else None."""
+        if self._fresh(file_path):
+            self.hits += 1
+            return self.entries[file_path]["declarations"]
+        return None
+
+    def known_hash(self, file_path):
+        entry = self.entries.get(file_path)
+        return entry["sha256"] if entry else None
+
+    def store(self, file_path, entry):
+        """Record a ``parse_typescript_file`` entry, returning the file's declarations."""
+        if entry["declarations"] is None:
+            # Touched but not edited
+            self.hits += 1
+            entry["declarations"] = self.entries[file_path]["declarations"]
+        else:
+            self.misses += 1
+        self.entries[file_path] = entry
+        self.changed = True
+        return entry["declarations"]
+
+    def parse_file(self, file_path):
+        """Return the declarations of a file, parsing it only when it changed."""
+        declarations = self.lookup(file_path)
+        if declarations is None:
+            declarations = self.store(file_path, parse_typescript_file(file_path, self.known_hash(file_path)))
+        return declarations
+
+    def forget_deleted(self):
+        """Drop the entries of files that no longer exist."""
+        for stale in [file_path for file_path in self.entries if not os.path.exists(file_path)]:
+            del self.entries[stale]
+            self.changed = True
+
+    def save(self):
+        if not self.path or not self.changed:
+            return
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as cache_file:
+            json.dump({"version": PARSER_VERSION, "files": self.entries}, cache_file)
+        os.replace(temporary_path, self.path)
@@ -0,0 +1,232 @@
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from collections.abc import Iterator
+from google.cloud.firestore_v1 import FieldFilter
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from document_hashes import DocumentMerkleTree, document_hash
+from export_shards import iter_shard_collections
+from import_data_to_firestore import compile_projectors, initialize_firestore, load_schema
+from supabase_export_reader import iter_export_collections
+
+# Configurations
+SERVICE_ACCOUNT_FILE = "serviceAccountKey.json"
+SCHEMA_FILE_PATH = "firestore_schema.json"
+EXPORT_FILE_PATH = "supabase_export.json"
+REPORT_FILE_PATH = "verification_report.json"
+
+# 🔹 Configure command line arguments
+parser = argparse.ArgumentParser(
+    description="Verify a Firestore import against its Supabase export by comparing per-collection Merkle trees "
+                "of the document hashes")
+parser.add_argument("collections", nargs="*", help="Collections to verify (default: every collection in the export)")
+parser.add_argument("--service-account", default=SERVICE_ACCOUNT_FILE, help="Path to Firebase service account key")
+parser.add_argument("--schema", default=SCHEMA_FILE_PATH, help="Path to the Firestore schema file")
+parser.add_argument("--export", default=EXPORT_FILE_PATH,
+                    help="Path to the Supabase export file, or to a directory of per-table NDJSON/CSV shards")
+parser.add_argument("--leaf-bits", type=int, default=12, help="Merkle tree leaves per collection, as a power of two")
+parser.add_argument("--page-size", type=int, default=1000, help="Documents read per Firestore query page")
+parser.add_argument("--workers", type=int, default=8, help="Collections read from Firestore concurrently")
+parser.add_argument("--sample", type=int, default=5, help="Document IDs printed per kind of difference")
+parser.add_argument("--report", default=REPORT_FILE_PATH, help="Where to write the JSON verification report")
+
+
+# Yield (collection_name, records) from an export file or a shard directory
+def iter_source_collections(export_path):
+    source = iter_shard_collections(export_path) if os.path.isdir(export_path) else iter_export_collections(export_path)
+    for collection_name, records in source:
+        if isinstance(records, dict):
+            records = records.values()
+        elif not isinstance(records, (list, Iterator)):
+            continue
+        yield collection_name, records
+
+
+# Yield (doc_id, hash) for the export's records, projected the same way the importer writes them
+def iter_source_hashes(records, project):
+    for record in records:
+        if not isinstance(record, dict) or not record.get("id"):
+            continue
+        try:
+            yield str(record["id"]), document_hash(project(record))
+        except ValueError:
+            yield str(record["id"]), None  # Not importable, so it can never match
+
+
+def iter_firestore_hashes(db, collection_name, page_size, low=None, high=None):
+    collection_ref = db.collection(collection_name)
+    query = collection_ref.order_by(FieldPath.document_id())
+    if low is not None:
+        query = query.where(filter=FieldFilter(FieldPath.document_id(), ">=", collection_ref.document(low)))
+    if high is not None:
+        query = query.where(filter=FieldFilter(FieldPath.document_id(), "<", collection_ref.document(high)))
+    last_snapshot = None
+    while True:
+        page = query.limit(page_size)
+        if last_snapshot is not None:
+            page = page.start_after(last_snapshot)
+        page_count = 0
+        for snapshot in page.stream():
+            page_count += 1
+            last_snapshot = snapshot
+            yield snapshot.id, document_hash(snapshot.to_dict())
+        if page_count < page_size:
+            return
+
+
+def build_source_trees(args, projectors, collection_names):
+    trees = {}
+    for collection_name, records in iter_source_collections(args.export):
+        if collection_name not in collection_names:
+            continue
+        tree = trees.setdefault(collection_name, DocumentMerkleTree(args.leaf_bits))
+        for doc_id, doc_hash in iter_source_hashes(records, projectors[collection_name]):
+            tree.add(doc_id, doc_hash)
+    return trees
+
+
+def build_firestore_tree(db, collection_name, args):
+    tree = DocumentMerkleTree(args.leaf_bits)
+    for doc_id, doc_hash in iter_firestore_hashes(db, collection_name, args.page_size):
+        tree.add(doc_id, doc_hash)
+    return tree
+
+
+# Second pass: collect the hashes of the documents in mismatched leaves only
+def collect_source_leaves(args, projectors, leaves_by_collection):
+    hashes = {collection_name: {} for collection_name in leaves_by_collection}
+    for collection_name, records in iter_source_collections(args.export):
+        leaves = leaves_by_collection.get(collection_name)
+        if not leaves:
+            continue
+        tree = DocumentMerkleTree(args.leaf_bits)
+        for doc_id, doc_hash in iter_source_hashes(records, projectors[collection_name]):
+            if tree.leaf_of(doc_id) in leaves:
+                hashes[collection_name][doc_id] = doc_hash
+    return hashes
+
+
+# Leaves are doc ID ranges, so only the mismatched ones are read again; adjacent leaves share one query
+def collect_firestore_leaves(db, collection_name, leaves, args):
+    tree = DocumentMerkleTree(args.leaf_bits)
+    runs = []
+    for leaf in sorted(leaves):
+        if runs and runs[-1][1] == leaf - 1:
+            runs[-1][1] = leaf
+        else:
+            runs.append([leaf, leaf])
+
+    hashes = {}
+    for first, last in runs:
+        low, high = tree.leaf_range(first)[0], tree.leaf_range(last)[1]
+        hashes.update(iter_firestore_hashes(db, collection_name, args.page_size, low, high))
+    return hashes
+
+
+def compare_documents(source_hashes, firestore_hashes):
+    missing = sorted(set(source_hashes) - set(firestore_hashes))
+    extra = sorted(set(firestore_hashes) - set(source_hashes))
+    differing = sorted(doc_id for doc_id in set(source_hashes) & set(firestore_hashes)
+                       if source_hashes[doc_id] != firestore_hashes[doc_id])
+    return missing, extra, differing
+
+
+def print_ids(label, ids, sample):
+    if ids:
+        shown = ", ".join(ids[:sample]) + (", ..." if len(ids) > sample else "")
+        print(f"   {label}: {len(ids)} ({shown})")
+
+
+def main():
+    args = parser.parse_args()
+    db = initialize_firestore(args.service_account)
+    projectors = compile_projectors(load_schema(args.schema).columns)
+
+    collection_names = set(args.collections or projectors)
+    unknown = collection_names - set(projectors)
+    if unknown:
+        print(f"❌ ERROR: Collections not in schema: {', '.join(sorted(unknown))}")
+        sys.exit(1)
+
+    print(f"🔍 Building Merkle trees for {len(collection_names)} collections ...")
+    with ThreadPoolExecutor(max_workers=max(1, args.workers) + 1, thread_name_prefix="verify-worker") as executor:
+        # The export is one sequential stream, read alongside the Firestore collections
+        source_future = executor.submit(build_source_trees, args, projectors, collection_names)
+        firestore_futures = {collection_name: executor.submit(build_firestore_tree, db, collection_name, args)
+                             for collection_name in sorted(collection_names)}
+        try:
+            source_trees = source_future.result()
+        except (ValueError, OSError) as e:
+            print(f"❌ ERROR: Failed to read export - {e}")
+            sys.exit(1)
+        firestore_trees = {collection_name: future.result() for collection_name, future in firestore_futures.items()}
+
+    # Collections the export does not contain are only compared when named explicitly
+    if not args.collections:
+        collection_names = set(source_trees)
+
+    mismatched = {}
+    report = {"generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "export": args.export, "collections": {}}
+    for collection_name in sorted(collection_names):
+        source_tree = source_trees.get(collection_name, DocumentMerkleTree(args.leaf_bits))
+        firestore_tree = firestore_trees[collection_name]
+        leaves, comparisons = source_tree.diff(firestore_tree)
+        report["collections"][collection_name] = {
+            "source_documents": source_tree.count,
+            "firestore_documents": firestore_tree.count,
+            "source_root": source_tree.root(),
+            "firestore_root": firestore_tree.root(),
+            "comparisons": comparisons,
+            "mismatched_leaves": len(leaves),
+        }
+        if leaves:
+            mismatched[collection_name] = set(leaves)
+
+    if mismatched:
+        print(f"🔎 Re-reading {sum(len(leaves) for leaves in mismatched.values())} mismatched leaves ...")
+        with ThreadPoolExecutor(max_workers=max(1, args.workers) + 1, thread_name_prefix="verify-worker") as executor:
+            source_future = executor.submit(collect_source_leaves, args, projectors, mismatched)
+            firestore_futures = {collection_name: executor.submit(collect_firestore_leaves, db, collection_name,
+                                                                  leaves, args)
+                                 for collection_name, leaves in mismatched.items()}
+            source_hashes = source_future.result()
+            firestore_hashes = {collection_name: future.result() for collection_name, future in firestore_futures.items()}
+
+    total_differences = 0
+    for collection_name, result in report["collections"].items():
+        missing, extra, differing = [], [], []
+        if collection_name in mismatched:
+            missing, extra, differing = compare_documents(source_hashes[collection_name],
+                                                          firestore_hashes[collection_name])
+        result.update(missing=missing, extra=extra, differing=differing)
+        total_differences += len(missing) + len(extra) + len(differing)
+
+        if missing or extra or differing:
+            print(f"❌ {collection_name}: {result['source_documents']} in export, "
+                  f"{result['firestore_documents']} in Firestore")
+            print_ids("missing from Firestore", missing, args.sample)
+            print_ids("only in Firestore", extra, args.sample)
+            print_ids("differing content", differing, args.sample)
+        else:
+            print(f"✅ {collection_name}: {result['source_documents']} documents match "
+                  f"({result['comparisons']} comparisons)")
+
+    try:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=4)
+        print(f"💾 Verification report saved to '{args.report}'")
+    except OSError as e:
+        print(f"⚠️ WARNING: Failed to write report file '{args.report}': {e}")
+
+    if total_differences:
+        print(f"⚠️ Verification found {total_differences} differences.")
+        sys.exit(1)
+    print("🔥 Firestore matches the export!")
+
+
+if __name__ == "__main__":
+    main()